@@ -0,0 +1,43 @@
+"""ledger checkpoints
+
+Revision ID: 2c8e4a6f0b19
+Revises: 9d3c5e7a1f42
+Create Date: 2025-10-26 13:58:42.661904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2c8e4a6f0b19'
+down_revision: Union[str, Sequence[str], None] = '9d3c5e7a1f42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('ledger_checkpoints',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('ledger_id', sa.Integer(), nullable=False),
+    sa.Column('as_of', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('balance', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_ledger_checkpoints_account_ledger', 'ledger_checkpoints', ['account_id', 'ledger_id'], unique=True)
+    op.create_index('ix_ledger_checkpoints_account_as_of', 'ledger_checkpoints', ['account_id', 'as_of'], unique=False)
+    op.create_index('ix_ledger_account_id_id', 'ledger', ['account_id', 'id'], unique=False, postgresql_include=['amount'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_ledger_account_id_id', table_name='ledger')
+    op.drop_index('ix_ledger_checkpoints_account_as_of', table_name='ledger_checkpoints')
+    op.drop_index('ix_ledger_checkpoints_account_ledger', table_name='ledger_checkpoints')
+    op.drop_table('ledger_checkpoints')
@@ -0,0 +1,45 @@
+"""maintain account balances
+
+Revision ID: 3f2a9c71d4e0
+Revises: 898ec1394bb6
+Create Date: 2025-10-20 10:12:04.118342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f2a9c71d4e0'
+down_revision: Union[str, Sequence[str], None] = '898ec1394bb6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # accounts.balance used to be a snapshot that was never committed after
+    # transfers, so seed it from the ledger before it becomes authoritative.
+    op.execute(
+        """
+        UPDATE accounts
+        SET balance = COALESCE(
+            (SELECT SUM(ledger.amount) FROM ledger WHERE ledger.account_id = accounts.id),
+            0
+        )
+        """
+    )
+    op.alter_column('accounts', 'balance',
+               existing_type=sa.Numeric(precision=14, scale=2),
+               nullable=False,
+               server_default=sa.text('0.00'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column('accounts', 'balance',
+               existing_type=sa.Numeric(precision=14, scale=2),
+               nullable=True,
+               server_default=None)
@@ -0,0 +1,142 @@
+"""partition ledger and transfers by month
+
+Revision ID: 7a4f2d9e6c31
+Revises: 2c8e4a6f0b19
+Create Date: 2025-10-27 10:12:05.318247
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a4f2d9e6c31'
+down_revision: Union[str, Sequence[str], None] = '2c8e4a6f0b19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Keep in step with banking_app.partitions.
+MONTHS_AHEAD = 3
+
+INDEXES = {
+    'ledger': [
+        ('ix_ledger_id', ['id'], {}),
+        ('ix_ledger_account_created_id', ['account_id', 'created_at', 'id'], {}),
+        ('ix_ledger_account_id_id', ['account_id', 'id'], {'postgresql_include': ['amount']}),
+    ],
+    'transfers': [
+        ('ix_transfers_id', ['id'], {}),
+    ],
+}
+
+FOREIGN_KEYS = {
+    'ledger': [('ledger_account_id_fkey', 'accounts', ['account_id'])],
+    'transfers': [
+        ('transfers_from_account_id_fkey', 'accounts', ['from_account_id']),
+        ('transfers_to_account_id_fkey', 'accounts', ['to_account_id']),
+    ],
+}
+
+# Foreign keys into ledger/transfers; a partitioned table's unique keys must
+# include created_at, so nothing can reference id alone any more.
+INBOUND_FOREIGN_KEYS = [
+    ('ledger_transfer_id_fkey', 'ledger', 'transfers', ['transfer_id']),
+    ('account_activity_ledger_id_fkey', 'account_activity', 'ledger', ['ledger_id']),
+    ('account_activity_transfer_id_fkey', 'account_activity', 'transfers', ['transfer_id']),
+]
+
+
+def _months():
+    first = op.get_bind().execute(sa.text(
+        'SELECT least((SELECT min(created_at) FROM ledger), (SELECT min(created_at) FROM transfers))'
+    )).scalar()
+    now = datetime.now(timezone.utc)
+    index = (first or now).year * 12 + (first or now).month - 1
+    last = now.year * 12 + now.month - 1 + MONTHS_AHEAD
+    for i in range(index, last + 1):
+        yield (
+            datetime(i // 12, i % 12 + 1, 1, tzinfo=timezone.utc),
+            datetime((i + 1) // 12, (i + 1) % 12 + 1, 1, tzinfo=timezone.utc),
+        )
+
+
+def _partition(table, months):
+    old = f'{table}_unpartitioned'
+    op.execute(f'ALTER TABLE {table} RENAME TO {old}')
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY NONE')
+    op.execute(
+        f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)'
+    )
+    op.execute(f'ALTER TABLE {table} ALTER COLUMN created_at SET NOT NULL')
+    op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+    for low, high in months:
+        op.execute(
+            f'CREATE TABLE {table}_y{low.year:04d}m{low.month:02d} PARTITION OF {table}'
+            f" FOR VALUES FROM ('{low.isoformat()}') TO ('{high.isoformat()}')"
+        )
+    op.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+    op.execute(f'DROP TABLE {old}')
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id')
+    op.create_primary_key(f'{table}_pkey', table, ['id', 'created_at'])
+    for name, columns, kwargs in INDEXES[table]:
+        op.create_index(name, table, columns, unique=False, **kwargs)
+    for name, target, columns in FOREIGN_KEYS[table]:
+        op.create_foreign_key(name, table, target, columns, ['id'])
+
+
+def _unpartition(table):
+    old = f'{table}_partitioned'
+    op.execute(f'ALTER TABLE {table} RENAME TO {old}')
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY NONE')
+    op.execute(f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS)')
+    op.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+    op.execute(f'DROP TABLE {old}')
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id')
+    op.execute(f'ALTER TABLE {table} ALTER COLUMN created_at DROP NOT NULL')
+    op.create_primary_key(f'{table}_pkey', table, ['id'])
+    for name, columns, kwargs in INDEXES[table]:
+        op.create_index(name, table, columns, unique=False, **kwargs)
+    for name, target, columns in FOREIGN_KEYS[table]:
+        op.create_foreign_key(name, table, target, columns, ['id'])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    postgresql = op.get_bind().dialect.name == 'postgresql'
+    op.create_table('transfer_idempotency_keys',
+    sa.Column('idempotency_key', sa.String(), nullable=False),
+    sa.Column('transfer_id', sa.Integer(), nullable=False),
+    sa.Column('transfer_created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('idempotency_key')
+    )
+    op.execute('UPDATE transfers SET created_at = now() WHERE created_at IS NULL')
+    op.execute('UPDATE ledger SET created_at = now() WHERE created_at IS NULL')
+    # Generated keys are unique uuids, but there is no telling them apart
+    # from client keys here, so carry them all over.
+    op.execute(
+        'INSERT INTO transfer_idempotency_keys (idempotency_key, transfer_id, transfer_created_at)'
+        ' SELECT idempotency_key, id, created_at FROM transfers'
+    )
+    op.drop_index(op.f('ix_transfers_idempotency_key'), table_name='transfers')
+    if not postgresql:
+        return
+
+    for name, table, _, _ in INBOUND_FOREIGN_KEYS:
+        op.drop_constraint(name, table, type_='foreignkey')
+    months = list(_months())
+    for table in ('transfers', 'ledger'):
+        _partition(table, months)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        for table in ('transfers', 'ledger'):
+            _unpartition(table)
+        for name, table, target, columns in INBOUND_FOREIGN_KEYS:
+            op.create_foreign_key(name, table, target, columns, ['id'])
+    op.create_index(op.f('ix_transfers_idempotency_key'), 'transfers', ['idempotency_key'], unique=True)
+    op.drop_table('transfer_idempotency_keys')
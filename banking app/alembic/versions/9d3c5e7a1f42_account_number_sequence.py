@@ -0,0 +1,29 @@
+"""account number sequence
+
+Revision ID: 9d3c5e7a1f42
+Revises: e6b1f4a93c58
+Create Date: 2025-10-25 09:41:17.503266
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3c5e7a1f42'
+down_revision: Union[str, Sequence[str], None] = 'e6b1f4a93c58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # INCREMENT BY must match models.account.ACCOUNT_NUMBER_BLOCK_SIZE.
+    op.execute(sa.schema.CreateSequence(sa.Sequence('account_number_seq', increment=64)))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(sa.schema.DropSequence(sa.Sequence('account_number_seq')))
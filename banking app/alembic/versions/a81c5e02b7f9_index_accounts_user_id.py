@@ -0,0 +1,27 @@
+"""index accounts user_id
+
+Revision ID: a81c5e02b7f9
+Revises: 3f2a9c71d4e0
+Create Date: 2025-10-21 09:41:27.503116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a81c5e02b7f9'
+down_revision: Union[str, Sequence[str], None] = '3f2a9c71d4e0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_accounts_user_id'), 'accounts', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_accounts_user_id'), table_name='accounts')
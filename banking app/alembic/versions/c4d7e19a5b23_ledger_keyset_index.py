@@ -0,0 +1,27 @@
+"""ledger keyset index
+
+Revision ID: c4d7e19a5b23
+Revises: a81c5e02b7f9
+Create Date: 2025-10-22 14:05:51.276480
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d7e19a5b23'
+down_revision: Union[str, Sequence[str], None] = 'a81c5e02b7f9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_ledger_account_created_id', 'ledger', ['account_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_ledger_account_created_id', table_name='ledger')
@@ -0,0 +1,41 @@
+"""account balance buckets
+
+Revision ID: d5a1f8e3b7c4
+Revises: b3e8c6d1f5a2
+Create Date: 2025-10-29 15:22:48.160592
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a1f8e3b7c4'
+down_revision: Union[str, Sequence[str], None] = 'b3e8c6d1f5a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('accounts', sa.Column('balance_buckets', sa.Integer(), server_default='0', nullable=False))
+    op.create_table('account_balance_buckets',
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('bucket', sa.Integer(), nullable=False),
+    sa.Column('balance', sa.Numeric(precision=14, scale=2), server_default='0.00', nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ),
+    sa.PrimaryKeyConstraint('account_id', 'bucket')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Fold any sharded balances back onto the account rows first.
+    op.execute(
+        'UPDATE accounts SET balance = balance + coalesce((SELECT sum(b.balance)'
+        ' FROM account_balance_buckets b WHERE b.account_id = accounts.id), 0)'
+    )
+    op.drop_table('account_balance_buckets')
+    op.drop_column('accounts', 'balance_buckets')
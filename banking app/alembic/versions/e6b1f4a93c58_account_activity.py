@@ -0,0 +1,64 @@
+"""account activity read model
+
+Revision ID: e6b1f4a93c58
+Revises: 5b9e0d8c2a17
+Create Date: 2025-10-24 16:03:51.227690
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6b1f4a93c58'
+down_revision: Union[str, Sequence[str], None] = '5b9e0d8c2a17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('account_activity',
+    sa.Column('ledger_id', sa.Integer(), nullable=False),
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('transfer_id', sa.Integer(), nullable=False),
+    sa.Column('direction', sa.String(length=8), nullable=False),
+    sa.Column('counterparty_account_number', sa.String(), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('description', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('occurred_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ),
+    sa.ForeignKeyConstraint(['ledger_id'], ['ledger.id'], ),
+    sa.ForeignKeyConstraint(['transfer_id'], ['transfers.id'], ),
+    sa.PrimaryKeyConstraint('ledger_id')
+    )
+    op.create_index('ix_account_activity_account_occurred_ledger', 'account_activity', ['account_id', 'occurred_at', 'ledger_id'], unique=False, postgresql_include=['transfer_id', 'direction', 'counterparty_account_number', 'amount', 'description', 'status'])
+    # Existing history. Large ledgers can instead be filled in batches with
+    # `python -m banking_app.commands.backfill_account_activity`.
+    op.execute(
+        """
+        INSERT INTO account_activity (
+            ledger_id, account_id, transfer_id, direction,
+            counterparty_account_number, amount, description, status, occurred_at
+        )
+        SELECT ledger.id, ledger.account_id, ledger.transfer_id,
+               CASE WHEN ledger.amount < 0 THEN 'outgoing' ELSE 'incoming' END,
+               CASE WHEN ledger.amount < 0 THEN to_account.account_number
+                    ELSE from_account.account_number END,
+               ABS(ledger.amount), ledger.description, transfers.status,
+               ledger.created_at
+        FROM ledger
+        JOIN transfers ON ledger.transfer_id = transfers.id
+        JOIN accounts AS from_account ON transfers.from_account_id = from_account.id
+        JOIN accounts AS to_account ON transfers.to_account_id = to_account.id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_account_activity_account_occurred_ledger', table_name='account_activity')
+    op.drop_table('account_activity')
@@ -0,0 +1,274 @@
+"""Shared helpers for the benchmark scripts in this directory.
+
+Benchmarks run against ``BENCH_DATABASE_URL``, defaulting to a throwaway
+SQLite file (install the ``bench`` extra for ``aiosqlite``). The schema at
+that URL is dropped and recreated on every run, so never point it at a
+database you care about.
+"""
+from __future__ import annotations
+
+import json
+import os
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+
+DEFAULT_URL = "sqlite+aiosqlite:///" + os.path.join(
+    tempfile.gettempdir(), "banking_bench.db"
+)
+BENCH_DATABASE_URL = os.environ.get("BENCH_DATABASE_URL", DEFAULT_URL)
+# Benchmarks that drive the app in-process must hit the benchmark database,
+# never whatever DATABASE_URL is configured for the app.
+os.environ["DATABASE_URL"] = BENCH_DATABASE_URL
+
+from sqlalchemy import event, insert  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from banking_app.models import (  # noqa: E402
+    Account,
+    AccountActivity,
+    Base,
+    Ledger,
+    Transfer,
+    User,
+)
+
+PASSWORD = "bench-password"
+
+
+def make_engine(**kwargs):
+    return create_async_engine(BENCH_DATABASE_URL, **kwargs)
+
+
+def make_sessionmaker(engine):
+    return sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def reset_schema(engine) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def seed(
+    engine,
+    users: int,
+    accounts_per_user: int,
+    ledger_rows_per_account: int,
+    opening_balance: Decimal = Decimal("1000.00"),
+    hashed_password: str = "unused",
+) -> dict[int, list[tuple[int, str]]]:
+    """Bulk-insert users, accounts and ledger history.
+
+    Ledger rows alternate +1/-1 after the opening deposit so every account's
+    ledger sum matches ``opening_balance``. Returns ``{user_id: [(account_id,
+    account_number), ...]}``.
+    """
+    layout: dict[int, list[tuple[int, str]]] = {}
+    async with engine.begin() as conn:
+        user_rows = [
+            {
+                "email": f"bench{i}@example.com",
+                "full_name": f"Bench User {i}",
+                "hashed_password": hashed_password,
+            }
+            for i in range(users)
+        ]
+        user_ids = (
+            await conn.execute(insert(User).returning(User.id), user_rows)
+        ).scalars().all()
+
+        account_rows = []
+        for user_id in user_ids:
+            for j in range(accounts_per_user):
+                account_rows.append(
+                    {
+                        "user_id": user_id,
+                        "account_name": f"Bench {j}",
+                        "account_number": f"{user_id:06d}{j:06d}",
+                        "balance": opening_balance,
+                    }
+                )
+        accounts = (
+            await conn.execute(
+                insert(Account).returning(
+                    Account.id, Account.user_id, Account.account_number
+                ),
+                account_rows,
+            )
+        ).all()
+
+        batch = []
+        for account_id, user_id, number in accounts:
+            layout.setdefault(user_id, []).append((account_id, number))
+            batch.append(
+                {
+                    "account_id": account_id,
+                    "amount": opening_balance,
+                    "description": "Initial deposit",
+                }
+            )
+            for k in range(ledger_rows_per_account - 1):
+                batch.append(
+                    {
+                        "account_id": account_id,
+                        "amount": Decimal("1.00") if k % 2 == 0 else Decimal("-1.00"),
+                        "description": "history",
+                    }
+                )
+                if len(batch) >= 5000:
+                    await conn.execute(insert(Ledger), batch)
+                    batch = []
+            if ledger_rows_per_account % 2 == 0:
+                # An odd number of +/-1 rows leaves a stray +1 behind.
+                batch.append(
+                    {
+                        "account_id": account_id,
+                        "amount": Decimal("-1.00"),
+                        "description": "history",
+                    }
+                )
+        if batch:
+            await conn.execute(insert(Ledger), batch)
+    return layout
+
+
+async def seed_transfer_history(
+    engine, layout: dict[int, list[tuple[int, str]]], transfers_per_account: int
+) -> None:
+    """Bulk-insert completed transfers between consecutive seeded accounts.
+
+    Transfers go back and forth in 1.00 pairs so balances are unchanged;
+    ledger and account_activity rows are written as the app would.
+    """
+    accounts = [account for user_accounts in layout.values() for account in user_accounts]
+    if len(accounts) < 2 or transfers_per_account <= 0:
+        return
+    async with engine.begin() as conn:
+        for i, (source_id, source_number) in enumerate(accounts):
+            destination_id, destination_number = accounts[(i + 1) % len(accounts)]
+            legs = [
+                (source_id, source_number, destination_id, destination_number)
+                if k % 2 == 0
+                else (destination_id, destination_number, source_id, source_number)
+                for k in range(transfers_per_account - transfers_per_account % 2)
+            ]
+            if not legs:
+                continue
+            transfer_ids = (
+                await conn.execute(
+                    insert(Transfer).returning(Transfer.id, sort_by_parameter_order=True),
+                    [
+                        {
+                            "idempotency_key": f"seed-{source_id}-{k}",
+                            "from_account_id": from_id,
+                            "to_account_id": to_id,
+                            "amount": Decimal("1.00"),
+                            "description": "history",
+                            "status": "completed",
+                        }
+                        for k, (from_id, _, to_id, _) in enumerate(legs)
+                    ],
+                )
+            ).scalars().all()
+            ledger_rows, counterparties = [], []
+            for transfer_id, (from_id, from_number, to_id, to_number) in zip(transfer_ids, legs):
+                for account_id, amount, counterparty in (
+                    (from_id, Decimal("-1.00"), to_number),
+                    (to_id, Decimal("1.00"), from_number),
+                ):
+                    ledger_rows.append(
+                        {
+                            "account_id": account_id,
+                            "amount": amount,
+                            "description": "history",
+                            "transfer_id": transfer_id,
+                        }
+                    )
+                    counterparties.append(counterparty)
+            written = (
+                await conn.execute(
+                    insert(Ledger).returning(
+                        Ledger.id,
+                        Ledger.account_id,
+                        Ledger.transfer_id,
+                        Ledger.amount,
+                        Ledger.created_at,
+                        sort_by_parameter_order=True,
+                    ),
+                    ledger_rows,
+                )
+            ).all()
+            await conn.execute(
+                insert(AccountActivity),
+                [
+                    {
+                        "ledger_id": row.id,
+                        "account_id": row.account_id,
+                        "transfer_id": row.transfer_id,
+                        "direction": "outgoing" if row.amount < 0 else "incoming",
+                        "counterparty_account_number": counterparty,
+                        "amount": abs(row.amount),
+                        "description": "history",
+                        "status": "completed",
+                        "occurred_at": row.created_at,
+                    }
+                    for row, counterparty in zip(written, counterparties)
+                ],
+            )
+
+
+@contextmanager
+def count_queries(engine):
+    """Count statements sent on ``engine`` while the block runs."""
+    counter = {"queries": 0}
+
+    def before_cursor_execute(*args, **kwargs):
+        counter["queries"] += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+def summarize(samples_ms: list[float], elapsed_s: float | None = None) -> dict:
+    ordered = sorted(samples_ms)
+
+    def pct(p: float) -> float:
+        if not ordered:
+            return 0.0
+        index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))
+        return round(ordered[index], 3)
+
+    summary = {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 3) if ordered else 0.0,
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+    }
+    if elapsed_s:
+        summary["rps"] = round(len(ordered) / elapsed_s, 1)
+    return summary
+
+
+async def timed(coro_factory, iterations: int) -> list[float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await coro_factory()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def emit(report: dict, path: str | None = None) -> None:
+    text = json.dumps(report, indent=2, default=str)
+    if path:
+        with open(path, "w") as fh:
+            fh.write(text + "\n")
+    print(text)
@@ -0,0 +1,88 @@
+"""Benchmark ``GET /accounts/`` listing cost as accounts and history grow.
+
+Compares ``crud.account.get_accounts_by_user`` (one indexed read) against the
+previous per-account ``SUM(ledger)`` + flush refresh loop, over a grid of
+accounts-per-user and ledger-rows-per-account.
+
+    python benchmarks/account_listing.py [--iterations 50] [--json out.json]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from _common import (
+    count_queries,
+    emit,
+    make_engine,
+    make_sessionmaker,
+    reset_schema,
+    seed,
+    summarize,
+    timed,
+)
+from sqlalchemy import func, select
+
+from banking_app.crud import account as account_crud
+from banking_app.models import Account, Ledger
+
+ACCOUNTS_PER_USER = (1, 5, 20, 50)
+LEDGER_ROWS_PER_ACCOUNT = (10, 100, 1000)
+
+
+async def legacy_listing(db, user_id: int):
+    result = await db.execute(select(Account).where(Account.user_id == user_id))
+    accounts = result.scalars().all()
+    for account in accounts:
+        total = await db.execute(
+            select(func.sum(Ledger.amount)).where(Ledger.account_id == account.id)
+        )
+        account.balance = total.scalar()
+        await db.flush()
+    return accounts
+
+
+async def run_case(accounts: int, rows: int, iterations: int) -> dict:
+    engine = make_engine()
+    Session = make_sessionmaker(engine)
+    await reset_schema(engine)
+    # A second user with the same shape keeps the listed user from being
+    # the whole table.
+    layout = await seed(engine, users=2, accounts_per_user=accounts, ledger_rows_per_account=rows)
+    user_id = next(iter(layout))
+
+    results = {"accounts_per_user": accounts, "ledger_rows_per_account": rows}
+    for name, listing in (
+        ("single_query", account_crud.get_accounts_by_user),
+        ("legacy_refresh_loop", legacy_listing),
+    ):
+        async def once():
+            async with Session() as db:
+                await listing(db, user_id)
+                await db.rollback()
+
+        await once()  # warm the statement cache and connection pool
+        with count_queries(engine) as counter:
+            await once()
+        samples = await timed(once, iterations)
+        results[name] = {**summarize(samples), "queries": counter["queries"]}
+
+    await engine.dispose()
+    return results
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--json", help="Also write the report to this path")
+    args = parser.parse_args()
+
+    cases = []
+    for accounts in ACCOUNTS_PER_USER:
+        for rows in LEDGER_ROWS_PER_ACCOUNT:
+            cases.append(await run_case(accounts, rows, args.iterations))
+    emit({"benchmark": "account_listing", "cases": cases}, args.json)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
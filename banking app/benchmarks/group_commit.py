@@ -0,0 +1,145 @@
+"""Transfers/sec with group commit at different batch sizes.
+
+``--workers`` tasks each submit transfers back to back, as concurrent
+requests would, between a few funded sources and many destinations. The
+``direct`` run calls ``create_transfer`` with one transaction per transfer;
+the ``group_N`` runs go through ``TransferGroupCommitter`` with
+``max_batch=N`` and ``--max-wait-ms``. Reports transfers/sec, commits,
+per-transfer latency and whether any account went below zero.
+
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/group_commit.py \\
+        [--workers 64] [--transfers 4000] [--batch-sizes 1,8,32,64,128]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+from decimal import Decimal
+
+from _common import emit, make_engine, make_sessionmaker, reset_schema, seed, summarize
+from sqlalchemy import event, func, select
+
+from banking_app.crud import transfer as transfer_crud
+from banking_app.group_commit import TransferGroupCommitter
+from banking_app.models import Account
+from banking_app.schemas.account import TransferCreate
+
+
+async def run(name: str, batch_size: int | None, args) -> dict:
+    engine = make_engine(pool_size=min(args.workers, 20), max_overflow=0)
+    Session = make_sessionmaker(engine)
+    await reset_schema(engine)
+    layout = await seed(
+        engine,
+        users=args.sources + args.destinations,
+        accounts_per_user=1,
+        ledger_rows_per_account=1,
+        opening_balance=Decimal(args.opening_balance),
+    )
+    owners = [(user_id, accounts[0][1]) for user_id, accounts in layout.items()]
+    sources, destinations = owners[: args.sources], owners[args.sources :]
+    rng = random.Random(7)
+    queue: asyncio.Queue = asyncio.Queue()
+    for _ in range(args.transfers):
+        user_id, number = rng.choice(sources)
+        queue.put_nowait(
+            (
+                user_id,
+                TransferCreate(
+                    from_account_number=number,
+                    to_account_number=rng.choice(destinations)[1],
+                    amount=Decimal("1.00"),
+                    description="bench",
+                ),
+            )
+        )
+
+    committer = None
+    if batch_size is not None:
+        committer = TransferGroupCommitter(Session, batch_size, args.max_wait_ms / 1000)
+
+    async def submit(user_id, transfer):
+        if committer is not None:
+            return await committer.submit(user_id, transfer)
+        async with Session() as db:
+            return await transfer_crud.create_transfer(
+                db,
+                user_id=user_id,
+                from_account_number=transfer.from_account_number,
+                to_account_number=transfer.to_account_number,
+                amount=transfer.amount,
+                description=transfer.description,
+            )
+
+    outcome = {"completed": 0, "rejected": 0, "errors": 0}
+    samples: list[float] = []
+
+    async def worker():
+        while not queue.empty():
+            user_id, transfer = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                await submit(user_id, transfer)
+                outcome["completed"] += 1
+            except transfer_crud.InsufficientFundsError:
+                outcome["rejected"] += 1
+            except Exception:
+                outcome["errors"] += 1
+            samples.append((time.perf_counter() - start) * 1000)
+
+    commits = {"count": 0}
+
+    def on_commit(conn):
+        commits["count"] += 1
+
+    event.listen(engine.sync_engine, "commit", on_commit)
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.workers)))
+    elapsed = time.perf_counter() - started
+    event.remove(engine.sync_engine, "commit", on_commit)
+    if committer is not None:
+        await committer.close()
+
+    async with Session() as db:
+        balances = (await db.execute(select(Account.balance))).scalars().all()
+        total = (await db.execute(select(func.sum(Account.balance)))).scalar()
+    await engine.dispose()
+
+    return {
+        "engine": name,
+        **outcome,
+        "transfers_per_sec": round(outcome["completed"] / elapsed, 1),
+        "commits": commits["count"],
+        "latency": summarize(samples),
+        "total_balance": str(total),
+        "overdrawn_accounts": sum(1 for b in balances if b < 0),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=64)
+    parser.add_argument("--transfers", type=int, default=4000)
+    parser.add_argument("--sources", type=int, default=8)
+    parser.add_argument("--destinations", type=int, default=64)
+    parser.add_argument("--opening-balance", default="1000.00")
+    parser.add_argument(
+        "--batch-sizes",
+        default="1,8,32,64,128",
+        help="Comma-separated max batch sizes to try",
+    )
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--json", help="Also write the report to this path")
+    args = parser.parse_args()
+
+    report = {"benchmark": "group_commit", "params": vars(args), "runs": []}
+    report["runs"].append(await run("direct", None, args))
+    for size in (int(s) for s in args.batch_sizes.split(",")):
+        report["runs"].append(await run(f"group_{size}", size, args))
+    emit(report, args.json)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
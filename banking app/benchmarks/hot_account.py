@@ -0,0 +1,120 @@
+"""Contention on one hot account, with and without balance buckets.
+
+``--workers`` tasks, each paying from its own funded account, send 1.00
+transfers to a single merchant account as fast as they can; every
+``--payout-every``-th transfer goes the other way instead, a debit from the
+merchant. The ``unsharded`` run leaves the merchant as a plain account, so
+every transfer queues on its row lock; the ``buckets_N`` runs spread its
+credits over N balance buckets first (``crud.account.set_balance_buckets``).
+Reports transfers/sec and latency, and checks the merchant's bucketed
+balance against its ledger.
+
+Lock contention only shows on a database with row locks:
+
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/hot_account.py \\
+        [--workers 32] [--transfers 3000] [--buckets 4,16]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from decimal import Decimal
+
+from _common import emit, make_engine, make_sessionmaker, reset_schema, seed, summarize
+
+from banking_app.crud import account as account_crud
+from banking_app.crud import transfer as transfer_crud
+
+AMOUNT = Decimal("1.00")
+
+
+async def run(name: str, buckets: int, args) -> dict:
+    engine = make_engine(pool_size=args.workers, max_overflow=0)
+    Session = make_sessionmaker(engine)
+    await reset_schema(engine)
+    layout = await seed(
+        engine,
+        users=args.workers + 1,
+        accounts_per_user=1,
+        ledger_rows_per_account=1,
+        opening_balance=Decimal(args.opening_balance),
+    )
+    owners = [(user_id, accounts[0]) for user_id, accounts in layout.items()]
+    (merchant_user, (merchant_id, merchant)), payers = owners[0], owners[1:]
+    if buckets:
+        async with Session() as db:
+            await account_crud.set_balance_buckets(db, merchant_id, buckets)
+            await db.commit()
+
+    per_worker = args.transfers // args.workers
+    outcome = {"completed": 0, "rejected": 0, "errors": 0}
+    samples: list[float] = []
+
+    async def worker(user_id: int, account_number: str):
+        for i in range(per_worker):
+            payout = args.payout_every and i % args.payout_every == args.payout_every - 1
+            start = time.perf_counter()
+            async with Session() as db:
+                try:
+                    if payout:
+                        await transfer_crud.create_transfer(
+                            db, merchant_user, merchant, account_number, AMOUNT, "payout"
+                        )
+                    else:
+                        await transfer_crud.create_transfer(
+                            db, user_id, account_number, merchant, AMOUNT, "sale"
+                        )
+                    outcome["completed"] += 1
+                except transfer_crud.InsufficientFundsError:
+                    outcome["rejected"] += 1
+                except Exception:
+                    outcome["errors"] += 1
+            samples.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(user_id, number) for user_id, (_, number) in payers))
+    elapsed = time.perf_counter() - started
+
+    async with Session() as db:
+        maintained, ledger = await account_crud.verify_account_balance(db, merchant_id)
+    await engine.dispose()
+
+    return {
+        "engine": name,
+        **outcome,
+        "transfers_per_sec": round(outcome["completed"] / elapsed, 1),
+        "latency": summarize(samples),
+        "merchant_balance": str(maintained),
+        "merchant_matches_ledger": maintained == ledger,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--transfers", type=int, default=3000)
+    parser.add_argument(
+        "--payout-every",
+        type=int,
+        default=20,
+        help="Every Nth transfer per worker is a debit from the merchant (0: none)",
+    )
+    parser.add_argument(
+        "--buckets",
+        default="4,16",
+        help="Comma-separated bucket counts to try",
+    )
+    parser.add_argument("--opening-balance", default="100000.00")
+    parser.add_argument("--json", help="Also write the report to this path")
+    args = parser.parse_args()
+
+    report = {"benchmark": "hot_account", "params": vars(args), "runs": []}
+    report["runs"].append(await run("unsharded", 0, args))
+    for buckets in (int(b) for b in args.buckets.split(",")):
+        report["runs"].append(await run(f"buckets_{buckets}", buckets, args))
+    emit(report, args.json)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
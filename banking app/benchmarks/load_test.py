@@ -0,0 +1,164 @@
+"""Load test for the API hot paths.
+
+Seeds ``--users`` users with ``--accounts-per-user`` accounts and
+``--history`` transfers per account, then drives each endpoint in turn with
+``--concurrency`` asyncio workers for ``--duration`` seconds:
+
+* ``login``: ``POST /auth/login``
+* ``list_accounts``: ``GET /accounts/``
+* ``transfer``: ``POST /accounts/transfer``
+* ``transactions``: ``GET /accounts/transactions`` (offset pages)
+* ``transactions_cursor``: the same, walking keyset cursors
+
+Requests go to the app in-process through httpx's ASGI transport, or to a
+running server with ``--base-url`` (which must use ``BENCH_DATABASE_URL`` as
+its ``DATABASE_URL`` and ``RATE_LIMIT_ENABLED=false``; the in-process app
+has rate limiting switched off). Reports p50/p95/p99, requests/sec and status codes
+per endpoint as JSON.
+
+    python benchmarks/load_test.py [--duration 5] [--concurrency 16] [--json out.json]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+
+from _common import BENCH_DATABASE_URL, emit, make_engine, reset_schema, seed, seed_transfer_history, summarize
+import httpx
+
+from banking_app.auth.utils import get_password_hash
+
+PASSWORD = "bench-password"
+ENDPOINTS = ("login", "list_accounts", "transfer", "transactions", "transactions_cursor")
+
+
+def make_request(client, endpoint, user, numbers, state):
+    """Return a coroutine issuing one request of ``endpoint`` for ``user``."""
+    index, headers, accounts = user
+    if endpoint == "login":
+        form = {"username": f"bench{index}@example.com", "password": PASSWORD}
+        return client.post("/auth/login", data=form)
+    if endpoint == "list_accounts":
+        return client.get("/accounts/", headers=headers)
+    if endpoint == "transfer":
+        source = random.choice(accounts)
+        target = random.choice(numbers)
+        while target == source:
+            target = random.choice(numbers)
+        body = {
+            "from_account_number": source,
+            "to_account_number": target,
+            "amount": "0.01",
+            "description": "load test",
+        }
+        return client.post("/accounts/transfer", json=body, headers=headers)
+    account = random.choice(accounts)
+    params = {"account_number": account, "limit": 50}
+    if endpoint == "transactions":
+        params["offset"] = random.choice((0, 0, 50, 100))
+    else:
+        # Follow this worker's cursor chain, restarting after the last page.
+        params["cursor"] = state.get(account, "")
+    return client.get("/accounts/transactions", params=params, headers=headers)
+
+
+async def run_endpoint(client, endpoint, users, numbers, args) -> dict:
+    samples: list[float] = []
+    statuses: Counter = Counter()
+    deadline = time.perf_counter() + args.duration
+
+    async def worker(worker_index: int):
+        state: dict = {}
+        user = users[worker_index % len(users)]
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await make_request(client, endpoint, user, numbers, state)
+            samples.append((time.perf_counter() - start) * 1000)
+            statuses[response.status_code] += 1
+            if endpoint == "transactions_cursor" and response.status_code == 200:
+                account = response.request.url.params["account_number"]
+                state[account] = response.json()["next_cursor"] or ""
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+    report = summarize(samples, time.perf_counter() - started)
+    report["status_codes"] = {str(code): count for code, count in sorted(statuses.items())}
+    return report
+
+
+async def login_all(client, layout) -> list:
+    users = []
+    for index, (user_id, accounts) in enumerate(layout.items()):
+        response = await client.post(
+            "/auth/login",
+            data={"username": f"bench{index}@example.com", "password": PASSWORD},
+        )
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        users.append((index, headers, [number for _, number in accounts]))
+    return users
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--accounts-per-user", type=int, default=2)
+    parser.add_argument("--history", type=int, default=200, help="Transfers per account")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per endpoint")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--base-url", help="Load a running server instead of the in-process app")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for request mix")
+    parser.add_argument("--json", help="Also write the report to this path")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    engine = make_engine()
+    await reset_schema(engine)
+    started = time.perf_counter()
+    layout = await seed(
+        engine,
+        users=args.users,
+        accounts_per_user=args.accounts_per_user,
+        ledger_rows_per_account=1,
+        hashed_password=get_password_hash(PASSWORD),
+    )
+    await seed_transfer_history(engine, layout, args.history)
+    seed_seconds = round(time.perf_counter() - started, 2)
+    await engine.dispose()
+
+    if args.base_url:
+        transport, base_url = None, args.base_url
+    else:
+        from banking_app.config import settings
+        from banking_app.database import engine as app_engine
+        from banking_app.main import app
+
+        app_engine.sync_engine.echo = False
+        settings.rate_limit_enabled = False
+        transport, base_url = httpx.ASGITransport(app=app), "http://bench"
+
+    numbers = [number for accounts in layout.values() for _, number in accounts]
+    report = {
+        "benchmark": "load_test",
+        "database": BENCH_DATABASE_URL.split("://", 1)[0],
+        "params": vars(args),
+        "seed_seconds": seed_seconds,
+        "endpoints": {},
+    }
+    async with httpx.AsyncClient(
+        transport=transport, base_url=base_url, timeout=60
+    ) as client:
+        users = await login_all(client, layout)
+        for endpoint in args.endpoints:
+            report["endpoints"][endpoint] = await run_endpoint(
+                client, endpoint, users, numbers, args
+            )
+    emit(report, args.json)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,128 @@
+"""Transfer latency while /auth/login is hammered.
+
+Drives the ASGI app in-process with httpx: ``--transfer-workers`` tasks post
+transfers for ``--duration`` seconds, first alone and then alongside
+``--login-workers`` tasks looping on ``/auth/login``. The login phase runs
+twice: with the password hasher's thread pool, and with hashing forced back
+onto the event loop (the previous behaviour). Reports transfer p50/p95/p99
+and login throughput for each phase.
+
+    python benchmarks/login_load.py [--duration 5] [--login-workers 16]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from _common import emit, make_engine, reset_schema, seed, summarize
+import httpx
+
+from banking_app.auth import utils as auth_utils
+from banking_app.auth.utils import create_access_token, get_password_hash
+from banking_app.database import engine as app_engine
+from banking_app.main import app
+
+PASSWORD = "bench-password"
+
+
+class InlineHasher(auth_utils.PasswordHasher):
+    """The pre-pool behaviour: hash on the event loop thread."""
+
+    async def _run(self, fn, *args):
+        return fn(*args)
+
+
+async def phase(client, users, args, login_workers: int) -> dict:
+    deadline = time.perf_counter() + args.duration
+    transfer_samples: list[float] = []
+    logins = {"ok": 0, "rejected": 0}
+
+    async def transfer_worker(index: int):
+        user_id, number, target, headers = users[index % len(users)]
+        body = {
+            "from_account_number": number,
+            "to_account_number": target,
+            "amount": "0.01",
+            "description": "bench",
+        }
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await client.post("/accounts/transfer", json=body, headers=headers)
+            transfer_samples.append((time.perf_counter() - start) * 1000)
+            response.raise_for_status()
+
+    async def login_worker(index: int):
+        form = {"username": f"bench{index % len(users)}@example.com", "password": PASSWORD}
+        while time.perf_counter() < deadline:
+            response = await client.post("/auth/login", data=form)
+            logins["ok" if response.status_code == 200 else "rejected"] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(transfer_worker(i) for i in range(args.transfer_workers)),
+        *(login_worker(i) for i in range(login_workers)),
+    )
+    elapsed = time.perf_counter() - started
+    return {
+        "transfer": summarize(transfer_samples, elapsed),
+        "logins_per_sec": round(logins["ok"] / elapsed, 1),
+        "logins_rejected": logins["rejected"],
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--transfer-workers", type=int, default=4)
+    parser.add_argument("--login-workers", type=int, default=16)
+    parser.add_argument("--json", help="Also write the report to this path")
+    args = parser.parse_args()
+
+    app_engine.sync_engine.echo = False
+    engine = make_engine()
+    await reset_schema(engine)
+    layout = await seed(
+        engine,
+        users=max(args.transfer_workers, 2),
+        accounts_per_user=1,
+        ledger_rows_per_account=1,
+        hashed_password=get_password_hash(PASSWORD),
+    )
+    await engine.dispose()
+
+    numbers = [accounts[0][1] for accounts in layout.values()]
+    users = []
+    for i, (user_id, accounts) in enumerate(layout.items()):
+        token = create_access_token({"sub": str(user_id)})
+        users.append(
+            (
+                user_id,
+                accounts[0][1],
+                numbers[(i + 1) % len(numbers)],
+                {"Authorization": f"Bearer {token}"},
+            )
+        )
+
+    pooled = auth_utils.password_hasher
+    report = {"benchmark": "login_load", "params": vars(args), "phases": {}}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        report["phases"]["transfers_only"] = await phase(client, users, args, 0)
+        report["phases"]["with_logins_thread_pool"] = await phase(
+            client, users, args, args.login_workers
+        )
+        auth_utils.password_hasher = InlineHasher(1, 0)
+        import banking_app.routers.auth as auth_router
+
+        auth_router.password_hasher = auth_utils.password_hasher
+        report["phases"]["with_logins_on_event_loop"] = await phase(
+            client, users, args, args.login_workers
+        )
+        auth_utils.password_hasher = auth_router.password_hasher = pooled
+    report["hasher"] = pooled.stats()
+    emit(report, args.json)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
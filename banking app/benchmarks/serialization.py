@@ -0,0 +1,112 @@
+"""Micro-benchmark serializing 100-row transaction pages to JSON bytes.
+
+Compares the ways a ``GET /accounts/transactions`` page can be encoded:
+
+* ``validate_and_dump``: FastAPI's ``response_model`` path, validating the
+  rows as ``List[TransactionEntry]`` and dumping the models
+* ``jsonable_encoder_json``: ``jsonable_encoder`` + stdlib ``json.dumps``
+  (FastAPI without a response model, Starlette's ``JSONResponse``); note
+  that ``jsonable_encoder`` turns Decimals into floats
+* ``type_adapter``: a ``TypeAdapter`` over a TypedDict of the same
+  fields, compiled once, dumping the dicts without validating them
+* ``orjson``: ``responses.dumps``, what the endpoint now uses
+
+Each result records whether it reproduced the exact document.
+
+    python benchmarks/serialization.py [--rows 100] [--iterations 2000] [--json out.json]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import List
+
+from _common import emit, summarize
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from typing_extensions import TypedDict
+
+from banking_app.responses import dumps
+from banking_app.schemas.account import TransactionEntry
+
+
+class TransactionRow(TypedDict):
+    transfer_id: int
+    direction: str
+    counterparty_account_number: str
+    amount: Decimal
+    description: str
+    status: str
+    occurred_at: str
+
+
+def make_rows(count: int) -> list[dict]:
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "transfer_id": 10_000 + i,
+            "direction": "outgoing" if i % 2 else "incoming",
+            "counterparty_account_number": f"{400000000000 + i * 7919}",
+            "amount": Decimal(f"{i * 13 % 5000}.{i % 100:02d}"),
+            "description": f"Invoice {i}",
+            "status": "completed",
+            "occurred_at": (start + timedelta(minutes=i)).isoformat(),
+        }
+        for i in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--json", help="Also write the report to this path")
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    validating = TypeAdapter(List[TransactionEntry])
+    prepared = TypeAdapter(List[TransactionRow])
+    encoders = {
+        "validate_and_dump": lambda: validating.dump_json(validating.validate_python(rows)),
+        "jsonable_encoder_json": lambda: json.dumps(
+            jsonable_encoder(rows), separators=(",", ":")
+        ).encode(),
+        "type_adapter": lambda: prepared.dump_json(rows),
+        "orjson": lambda: dumps(rows),
+    }
+
+    expected = validating.dump_json(validating.validate_python(rows))
+    results = {}
+    for name, encode in encoders.items():
+        for _ in range(min(100, args.iterations)):
+            encode()  # warm up
+        samples = []
+        for _ in range(args.iterations):
+            started = time.perf_counter()
+            encode()
+            samples.append((time.perf_counter() - started) * 1000)
+        output = encode()
+        results[name] = {
+            **summarize(samples),
+            "bytes": len(output),
+            "exact": json.loads(output) == json.loads(expected),
+        }
+    baseline = results["validate_and_dump"]["mean_ms"]
+    for result in results.values():
+        result["speedup"] = round(baseline / result["mean_ms"], 2) if result["mean_ms"] else None
+
+    emit(
+        {
+            "benchmark": "serialization",
+            "params": vars(args),
+            "results": results,
+        },
+        args.json,
+    )
+
+
+if __name__ == "__main__":
+    main()
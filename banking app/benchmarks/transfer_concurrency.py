@@ -0,0 +1,149 @@
+"""Concurrent transfer benchmark: throughput and overdraft safety.
+
+Seeds a few funded source accounts and many destinations, then has
+``--workers`` tasks race to move more money than the sources hold. Runs the
+current transfer engine (``crud.transfer.create_transfer``) and an
+emulation of the previous flow (lookups, ledger SUM check, idempotency
+SELECT, ORM flush, commit, refresh) and reports transfers/sec, statements
+per transfer and whether any account ended below zero.
+
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/transfer_concurrency.py
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from decimal import Decimal
+
+from _common import count_queries, emit, make_engine, make_sessionmaker, reset_schema, seed, summarize
+from sqlalchemy import func, select
+
+from banking_app.crud import transfer as transfer_crud
+from banking_app.models import Account, Ledger, Transfer
+
+AMOUNT = Decimal("1.00")
+
+
+async def legacy_transfer(db, user_id, from_number, to_number, amount, description):
+    source = (await db.execute(select(Account).where(Account.account_number == from_number))).scalars().first()
+    destination = (await db.execute(select(Account).where(Account.account_number == to_number))).scalars().first()
+    if source is None or source.user_id != user_id or destination is None:
+        raise transfer_crud.AccountNotFoundError("not found")
+    balance = (await db.execute(select(func.sum(Ledger.amount)).where(Ledger.account_id == source.id))).scalar()
+    if (balance or 0) < amount:
+        raise transfer_crud.InsufficientFundsError("Insufficient funds")
+    key = str(uuid.uuid4())
+    (await db.execute(select(Transfer).where(Transfer.idempotency_key == key))).scalars().first()
+    transfer = Transfer(
+        idempotency_key=key,
+        from_account_id=source.id,
+        to_account_id=destination.id,
+        amount=amount,
+        description=description,
+        status="pending",
+    )
+    db.add(transfer)
+    await db.flush()
+    db.add(Ledger(account_id=source.id, amount=-amount, description=description, transfer_id=transfer.id))
+    db.add(Ledger(account_id=destination.id, amount=amount, description=description, transfer_id=transfer.id))
+    transfer.status = "completed"
+    await db.commit()
+    await db.refresh(transfer)
+
+
+async def engine_transfer(db, user_id, from_number, to_number, amount, description):
+    await transfer_crud.create_transfer(
+        db,
+        user_id=user_id,
+        from_account_number=from_number,
+        to_account_number=to_number,
+        amount=amount,
+        description=description,
+    )
+
+
+async def run(name, transfer, args) -> dict:
+    engine = make_engine(pool_size=args.workers, max_overflow=0)
+    Session = make_sessionmaker(engine)
+    await reset_schema(engine)
+    layout = await seed(
+        engine,
+        users=args.sources + args.destinations,
+        accounts_per_user=1,
+        ledger_rows_per_account=1,
+        opening_balance=Decimal(args.opening_balance),
+    )
+    owners = [(user_id, accounts[0][1]) for user_id, accounts in layout.items()]
+    sources, destinations = owners[: args.sources], owners[args.sources :]
+
+    rng = random.Random(7)
+    work = [
+        (*rng.choice(sources), rng.choice(destinations)[1])
+        for _ in range(args.transfers)
+    ]
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in work:
+        queue.put_nowait(item)
+
+    outcome = {"completed": 0, "rejected": 0, "errors": 0}
+    samples: list[float] = []
+
+    async def worker():
+        while not queue.empty():
+            user_id, from_number, to_number = queue.get_nowait()
+            start = time.perf_counter()
+            async with Session() as db:
+                try:
+                    await transfer(db, user_id, from_number, to_number, AMOUNT, "bench")
+                    outcome["completed"] += 1
+                except transfer_crud.InsufficientFundsError:
+                    outcome["rejected"] += 1
+                except Exception:
+                    outcome["errors"] += 1
+            samples.append((time.perf_counter() - start) * 1000)
+
+    with count_queries(engine) as counter:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.workers)))
+        elapsed = time.perf_counter() - started
+
+    async with Session() as db:
+        ledger_balances = (
+            await db.execute(
+                select(func.sum(Ledger.amount)).group_by(Ledger.account_id)
+            )
+        ).scalars().all()
+    await engine.dispose()
+
+    return {
+        "engine": name,
+        **outcome,
+        "transfers_per_sec": round(outcome["completed"] / elapsed, 1),
+        "statements_per_attempt": round(counter["queries"] / args.transfers, 2),
+        "latency": summarize(samples),
+        "min_ledger_balance": str(min(ledger_balances)),
+        "overdrawn_accounts": sum(1 for b in ledger_balances if b < 0),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--transfers", type=int, default=3000)
+    parser.add_argument("--sources", type=int, default=4)
+    parser.add_argument("--destinations", type=int, default=16)
+    parser.add_argument("--opening-balance", default="500.00")
+    parser.add_argument("--json", help="Also write the report to this path")
+    args = parser.parse_args()
+
+    report = {"benchmark": "transfer_concurrency", "params": vars(args), "runs": []}
+    for name, transfer in (("engine", engine_transfer), ("legacy", legacy_transfer)):
+        report["runs"].append(await run(name, transfer, args))
+    emit(report, args.json)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,18 +1,45 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
+from ..cache import TTLCache
+from ..config import settings
 from ..database import get_db
+from ..metrics import register_cache_metrics
 from ..crud import user as user_crud
-from .utils import decode_access_token
+from ..models import User as UserModel
+from ..schemas.auth import User
+from .utils import request_token_payload
 
 security = HTTPBearer()
 
+# user id -> User schema snapshot, so authenticated requests skip the users
+# lookup. Its size and hit/miss counts are on /metrics as user_cache_*.
+user_cache = TTLCache(settings.user_cache_size, settings.user_cache_ttl_seconds)
+register_cache_metrics("user", user_cache)
+
+
+def invalidate_cached_user(user_id: int) -> None:
+    user_cache.pop(user_id)
+
+
+# ORM updates and deletes of a user drop its cached principal. Bulk
+# update()/delete() statements bypass these events and should call
+# invalidate_cached_user themselves.
+@event.listens_for(UserModel, "after_update")
+@event.listens_for(UserModel, "after_delete")
+def _invalidate_user_on_change(mapper, connection, target):
+    invalidate_cached_user(target.id)
+
+
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
-):
-    token = credentials.credentials
-    payload = decode_access_token(token)
+) -> User:
+    # The rate limiter has usually decoded the token already; ``credentials``
+    # still makes a missing header a 403 and documents the scheme.
+    payload = request_token_payload(request.scope)
     if payload is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -34,11 +61,16 @@ async def get_current_user(
             detail="Invalid authentication credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    user = await user_crud.get_user_by_id(db, user_id)
-    if user is None:
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
+    db_user = await user_crud.get_user_by_id(db, user_id)
+    if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return user
\ No newline at end of file
+    user = User.model_validate(db_user)
+    user_cache.set(user_id, user)
+    return user
@@ -1,8 +1,12 @@
-from datetime import datetime, timedelta
+import asyncio
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from ..config import settings
+from ..metrics import register_password_hasher_metrics
 
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 
@@ -12,6 +16,71 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+
+class PasswordHasherBusy(RuntimeError):
+    pass
+
+
+class PasswordHasher:
+    """Runs password hashing on a dedicated thread pool.
+
+    PBKDF2 spends its time in hashlib, which releases the GIL, so worker
+    threads hash in parallel while the event loop keeps serving other
+    requests. At most ``workers + max_queue`` operations may be in flight;
+    beyond that callers get ``PasswordHasherBusy`` instead of queueing
+    without bound.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hash"
+        )
+
+    async def _run(self, fn, *args):
+        if self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise PasswordHasherBusy("Too many password operations in progress")
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                self._executor, fn, *args
+            )
+        finally:
+            self.in_flight -= 1
+        self.completed += 1
+        return result
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": max(0, self.in_flight - self.workers),
+            "saturation": round(self.in_flight / self.workers, 3) if self.workers else 0.0,
+            "peak_in_flight": self.peak_in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+password_hasher = PasswordHasher(
+    settings.password_hash_workers, settings.password_hash_max_queue
+)
+register_password_hasher_metrics(password_hasher)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -25,6 +94,55 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 def decode_access_token(token: str):
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        return payload
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+    if payload.get("type") == "refresh":
+        return None
+    return payload
+
+
+def request_token_payload(scope) -> Optional[dict]:
+    """The request's bearer access token decoded, or ``None``.
+
+    The rate limiter, ``get_current_user`` and the read router all need it,
+    so it is decoded once and kept in the request state (``scope["state"]``,
+    which is ``request.state``).
+    """
+    state = scope.setdefault("state", {})
+    if "token_payload" not in state:
+        payload = None
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() == "bearer" and token:
+                    payload = decode_access_token(token)
+                break
+        state["token_payload"] = payload
+    return state["token_payload"]
+
+
+def create_refresh_token(user_id: int, family_id: Optional[str] = None):
+    """Return ``(token, jti, family_id, expires_at)`` for a new refresh token.
+
+    Tokens issued by rotating an earlier one share its ``family_id``, so a
+    replayed token can revoke the whole chain.
+    """
+    jti = secrets.token_hex(16)
+    family_id = family_id or secrets.token_hex(16)
+    expires_at = datetime.now(timezone.utc) + timedelta(days=settings.refresh_token_expire_days)
+    token = jwt.encode(
+        {"sub": str(user_id), "jti": jti, "fam": family_id, "type": "refresh", "exp": expires_at},
+        settings.secret_key,
+        algorithm=settings.algorithm,
+    )
+    return token, jti, family_id, expires_at
+
+
+def decode_refresh_token(token: str):
+    try:
+        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    except JWTError:
+        return None
+    if payload.get("type") != "refresh" or not payload.get("jti") or not payload.get("fam"):
+        return None
+    return payload
@@ -0,0 +1,106 @@
+"""Populate account_activity from existing transfer ledger rows.
+
+Safe to re-run: ledger rows that already have an activity row are skipped.
+Works through the ledger in id ranges of ``--batch-size`` rows, committing
+after each, so it can run against a live database.
+
+Usage::
+
+    python -m banking_app.commands.backfill_account_activity [--batch-size N]
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import case, func, insert, select
+from sqlalchemy.orm import aliased
+
+from ..database import async_session, engine
+from ..models import Account, AccountActivity, Ledger, Transfer
+
+
+def _backfill_statement(first_id: int, last_id: int):
+    from_account = aliased(Account)
+    to_account = aliased(Account)
+    outgoing = Ledger.amount < 0
+    missing = (
+        select(
+            Ledger.id,
+            Ledger.account_id,
+            Ledger.transfer_id,
+            case((outgoing, "outgoing"), else_="incoming"),
+            case(
+                (outgoing, to_account.account_number),
+                else_=from_account.account_number,
+            ),
+            func.abs(Ledger.amount),
+            Ledger.description,
+            Transfer.status,
+            Ledger.created_at,
+        )
+        .join(Transfer, Ledger.transfer_id == Transfer.id)
+        .join(from_account, Transfer.from_account_id == from_account.id)
+        .join(to_account, Transfer.to_account_id == to_account.id)
+        .outerjoin(AccountActivity, AccountActivity.ledger_id == Ledger.id)
+        .where(
+            Ledger.id.between(first_id, last_id),
+            AccountActivity.ledger_id.is_(None),
+        )
+    )
+    return insert(AccountActivity).from_select(
+        [
+            "ledger_id",
+            "account_id",
+            "transfer_id",
+            "direction",
+            "counterparty_account_number",
+            "amount",
+            "description",
+            "status",
+            "occurred_at",
+        ],
+        missing,
+    )
+
+
+async def backfill_account_activity(batch_size: int = 10000) -> int:
+    inserted = 0
+    async with async_session() as db:
+        bounds = (
+            await db.execute(select(func.min(Ledger.id), func.max(Ledger.id)))
+        ).one()
+        if bounds[0] is None:
+            print("ledger is empty")
+            return 0
+        first_id, max_id = bounds
+        while first_id <= max_id:
+            last_id = first_id + batch_size - 1
+            result = await db.execute(_backfill_statement(first_id, last_id))
+            await db.commit()
+            inserted += max(result.rowcount, 0)
+            first_id = last_id + 1
+
+    print(f"inserted {inserted} activity row(s)")
+    return inserted
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=10000,
+        help="Ledger ids per transaction (default: 10000)",
+    )
+    args = parser.parse_args()
+
+    async def run() -> int:
+        try:
+            return await backfill_account_activity(args.batch_size)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
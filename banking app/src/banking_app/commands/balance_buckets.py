@@ -0,0 +1,75 @@
+"""Turn balance sharding on or off for hot accounts.
+
+``set`` spreads an account's credits over N balance buckets, so a merchant
+or payroll account receiving many concurrent credits stops serializing them
+on its row; ``--buckets 0`` folds the buckets back into the account row.
+``list`` shows the sharded accounts. Balances are unchanged either way.
+
+Usage::
+
+    python -m banking_app.commands.balance_buckets set ACCOUNT_NUMBER --buckets N
+    python -m banking_app.commands.balance_buckets list
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import select
+
+from ..crud import account as account_crud
+from ..database import async_session, engine
+from ..models import Account
+
+
+async def set_buckets(account_number: str, buckets: int) -> None:
+    async with async_session() as db:
+        account = await account_crud.get_account_by_number(db, account_number)
+        if account is None:
+            raise SystemExit(f"{account_number}: no such account")
+        folded = await account_crud.set_balance_buckets(db, account.id, buckets)
+        await db.commit()
+        balance = await account_crud.get_account_balance(db, account.id)
+    print(f"{account_number}: {buckets} bucket(s), folded {folded}, balance {balance}")
+
+
+async def list_sharded() -> None:
+    async with async_session() as db:
+        rows = (
+            await db.execute(
+                select(Account.account_number, Account.balance_buckets, account_crud.total_balance())
+                .where(Account.balance_buckets > 0)
+                .order_by(Account.id)
+            )
+        ).all()
+    for number, buckets, balance in rows:
+        print(f"{number}: {buckets} bucket(s), balance {account_crud._normalize_amount(balance)}")
+    print(f"{len(rows)} sharded account(s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    set_parser = commands.add_parser("set", help="Set an account's bucket count")
+    set_parser.add_argument("account_number")
+    set_parser.add_argument(
+        "--buckets",
+        type=int,
+        required=True,
+        help="Number of balance buckets; 0 turns sharding off",
+    )
+    commands.add_parser("list", help="List sharded accounts")
+    args = parser.parse_args()
+
+    async def run() -> None:
+        try:
+            if args.command == "set":
+                await set_buckets(args.account_number, args.buckets)
+            else:
+                await list_sharded()
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Write ledger balance checkpoints for accounts with enough new entries.
+
+The API runs the same compaction in the background every
+``LEDGER_CHECKPOINT_INTERVAL_SECONDS``; this command runs one pass now.
+
+Usage::
+
+    python -m banking_app.commands.compact_ledger [--min-entries N] [--settle-seconds S]
+"""
+import argparse
+import asyncio
+
+from ..crud.checkpoint import compact_ledger
+from ..database import async_session, engine
+
+
+async def run_once(min_entries: int | None, settle_seconds: int | None) -> int:
+    async with async_session() as db:
+        written = await compact_ledger(db, min_entries, settle_seconds)
+    print(f"wrote {written} checkpoint(s)")
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--min-entries",
+        type=int,
+        help="New ledger rows needed before an account is checkpointed",
+    )
+    parser.add_argument(
+        "--settle-seconds",
+        type=int,
+        help="Leave ledger rows younger than this out of checkpoints",
+    )
+    args = parser.parse_args()
+
+    async def run() -> int:
+        try:
+            return await run_once(args.min_entries, args.settle_seconds)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
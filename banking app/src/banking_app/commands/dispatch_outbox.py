@@ -0,0 +1,61 @@
+"""Deliver pending outbox events to a sink.
+
+The API does this in the background when ``OUTBOX_SINK`` is set; this
+command runs the same dispatcher standalone, e.g. as its own service, or
+with ``--once`` drains what is pending now and exits. An API without
+``OUTBOX_SINK`` only writes events for it with ``OUTBOX_ENABLED=true``.
+
+Usage::
+
+    python -m banking_app.commands.dispatch_outbox [--sink URL] [--once]
+"""
+import argparse
+import asyncio
+
+from ..config import settings
+from ..database import async_session, engine
+from ..outbox import dispatch_batch, run_dispatcher, sink_from_url
+
+
+async def drain(sink) -> int:
+    """Deliver batches until none are pending or the sink fails."""
+    total = 0
+    while True:
+        async with async_session() as db:
+            delivered = await dispatch_batch(db, sink)
+        total += delivered
+        if delivered < settings.outbox_batch_size:
+            break
+    print(f"delivered {total} event(s)")
+    return total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sink",
+        default=settings.outbox_sink,
+        help="file:///path, http(s)://url or queue: (defaults to OUTBOX_SINK)",
+    )
+    parser.add_argument(
+        "--once", action="store_true", help="Drain pending events and exit"
+    )
+    args = parser.parse_args()
+    if not args.sink:
+        parser.error("no sink: pass --sink or set OUTBOX_SINK")
+    sink = sink_from_url(args.sink)
+
+    async def run() -> None:
+        try:
+            if args.once:
+                await drain(sink)
+            else:
+                await run_dispatcher(async_session, sink)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Maintain and archive the monthly ledger and transfers partitions (PostgreSQL).
+
+``ensure`` creates missing partitions up to ``PARTITION_MONTHS_AHEAD`` months
+ahead (the API also does this daily). ``archive`` moves every month before
+``--before`` out of the database: it checkpoints the affected accounts at the
+month's end, checks that every archived ledger row is covered by a
+checkpoint, writes both partitions to ``<dir>/<partition>.csv.gz``, then
+detaches and drops them.
+
+Balances, and point-in-time balances from the end of an archived month on,
+stay exact because they start from those checkpoints. Transaction history
+keeps working too, since ``account_activity`` is not partitioned. Statements
+for archived months only show their opening and closing balances, and
+``verify_balances --full`` no longer applies.
+
+Usage::
+
+    python -m banking_app.commands.partitions ensure [--months-ahead N]
+    python -m banking_app.commands.partitions archive --before YYYY-MM --dir PATH
+"""
+import argparse
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+
+from ..config import settings
+from ..crud.checkpoint import checkpoint_before
+from ..database import async_session, engine
+from ..partitions import (
+    PARTITIONED_TABLES,
+    add_months,
+    drop_partitions,
+    ensure_partitions,
+    export_partition,
+    list_partitions,
+    month_start,
+    partition_name,
+    uncheckpointed_entries,
+)
+
+
+async def ensure(months_ahead: int | None) -> None:
+    async with async_session() as db:
+        created = await ensure_partitions(db, months_ahead)
+    print(f"created {len(created)} partition(s)" + "".join(f"\n  {n}" for n in created))
+
+
+async def archive(before: datetime, directory: str) -> int:
+    """Archive and drop every monthly partition ending on or before ``before``."""
+    settled = datetime.now(timezone.utc) - timedelta(
+        seconds=settings.ledger_checkpoint_settle_seconds
+    )
+    if before > month_start(settled):
+        raise SystemExit("Only months that ended before the settle window can be archived")
+    os.makedirs(directory, exist_ok=True)
+
+    async with async_session() as db:
+        ledger_months = await list_partitions(db, "ledger")
+        transfer_months = await list_partitions(db, "transfers")
+    months = sorted(
+        month
+        for month in set(ledger_months) | set(transfer_months)
+        if add_months(month, 1) <= before
+    )
+    for month in months:
+        if month not in ledger_months or month not in transfer_months:
+            raise SystemExit(f"{month:%Y-%m}: ledger and transfers partitions are out of step")
+
+    for month in months:
+        async with async_session() as db:
+            written = await checkpoint_before(db, month, add_months(month, 1))
+            missing = await uncheckpointed_entries(db, partition_name("ledger", month))
+            if missing:
+                raise SystemExit(
+                    f"{month:%Y-%m}: {missing} ledger row(s) not covered by a checkpoint"
+                )
+            counts = []
+            for table in PARTITIONED_TABLES:
+                name = partition_name(table, month)
+                path = os.path.join(directory, f"{name}.csv.gz")
+                if os.path.exists(path):
+                    raise SystemExit(f"{path} already exists")
+                counts.append(f"{await export_partition(db, name, path)} {table}")
+            await db.commit()
+            await drop_partitions(db, month)
+        print(f"{month:%Y-%m}: archived {', '.join(counts)} row(s), wrote {written} checkpoint(s)")
+    return len(months)
+
+
+def _month(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m").replace(tzinfo=timezone.utc)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    ensure_parser = commands.add_parser("ensure", help="Create upcoming partitions")
+    ensure_parser.add_argument(
+        "--months-ahead",
+        type=int,
+        help="Months past the current one to create partitions for",
+    )
+    archive_parser = commands.add_parser("archive", help="Archive and drop old months")
+    archive_parser.add_argument(
+        "--before",
+        type=_month,
+        required=True,
+        help="Archive months before this one (YYYY-MM)",
+    )
+    archive_parser.add_argument(
+        "--dir", required=True, help="Directory for the compressed CSV files"
+    )
+    args = parser.parse_args()
+
+    async def run() -> None:
+        try:
+            if args.command == "ensure":
+                await ensure(args.months_ahead)
+            else:
+                await archive(args.before, args.dir)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Recompute account balances from the ledger and report any drift.
+
+Ledger totals start from each account's latest checkpoint; ``--full`` sums
+every account's whole history instead (e.g. to audit the checkpoints). Once
+ledger partitions have been archived (``commands.partitions archive``) the
+whole history is no longer in the database and ``--full`` reports drift.
+
+Usage::
+
+    python -m banking_app.commands.verify_balances [--account NUMBER] [--repair] [--full]
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import func, select
+
+from ..crud import account as account_crud
+from ..crud.checkpoint import ledger_totals as checkpointed_ledger_totals
+from ..database import async_session, engine
+from ..models import Account, Ledger
+
+
+async def verify_balances(
+    account_number: str | None = None, repair: bool = False, full: bool = False
+) -> int:
+    if full:
+        ledger_totals = (
+            select(Ledger.account_id, func.sum(Ledger.amount).label("total"))
+            .group_by(Ledger.account_id)
+            .subquery()
+        )
+    else:
+        ledger_totals = checkpointed_ledger_totals()
+    query = (
+        select(
+            Account.id,
+            Account.account_number,
+            account_crud.total_balance(),
+            func.coalesce(ledger_totals.c.total, 0),
+        )
+        .outerjoin(ledger_totals, ledger_totals.c.account_id == Account.id)
+        .order_by(Account.id)
+    )
+    if account_number is not None:
+        query = query.where(Account.account_number == account_number)
+
+    drifted = 0
+    async with async_session() as db:
+        rows = (await db.execute(query)).all()
+        for account_id, number, maintained, ledger_total in rows:
+            maintained = account_crud._normalize_amount(maintained)
+            ledger_total = account_crud._normalize_amount(ledger_total)
+            if maintained == ledger_total:
+                continue
+            drifted += 1
+            print(f"{number}: maintained={maintained} ledger={ledger_total}")
+            if repair:
+                await account_crud.reconcile_account_balance(
+                    db, account_id, use_checkpoints=not full
+                )
+        if repair:
+            await db.commit()
+
+    print(f"checked {len(rows)} account(s), {drifted} drifted")
+    return drifted
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--account", help="Only check this account number")
+    parser.add_argument(
+        "--repair",
+        action="store_true",
+        help="Reset drifted balances from the ledger under a row lock",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Sum whole ledger histories instead of starting from checkpoints",
+    )
+    args = parser.parse_args()
+
+    async def run() -> int:
+        try:
+            return await verify_balances(args.account, args.repair, args.full)
+        finally:
+            await engine.dispose()
+
+    raise SystemExit(1 if asyncio.run(run()) and not args.repair else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import os
+from pydantic import Field
 from pydantic_settings import BaseSettings
 from typing import Optional
 
@@ -10,6 +12,94 @@ class Settings(BaseSettings):
     refresh_token_expire_days: int = 7
     db_pool_size: int = 10
     db_max_overflow: int = 20
+    # Read-only endpoints use these round-robin (JSON list in the env var).
+    database_replica_urls: list[str] = Field(default_factory=list)
+    # After a write, the users on both sides read from the primary until a
+    # replica has replayed it, for at most this long; set it above the
+    # replica lag you expect.
+    replica_read_your_writes_seconds: float = 5.0
+    # Last write time per user, shared by the workers on a host (see
+    # write_times.py); defaults to /dev/shm/banking_app_write_times.
+    write_times_file: Optional[str] = None
+    write_times_slots: int = 65536
+    # How long a replica that refused or dropped a connection sits out.
+    replica_retry_seconds: float = 30.0
+    # Log every SQL statement (slow; for local debugging only).
+    db_echo: bool = False
+    # Requests issuing more statements than this are logged as warnings,
+    # listing statements repeated n_plus_one_threshold times or more.
+    query_budget: int = 20
+    n_plus_one_threshold: int = 5
+    idempotency_cache_size: int = 10000
+    idempotency_cache_ttl_seconds: int = 24 * 60 * 60
+    user_cache_size: int = 10000
+    user_cache_ttl_seconds: int = 60
+    # Hashing threads compete with the event loop for CPU, so leave it room.
+    password_hash_workers: int = Field(
+        default_factory=lambda: max(1, (os.cpu_count() or 2) // 2)
+    )
+    password_hash_max_queue: int = 64
+    revoked_token_cache_size: int = 100000
+    # Key for the account number permutation; defaults to secret_key. Changing
+    # it changes which numbers new accounts get, never existing ones.
+    account_number_key: Optional[str] = None
+    # Background ledger compaction: every interval (0 disables it), accounts
+    # with at least min_entries ledger rows past their last checkpoint get a
+    # new one. Rows younger than settle_seconds are left alone so that
+    # transactions still in flight cannot commit below a checkpoint.
+    ledger_checkpoint_interval_seconds: int = 10 * 60
+    ledger_checkpoint_min_entries: int = 1000
+    ledger_checkpoint_settle_seconds: int = 5 * 60
+    account_directory_size: int = 100000
+    account_directory_ttl_seconds: int = 60 * 60
+    account_directory_negative_ttl_seconds: int = 5
+    account_directory_warm_limit: int = 10000
+    account_summary_cache_size: int = 10000
+    account_summary_cache_ttl_seconds: int = 30
+    partition_months_ahead: int = 3
+    partition_maintenance_interval_seconds: int = 24 * 60 * 60
+    # Token buckets shared by every worker on the host (see ratelimit.py),
+    # per user (JWT sub) or client IP. Keys are route templates, optionally
+    # prefixed with the method; values like "10/minute". Routes not listed
+    # use rate_limit_default, or are not limited if it is unset.
+    rate_limit_enabled: bool = True
+    rate_limits: dict[str, str] = Field(
+        default_factory=lambda: {
+            "POST /auth/signup": "5/minute",
+            "POST /auth/login": "10/minute",
+            "POST /auth/refresh": "30/minute",
+            "POST /accounts/transfer": "60/minute",
+            "POST /accounts/transfers/batch": "10/minute",
+        }
+    )
+    rate_limit_default: Optional[str] = None
+    # Memory-mapped bucket file; defaults to /dev/shm/banking_app_ratelimit.
+    rate_limit_file: Optional[str] = None
+    rate_limit_slots: int = 65536
+    # Transfer events are written to the outbox table with the transfer and
+    # delivered by a background dispatcher (see outbox.py) to outbox_sink:
+    # "file:///path/events.jsonl" or an http(s) URL ("queue:" is for tests).
+    outbox_sink: Optional[str] = None
+    # Whether transfers write outbox events at all. Unset, only when
+    # outbox_sink is, so events nothing delivers or purges never pile up;
+    # set it to true when the dispatcher runs as its own service
+    # (commands.dispatch_outbox) instead of in the API.
+    outbox_enabled: Optional[bool] = None
+    outbox_batch_size: int = 100
+    outbox_poll_interval_seconds: float = 1.0
+    outbox_max_backoff_seconds: int = 5 * 60
+    # How long a claimed batch is hidden from other dispatchers while it is
+    # sent; keep it above the sink's timeout or slow batches go out twice.
+    outbox_claim_seconds: int = 60
+    # Delivered events are deleted after this long (0 keeps them).
+    outbox_retention_seconds: int = 24 * 60 * 60
+    # Queue single transfers and apply up to max_batch of them per
+    # transaction, waiting at most max_wait_ms for a group to fill (see
+    # group_commit.py). Off by default: it trades a little latency at low
+    # load for fewer commits at high load.
+    transfer_group_commit: bool = False
+    transfer_group_commit_max_batch: int = 64
+    transfer_group_commit_max_wait_ms: float = 2.0
 
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8"}
 
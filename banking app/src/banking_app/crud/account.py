@@ -1,18 +1,52 @@
 from __future__ import annotations
 
 import secrets
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Optional
+from typing import NamedTuple, Optional
 
-from sqlalchemy import func, select
+from sqlalchemy import case, delete, func, insert, literal_column, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 
-from ..models import Account, Ledger
+from ..account_numbers import AccountNumberAllocator, format_account_number
+from ..cache import TTLCache
+from ..config import settings
+from ..models import Account, AccountActivity, AccountBalanceBucket, Ledger, LedgerCheckpoint
+from ..models.account import ACCOUNT_NUMBER_BLOCK_SIZE, account_number_seq
+from ..write_times import user_write_times
 
 ACCOUNT_NUMBER_LENGTH = 12
+ACCOUNT_NUMBER_ATTEMPTS = 5
 TWO_PLACES = Decimal("0.01")
 
 
+class AccountRef(NamedTuple):
+    id: int
+    user_id: int
+    account_number: str
+
+
+# account_number -> AccountRef. An account's id and owner never change, so
+# entries only expire to bound memory. Unknown numbers are remembered briefly
+# in missing_account_numbers so repeated bad lookups stay off the database.
+account_directory = TTLCache(
+    settings.account_directory_size, settings.account_directory_ttl_seconds
+)
+missing_account_numbers = TTLCache(
+    settings.account_directory_size, settings.account_directory_negative_ttl_seconds
+)
+# user_id -> (write time, {window days: summary payload}). The write time is
+# the user's entry in user_write_times when the summary was read, which every
+# worker bumps on a transfer or new account, so an entry from before a write
+# made anywhere on the host is never served. Reads go to a replica only once
+# it has replayed the user's recent writes (see database.ReadRouter).
+account_summaries = TTLCache(
+    settings.account_summary_cache_size, settings.account_summary_cache_ttl_seconds
+)
+
+
 def _normalize_amount(value: Optional[Decimal | float | int]) -> Decimal:
     if value is None:
         return Decimal("0.00")
@@ -21,7 +55,21 @@ def _normalize_amount(value: Optional[Decimal | float | int]) -> Decimal:
     return value.quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
 
 
+_account_number_key = (settings.account_number_key or settings.secret_key).encode()
+account_number_allocator = AccountNumberAllocator(ACCOUNT_NUMBER_BLOCK_SIZE)
+
+
 async def _generate_unique_account_number(db: AsyncSession) -> str:
+    if db.get_bind().dialect.supports_sequences:
+        # Sequence values are unique and the permutation is a bijection, so
+        # the number is unique without a lookup; a block is reserved with one
+        # nextval() per ACCOUNT_NUMBER_BLOCK_SIZE accounts.
+        value = await account_number_allocator.allocate(
+            lambda: db.scalar(account_number_seq.next_value())
+        )
+        return format_account_number(value, _account_number_key)
+
+    # No sequences (SQLite): draw random numbers and probe for collisions.
     while True:
         candidate = f"{secrets.randbelow(10**ACCOUNT_NUMBER_LENGTH):0{ACCOUNT_NUMBER_LENGTH}d}"
         if not await get_account_by_number(db, candidate):
@@ -35,16 +83,26 @@ async def create_account(
     initial_deposit: Optional[Decimal] = None,
 ) -> Account:
     starting_balance = _normalize_amount(initial_deposit)
-    account_number = await _generate_unique_account_number(db)
 
-    db_account = Account(
-        user_id=user_id,
-        account_name=account_name,
-        account_number=account_number,
-        balance=starting_balance,
-    )
-    db.add(db_account)
-    await db.flush()
+    for attempt in range(ACCOUNT_NUMBER_ATTEMPTS):
+        account_number = await _generate_unique_account_number(db)
+        db_account = Account(
+            user_id=user_id,
+            account_name=account_name,
+            account_number=account_number,
+            balance=starting_balance,
+        )
+        db.add(db_account)
+        try:
+            await db.flush()
+            break
+        except IntegrityError:
+            # A generated number can still meet one of the randomly drawn
+            # numbers issued before the allocator existed (or lose a race on
+            # the probe path). Nothing else is pending, so retry from scratch.
+            await db.rollback()
+            if attempt == ACCOUNT_NUMBER_ATTEMPTS - 1:
+                raise
 
     if starting_balance > Decimal("0.00"):
         db.add(
@@ -57,6 +115,9 @@ async def create_account(
 
     await db.commit()
     await db.refresh(db_account)
+    missing_account_numbers.pop(account_number)
+    account_summaries.pop(user_id)
+    user_write_times.mark(user_id)
     return db_account
 
 
@@ -74,26 +135,283 @@ async def get_account_by_number(
     return result.scalars().first()
 
 
+def cached_account(account_number: str) -> AccountRef | None:
+    """``account_directory``'s entry for ``account_number``, without a query.
+
+    ``None`` only means this worker has not seen the account; it may have
+    been created moments ago through another one.
+    """
+    return account_directory.get(account_number)
+
+
+async def lookup_account(db: AsyncSession, account_number: str) -> AccountRef | None:
+    """Resolve an account number through ``account_directory``."""
+    ref = account_directory.get(account_number)
+    if ref is not None:
+        return ref
+    if account_number in missing_account_numbers:
+        return None
+    result = await db.execute(
+        select(Account.id, Account.user_id, Account.account_number).where(
+            Account.account_number == account_number
+        )
+    )
+    row = result.first()
+    if row is None:
+        missing_account_numbers.set(account_number, True)
+        return None
+    ref = AccountRef(*row)
+    account_directory.set(account_number, ref)
+    return ref
+
+
+async def warm_account_directory(
+    db: AsyncSession, limit: int | None = None, days: int = 7
+) -> int:
+    """Preload the accounts with the most ledger activity in the last ``days``."""
+    limit = settings.account_directory_warm_limit if limit is None else limit
+    if limit <= 0:
+        return 0
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    activity = (
+        select(Ledger.account_id, func.count().label("entries"))
+        .where(Ledger.created_at >= since)
+        .group_by(Ledger.account_id)
+        .subquery()
+    )
+    result = await db.execute(
+        select(Account.id, Account.user_id, Account.account_number)
+        .join(activity, activity.c.account_id == Account.id)
+        .order_by(activity.c.entries.desc())
+        .limit(limit)
+    )
+    refs = [AccountRef(*row) for row in result.all()]
+    for ref in refs:
+        account_directory.set(ref.account_number, ref)
+    return len(refs)
+
+
+def total_balance():
+    """``accounts.balance``, plus its balance buckets for sharded accounts."""
+    buckets = (
+        select(func.coalesce(func.sum(AccountBalanceBucket.balance), 0))
+        .where(AccountBalanceBucket.account_id == Account.id)
+        .scalar_subquery()
+    )
+    return case((Account.balance_buckets > 0, Account.balance + buckets), else_=Account.balance)
+
+
 async def get_accounts_by_user(db: AsyncSession, user_id: int) -> list[Account]:
-    result = await db.execute(select(Account).where(Account.user_id == user_id))
-    accounts = result.scalars().all()
-    for account in accounts:
-        await refresh_account_balance_snapshot(db, account)
+    # One indexed read: balances are maintained on the row (and, for sharded
+    # accounts, its buckets), so listing never touches the ledger and never
+    # writes.
+    result = await db.execute(
+        select(Account, total_balance()).where(Account.user_id == user_id).order_by(Account.id)
+    )
+    accounts = []
+    for account, balance in result.all():
+        # Not a change to flush, just the balance callers should see.
+        set_committed_value(account, "balance", balance)
+        accounts.append(account)
     return accounts
 
 
+def _activity_day(db: AsyncSession):
+    """``account_activity.occurred_at`` truncated to its UTC day."""
+    if db.get_bind().dialect.name == "postgresql":
+        return func.date_trunc(
+            "day", func.timezone("UTC", AccountActivity.occurred_at)
+        )
+    return func.date(AccountActivity.occurred_at)
+
+
+async def get_account_summary(db: AsyncSession, user_id: int, days: int = 30) -> dict:
+    """Balances and daily inflow/outflow over the last ``days`` UTC days.
+
+    Two queries: the user's accounts, and the activity rows of the window
+    grouped by day in SQL. Transfers between the user's own accounts move
+    no money in or out, so they are left out of the daily flows. Results
+    are cached in ``account_summaries`` per user and window.
+    """
+    # Read before querying: a write landing meanwhile bumps the time, so what
+    # we cache below is never taken for a read from after it.
+    written_at = user_write_times.get(user_id)
+    cached = account_summaries.get(user_id)
+    if cached is not None and cached[0] != written_at:
+        cached = None
+    if cached is not None and days in cached[1]:
+        return cached[1][days]
+
+    accounts = await get_accounts_by_user(db, user_id)
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    since = today - timedelta(days=days - 1)
+    flows = []
+    if accounts:
+        day = _activity_day(db).label("day")
+        incoming = AccountActivity.direction == "incoming"
+        result = await db.execute(
+            select(
+                day,
+                func.sum(case((incoming, AccountActivity.amount), else_=0)),
+                func.sum(case((incoming, 0), else_=AccountActivity.amount)),
+            )
+            .where(
+                AccountActivity.account_id.in_([a.id for a in accounts]),
+                AccountActivity.occurred_at >= since,
+                AccountActivity.counterparty_account_number.not_in(
+                    [a.account_number for a in accounts]
+                ),
+            )
+            .group_by(literal_column("day"))
+            .order_by(literal_column("day"))
+        )
+        flows = [
+            {
+                "date": value if isinstance(value, str) else value.date().isoformat(),
+                "inflow": _normalize_amount(inflow),
+                "outflow": _normalize_amount(outflow),
+            }
+            for value, inflow, outflow in result.all()
+        ]
+
+    balances = [
+        {
+            "account_number": account.account_number,
+            "account_name": account.account_name,
+            "balance": _normalize_amount(account.balance),
+        }
+        for account in accounts
+    ]
+    summary = {
+        "since": since.date().isoformat(),
+        "total_balance": _normalize_amount(sum(b["balance"] for b in balances)),
+        "accounts": balances,
+        "days": flows,
+    }
+    account_summaries.set(user_id, (written_at, {**(cached[1] if cached else {}), days: summary}))
+    return summary
+
+
 async def get_account_balance(db: AsyncSession, account_id: int) -> Decimal:
+    # Balances are maintained on the account row by every ledger write, so a
+    # read is a primary-key lookup rather than a scan of the account history.
+    result = await db.execute(select(total_balance()).where(Account.id == account_id))
+    return _normalize_amount(result.scalar())
+
+
+async def get_ledger_balance(
+    db: AsyncSession,
+    account_id: int,
+    as_of: datetime | None = None,
+    use_checkpoints: bool = True,
+) -> Decimal:
+    """Sum of the account's ledger, optionally of entries before ``as_of``.
+
+    Starts from the newest checkpoint usable for ``as_of`` and only sums the
+    entries after it. ``use_checkpoints=False`` sums the whole history.
+    """
+    base, after_id = Decimal("0.00"), None
+    if use_checkpoints:
+        checkpoint = select(LedgerCheckpoint.balance, LedgerCheckpoint.ledger_id).where(
+            LedgerCheckpoint.account_id == account_id
+        )
+        if as_of is not None:
+            checkpoint = checkpoint.where(LedgerCheckpoint.as_of < as_of)
+        row = (
+            await db.execute(
+                checkpoint.order_by(LedgerCheckpoint.ledger_id.desc()).limit(1)
+            )
+        ).first()
+        if row is not None:
+            base, after_id = row
+
+    query = select(func.sum(Ledger.amount)).where(Ledger.account_id == account_id)
+    if after_id is not None:
+        query = query.where(Ledger.id > after_id)
+    if as_of is not None:
+        query = query.where(Ledger.created_at < as_of)
+    tail = (await db.execute(query)).scalar() or Decimal("0.00")
+    return _normalize_amount(base + tail)
+
+
+async def verify_account_balance(
+    db: AsyncSession, account_id: int
+) -> tuple[Decimal, Decimal]:
+    """Return ``(maintained, ledger)`` balances for an account."""
+    maintained = await get_account_balance(db, account_id)
+    ledger = await get_ledger_balance(db, account_id)
+    return maintained, ledger
+
+
+async def reconcile_account_balance(
+    db: AsyncSession, account_id: int, use_checkpoints: bool = True
+) -> tuple[Decimal, Decimal]:
+    """Lock the account row and reset its balance from the ledger.
+
+    A sharded account's buckets are locked too, and emptied into the row if
+    the balance needed correcting. Returns ``(previous, corrected)``. The
+    caller owns the commit.
+    """
     result = await db.execute(
-        select(func.sum(Ledger.amount)).where(Ledger.account_id == account_id)
+        select(Account.balance).where(Account.id == account_id).with_for_update()
+    )
+    previous = _normalize_amount(result.scalar())
+    previous += _normalize_amount(sum(await _lock_balance_buckets(db, account_id)))
+    corrected = await get_ledger_balance(
+        db, account_id, use_checkpoints=use_checkpoints
     )
-    balance = result.scalar() or Decimal("0.00")
-    return _normalize_amount(balance)
+    if corrected != previous:
+        await db.execute(
+            update(AccountBalanceBucket)
+            .where(AccountBalanceBucket.account_id == account_id)
+            .values(balance=0)
+            .execution_options(synchronize_session=False)
+        )
+        await db.execute(
+            update(Account)
+            .where(Account.id == account_id)
+            .values(balance=corrected)
+            .execution_options(synchronize_session=False)
+        )
+    return previous, corrected
 
 
-async def refresh_account_balance_snapshot(
-    db: AsyncSession, account: Account
-) -> Decimal:
-    balance = await get_account_balance(db, account.id)
-    account.balance = balance
-    await db.flush()
-    return balance
\ No newline at end of file
+async def _lock_balance_buckets(db: AsyncSession, account_id: int) -> list[Decimal]:
+    result = await db.execute(
+        select(AccountBalanceBucket.balance)
+        .where(AccountBalanceBucket.account_id == account_id)
+        .order_by(AccountBalanceBucket.bucket)
+        .with_for_update()
+    )
+    return list(result.scalars().all())
+
+
+async def set_balance_buckets(db: AsyncSession, account_id: int, buckets: int) -> Decimal:
+    """Spread the account's credits over ``buckets`` balance buckets (0: none).
+
+    Locks the account row ``FOR UPDATE``, which waits out transfers still
+    crediting the old buckets (they hold ``KEY SHARE`` on it), folds the
+    old buckets into the row and creates the new, empty ones. Returns the
+    amount folded back. The caller owns the commit.
+    """
+    if buckets < 0:
+        raise ValueError("buckets must be 0 or more")
+    await db.execute(
+        select(Account.id).where(Account.id == account_id).with_for_update()
+    )
+    folded = _normalize_amount(sum(await _lock_balance_buckets(db, account_id)))
+    await db.execute(
+        delete(AccountBalanceBucket).where(AccountBalanceBucket.account_id == account_id)
+    )
+    if buckets:
+        await db.execute(
+            insert(AccountBalanceBucket),
+            [{"account_id": account_id, "bucket": i, "balance": 0} for i in range(buckets)],
+        )
+    await db.execute(
+        update(Account)
+        .where(Account.id == account_id)
+        .values(balance=Account.balance + folded, balance_buckets=buckets)
+        .execution_options(synchronize_session=False)
+    )
+    return folded
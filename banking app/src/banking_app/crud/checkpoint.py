@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, case, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..models import Account, Ledger, LedgerCheckpoint
+
+logger = logging.getLogger(__name__)
+
+
+def latest_checkpoints():
+    """Subquery of each account's newest checkpoint (account_id, ledger_id, as_of, balance)."""
+    newest = (
+        select(
+            LedgerCheckpoint.account_id,
+            func.max(LedgerCheckpoint.ledger_id).label("ledger_id"),
+        )
+        .group_by(LedgerCheckpoint.account_id)
+        .subquery()
+    )
+    return (
+        select(
+            LedgerCheckpoint.account_id,
+            LedgerCheckpoint.ledger_id,
+            LedgerCheckpoint.as_of,
+            LedgerCheckpoint.balance,
+        )
+        .join(
+            newest,
+            and_(
+                LedgerCheckpoint.account_id == newest.c.account_id,
+                LedgerCheckpoint.ledger_id == newest.c.ledger_id,
+            ),
+        )
+        .subquery("latest_checkpoint")
+    )
+
+
+def ledger_totals():
+    """Subquery of (account_id, total) ledger sums, starting from checkpoints."""
+    checkpoint = latest_checkpoints()
+    tail = (
+        select(Ledger.account_id, func.sum(Ledger.amount).label("total"))
+        .outerjoin(checkpoint, checkpoint.c.account_id == Ledger.account_id)
+        .where(Ledger.id > func.coalesce(checkpoint.c.ledger_id, 0))
+        .group_by(Ledger.account_id)
+        .subquery()
+    )
+    return (
+        select(
+            Account.id.label("account_id"),
+            (
+                func.coalesce(checkpoint.c.balance, 0) + func.coalesce(tail.c.total, 0)
+            ).label("total"),
+        )
+        .outerjoin(checkpoint, checkpoint.c.account_id == Account.id)
+        .outerjoin(tail, tail.c.account_id == Account.id)
+        .subquery("ledger_totals")
+    )
+
+
+async def compact_ledger(
+    db: AsyncSession,
+    min_entries: int | None = None,
+    settle_seconds: int | None = None,
+    account_batch: int = 1000,
+) -> int:
+    """Write a checkpoint for every account with ``min_entries`` new rows.
+
+    A checkpoint only covers ledger rows up to the newest id older than
+    ``settle_seconds``. Ids are assigned when a row is inserted but become
+    visible at commit, so a younger cutoff could pass over a row whose
+    transaction has not committed yet and leave it out of every later sum.
+    Works through accounts ``account_batch`` at a time, committing after
+    each batch. Returns the number of checkpoints written.
+    """
+    min_entries = settings.ledger_checkpoint_min_entries if min_entries is None else min_entries
+    settle_seconds = (
+        settings.ledger_checkpoint_settle_seconds if settle_seconds is None else settle_seconds
+    )
+    settled = datetime.now(timezone.utc) - timedelta(seconds=settle_seconds)
+    cutoff_id = (
+        await db.execute(select(func.max(Ledger.id)).where(Ledger.created_at < settled))
+    ).scalar()
+    first_account, last_account = (
+        await db.execute(select(func.min(Account.id), func.max(Account.id)))
+    ).one()
+    await db.commit()
+    if cutoff_id is None or first_account is None:
+        return 0
+
+    written = 0
+    for low in range(first_account, last_account + 1, account_batch):
+        high = low + account_batch - 1
+        checkpoint = latest_checkpoints()
+        newest_entry = func.max(Ledger.created_at)
+        new_checkpoints = (
+            select(
+                Ledger.account_id,
+                func.max(Ledger.id),
+                case(
+                    (checkpoint.c.as_of > newest_entry, checkpoint.c.as_of),
+                    else_=newest_entry,
+                ),
+                func.coalesce(checkpoint.c.balance, 0) + func.sum(Ledger.amount),
+            )
+            .outerjoin(checkpoint, checkpoint.c.account_id == Ledger.account_id)
+            .where(
+                Ledger.account_id.between(low, high),
+                Ledger.id > func.coalesce(checkpoint.c.ledger_id, 0),
+                Ledger.id <= cutoff_id,
+            )
+            .group_by(Ledger.account_id, checkpoint.c.as_of, checkpoint.c.balance)
+            .having(func.count() >= min_entries)
+        )
+        try:
+            result = await db.execute(
+                insert(LedgerCheckpoint).from_select(
+                    ["account_id", "ledger_id", "as_of", "balance"], new_checkpoints
+                )
+            )
+            await db.commit()
+        except IntegrityError:
+            # Another worker checkpointed this batch first.
+            await db.rollback()
+            continue
+        written += max(result.rowcount, 0)
+    return written
+
+
+async def checkpoint_before(db: AsyncSession, since: datetime, before: datetime) -> int:
+    """Checkpoint accounts with entries in ``[since, before)`` at their last such entry.
+
+    Each checkpoint covers the account's ledger up to its newest entry before
+    ``before`` and is built from the nearest earlier checkpoint, so rows older
+    than that are never read (they may already be archived). Archiving a
+    ledger partition first calls this with the partition's bounds: balances,
+    including point-in-time balances from ``before`` on, then no longer need
+    the partition's rows. Returns the number of checkpoints written.
+    """
+    boundary = (
+        select(Ledger.account_id, func.max(Ledger.id).label("ledger_id"))
+        .where(Ledger.created_at >= since, Ledger.created_at < before)
+        .group_by(Ledger.account_id)
+        .subquery("boundary")
+    )
+    base_id = (
+        select(
+            LedgerCheckpoint.account_id,
+            func.max(LedgerCheckpoint.ledger_id).label("ledger_id"),
+        )
+        .join(
+            boundary,
+            and_(
+                boundary.c.account_id == LedgerCheckpoint.account_id,
+                LedgerCheckpoint.ledger_id <= boundary.c.ledger_id,
+            ),
+        )
+        .group_by(LedgerCheckpoint.account_id)
+        .subquery()
+    )
+    base = (
+        select(
+            LedgerCheckpoint.account_id,
+            LedgerCheckpoint.ledger_id,
+            LedgerCheckpoint.as_of,
+            LedgerCheckpoint.balance,
+        )
+        .join(
+            base_id,
+            and_(
+                LedgerCheckpoint.account_id == base_id.c.account_id,
+                LedgerCheckpoint.ledger_id == base_id.c.ledger_id,
+            ),
+        )
+        .subquery("base")
+    )
+    newest_entry = func.max(Ledger.created_at)
+    # Accounts already checkpointed exactly at the boundary match no rows.
+    new_checkpoints = (
+        select(
+            Ledger.account_id,
+            boundary.c.ledger_id,
+            case((base.c.as_of > newest_entry, base.c.as_of), else_=newest_entry),
+            func.coalesce(base.c.balance, 0) + func.sum(Ledger.amount),
+        )
+        .join(boundary, boundary.c.account_id == Ledger.account_id)
+        .outerjoin(base, base.c.account_id == Ledger.account_id)
+        .where(
+            Ledger.id > func.coalesce(base.c.ledger_id, 0),
+            Ledger.id <= boundary.c.ledger_id,
+        )
+        .group_by(Ledger.account_id, boundary.c.ledger_id, base.c.as_of, base.c.balance)
+    )
+    result = await db.execute(
+        insert(LedgerCheckpoint).from_select(
+            ["account_id", "ledger_id", "as_of", "balance"], new_checkpoints
+        )
+    )
+    await db.commit()
+    return max(result.rowcount, 0)
+
+
+async def run_compactor(session_factory, interval_seconds: float) -> None:
+    """Background loop calling :func:`compact_ledger` every ``interval_seconds``."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            async with session_factory() as db:
+                written = await compact_ledger(db)
+            if written:
+                logger.info(f"Wrote {written} ledger checkpoints")
+        except Exception as exc:
+            logger.warning(f"Ledger compaction failed: {exc}")
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from sqlalchemy import func, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..auth.utils import create_refresh_token, decode_refresh_token
+from ..cache import TTLCache
+from ..config import settings
+from ..models import RefreshToken
+
+# jti / family ids known to be revoked. Rotation makes every token single-use,
+# so only the negative answer can be cached; it lets replays of spent or
+# revoked tokens be refused without a database round trip.
+revoked_tokens = TTLCache(
+    settings.revoked_token_cache_size,
+    timedelta(days=settings.refresh_token_expire_days).total_seconds(),
+)
+
+
+class InvalidRefreshToken(ValueError):
+    pass
+
+
+async def issue_refresh_token(
+    db: AsyncSession, user_id: int, family_id: str | None = None
+) -> str:
+    token, jti, family_id, expires_at = create_refresh_token(user_id, family_id)
+    await db.execute(
+        insert(RefreshToken).values(
+            jti=jti, family_id=family_id, user_id=user_id, expires_at=expires_at
+        )
+    )
+    await db.commit()
+    return token
+
+
+async def _revoke_family(db: AsyncSession, family_id: str) -> None:
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=func.now())
+    )
+    await db.commit()
+    revoked_tokens.set(("family", family_id), True)
+
+
+async def rotate_refresh_token(db: AsyncSession, token: str) -> tuple[int, str]:
+    """Spend ``token`` and return ``(user_id, replacement_token)``.
+
+    Spending is a single conditional UPDATE, so two concurrent refreshes
+    with the same token cannot both succeed. Presenting a token that was
+    already spent means it leaked: the whole family is revoked.
+    """
+    payload = decode_refresh_token(token)
+    if payload is None:
+        raise InvalidRefreshToken("Invalid refresh token")
+    jti, family_id = payload["jti"], payload["fam"]
+    if ("family", family_id) in revoked_tokens:
+        raise InvalidRefreshToken("Refresh token has been revoked")
+    if ("jti", jti) in revoked_tokens:
+        # Spent here before: a replay, so the family goes as well.
+        await _revoke_family(db, family_id)
+        raise InvalidRefreshToken("Refresh token has been revoked")
+
+    spent = await db.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.jti == jti,
+            RefreshToken.revoked_at.is_(None),
+            RefreshToken.expires_at > func.now(),
+        )
+        .values(revoked_at=func.now())
+        .returning(RefreshToken.user_id)
+    )
+    user_id = spent.scalar()
+    revoked_tokens.set(("jti", jti), True)
+    if user_id is None:
+        await db.rollback()
+        await _revoke_family(db, family_id)
+        raise InvalidRefreshToken("Refresh token has been revoked")
+
+    # issue_refresh_token commits the spend and the replacement together.
+    return user_id, await issue_refresh_token(db, user_id, family_id)
+
+
+async def revoke_refresh_token(db: AsyncSession, token: str) -> None:
+    payload = decode_refresh_token(token)
+    if payload is None:
+        raise InvalidRefreshToken("Invalid refresh token")
+    await _revoke_family(db, payload["fam"])
@@ -1,64 +1,1083 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, case
+from sqlalchemy import Integer, String, bindparam, select, func, case, insert, literal, or_, true, tuple_, union_all, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import IntegrityError
-from ..models import Transfer, Ledger
+from sqlalchemy.orm import aliased
+from ..cache import TTLCache
+from ..config import settings
+from ..metrics import transfers_completed, transfers_failed
+from ..models import Account, AccountActivity, AccountBalanceBucket, OutboxEvent, Transfer, TransferIdempotencyKey, Ledger
+from .account import _normalize_amount, account_summaries, get_ledger_balance
+from ..pagination import decode_cursor, encode_cursor
+from ..write_times import user_write_times
+from datetime import datetime
 from decimal import Decimal
+import random
 import uuid
 
+# idempotency_key -> (owner user id, response payload) for recent transfers,
+# so client retries are answered without touching the database.
+idempotency_cache = TTLCache(
+    settings.idempotency_cache_size, settings.idempotency_cache_ttl_seconds
+)
 
-async def create_transfer(
+
+class TransferError(ValueError):
+    reason = "invalid"  # label on banking_transfers_failed_total
+
+
+class AccountNotFoundError(TransferError):
+    reason = "account_not_found"
+
+
+class InsufficientFundsError(TransferError):
+    reason = "insufficient_funds"
+
+
+class IdempotencyConflictError(TransferError):
+    reason = "idempotency_conflict"
+
+
+class IdempotencyKeyUsedError(IdempotencyConflictError):
+    """The key is taken but its original transfer cannot be loaded to replay
+    (e.g. its partition was archived)."""
+
+
+class SameAccountError(TransferError):
+    reason = "same_account"
+
+
+class DuplicateBatchKeyError(TransferError):
+    reason = "duplicate_key"
+
+
+_ACCOUNT_COLUMNS = (
+    Account.id,
+    Account.account_number,
+    Account.user_id,
+    Account.balance,
+    Account.balance_buckets,
+)
+
+
+async def _lock_transfer_accounts(
+    db: AsyncSession, account_numbers: list[str], debited
+) -> dict:
+    # Locking in account id order means two transfers touching the same pair
+    # of accounts queue behind each other instead of deadlocking. NO KEY
+    # UPDATE queues them just the same but leaves the KEY SHARE locks that
+    # foreign key checks take alone.
+    exclusive = or_(Account.balance_buckets == 0, Account.account_number.in_(debited))
+    locked = (
+        select(*_ACCOUNT_COLUMNS)
+        .where(Account.account_number.in_(account_numbers), exclusive)
+        .order_by(Account.id)
+        .with_for_update(key_share=True)
+    )
+    # Sharded accounts that are only credited: their credits go to a bucket
+    # row, so the account row is just share-locked, which keeps its
+    # sharding from being changed until we commit.
+    shared = (
+        select(*_ACCOUNT_COLUMNS)
+        .where(Account.account_number.in_(account_numbers), ~exclusive)
+        .with_for_update(read=True, key_share=True)
+    )
+    if db.get_bind().dialect.name == "postgresql":
+        # Both lock modes in one round trip. PostgreSQL may evaluate the two
+        # CTEs in either order; the id order that prevents deadlocks comes
+        # from the ORDER BY inside "locked".
+        locked, shared = locked.cte("locked"), shared.cte("shared")
+        query = select(locked).union_all(select(shared))
+    else:
+        query = locked
+    accounts = {row.account_number: row for row in (await db.execute(query)).all()}
+    missing = [number for number in account_numbers if number not in accounts]
+    if missing:
+        # Unknown numbers, sharded credit-only accounts on other dialects,
+        # or (rarely) an account whose sharding changed while we waited.
+        result = await db.execute(
+            select(*_ACCOUNT_COLUMNS)
+            .where(Account.account_number.in_(missing))
+            .with_for_update(read=True, key_share=True)
+        )
+        accounts.update((row.account_number, row) for row in result.all())
+    return accounts
+
+
+async def _bucket_balances(db: AsyncSession, account_ids) -> dict:
+    """``{account_id: [(bucket, balance), ...]}`` for sharded accounts.
+
+    Read after the account rows are locked. Only debits, which hold that
+    lock, take money out of buckets, so these balances can grow before we
+    commit but never shrink.
+    """
+    result = await db.execute(
+        select(
+            AccountBalanceBucket.account_id,
+            AccountBalanceBucket.bucket,
+            AccountBalanceBucket.balance,
+        ).where(AccountBalanceBucket.account_id.in_(account_ids))
+    )
+    buckets: dict = {}
+    for account_id, bucket, balance in result.all():
+        buckets.setdefault(account_id, []).append((bucket, balance))
+    return buckets
+
+
+def _split_balance_changes(accounts, deltas, buckets) -> tuple[dict, list]:
+    """Split net balance changes between account rows and balance buckets.
+
+    ``accounts`` maps account id to its row, ``deltas`` account id to the net
+    change. Credits to a sharded account go to one of its buckets at random;
+    debits come off the account row first, then off the fullest buckets in
+    ``buckets`` (see :func:`_bucket_balances`). Returns ``({account_id:
+    delta}, [(account_id, bucket, delta), ...])``.
+    """
+    account_deltas, bucket_deltas = {}, []
+    for account_id, delta in deltas.items():
+        row = accounts[account_id]
+        if not row.balance_buckets:
+            account_deltas[account_id] = delta
+        elif delta > 0:
+            bucket_deltas.append((account_id, random.randrange(row.balance_buckets), delta))
+        elif delta < 0:
+            from_row = min(max(row.balance, Decimal("0.00")), -delta)
+            account_deltas[account_id] = -from_row
+            remaining = -delta - from_row
+            for bucket, balance in sorted(buckets.get(account_id, ()), key=lambda b: -b[1]):
+                if remaining <= 0:
+                    break
+                taken = min(balance, remaining)
+                bucket_deltas.append((account_id, bucket, -taken))
+                remaining -= taken
+    return account_deltas, bucket_deltas
+
+
+def _add_to_buckets(dialect_name: str, bucket_deltas: list):
+    """Upsert adding ``[(account_id, bucket, delta), ...]`` to balance buckets.
+
+    A bucket row that is missing (say it was never created when the account
+    was sharded) is created with the delta rather than the credit matching
+    no row and vanishing.
+    """
+    insert_ = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    statement = insert_(AccountBalanceBucket).values(
+        [
+            {"account_id": account_id, "bucket": bucket, "balance": delta}
+            for account_id, bucket, delta in bucket_deltas
+        ]
+    )
+    return statement.on_conflict_do_update(
+        index_elements=[AccountBalanceBucket.account_id, AccountBalanceBucket.bucket],
+        set_={"balance": AccountBalanceBucket.balance + statement.excluded.balance},
+    )
+
+
+def _balance_updates(account_deltas: dict, bucket_deltas: list, dialect_name: str) -> list:
+    """Statements applying :func:`_split_balance_changes` output."""
+    statements = []
+    if account_deltas:
+        statements.append(
+            update(Account)
+            .where(Account.id.in_(list(account_deltas)))
+            .values(
+                balance=Account.balance
+                + case(
+                    *((Account.id == account_id, delta) for account_id, delta in account_deltas.items()),
+                    else_=0,
+                )
+            )
+        )
+    if bucket_deltas:
+        statements.append(_add_to_buckets(dialect_name, bucket_deltas))
+    return statements
+
+
+def _activity_row(ledger_row, counterparty_account_number, description) -> dict:
+    return {
+        "ledger_id": ledger_row.id,
+        "account_id": ledger_row.account_id,
+        "transfer_id": ledger_row.transfer_id,
+        "direction": "outgoing" if ledger_row.amount < 0 else "incoming",
+        "counterparty_account_number": counterparty_account_number,
+        "amount": abs(ledger_row.amount),
+        "description": description,
+        "status": "completed",
+        "occurred_at": ledger_row.created_at,
+    }
+
+
+_LEDGER_RETURNING = (
+    Ledger.id,
+    Ledger.account_id,
+    Ledger.transfer_id,
+    Ledger.amount,
+    Ledger.created_at,
+)
+
+
+# Copies created_at from the stored transfer rather than binding the value
+# RETURNING gave back, so the key's copy compares equal on every dialect.
+# Built on the Table so executemany stays a plain Core INSERT ... SELECT.
+_INSERT_IDEMPOTENCY_KEY = insert(TransferIdempotencyKey.__table__).from_select(
+    ["idempotency_key", "transfer_id", "transfer_created_at"],
+    select(bindparam("idempotency_key", type_=String), Transfer.id, Transfer.created_at).where(
+        Transfer.id == bindparam("transfer_id")
+    ),
+)
+
+# On PostgreSQL, where transfers are partitioned by created_at, the lookup
+# also matches the created_at RETURNING gave back so it reads one partition
+# instead of probing the id index of every one. Values round-trip exactly
+# there; SQLite keeps its own text form, so it matches by id alone.
+_INSERT_IDEMPOTENCY_KEY_PG = insert(TransferIdempotencyKey.__table__).from_select(
+    ["idempotency_key", "transfer_id", "transfer_created_at"],
+    select(bindparam("idempotency_key", type_=String), Transfer.id, Transfer.created_at).where(
+        Transfer.id == bindparam("transfer_id"),
+        Transfer.created_at == bindparam("transfer_created_at"),
+    ),
+)
+
+
+def _insert_idempotency_key(db: AsyncSession):
+    if db.get_bind().dialect.name == "postgresql":
+        return _INSERT_IDEMPOTENCY_KEY_PG
+    return _INSERT_IDEMPOTENCY_KEY
+
+
+# executemany form of _balance_updates' account update for batches, on the
+# Table so it stays a plain Core UPDATE.
+_ADD_TO_BALANCE = (
+    update(Account.__table__)
+    .where(Account.__table__.c.id == bindparam("account_id_"))
+    .values(balance=Account.__table__.c.balance + bindparam("delta"))
+)
+
+
+TRANSFER_COMPLETED = "transfer.completed"
+
+
+def _outbox_enabled() -> bool:
+    """Whether transfers write outbox events (``OUTBOX_ENABLED``)."""
+    if settings.outbox_enabled is None:
+        return bool(settings.outbox_sink)
+    return settings.outbox_enabled
+
+
+def _transfer_event(from_account_number, to_account_number, amount, description) -> dict:
+    """Outbox payload for a completed transfer; see ``banking_app.outbox``."""
+    return {
+        "from_account_number": from_account_number,
+        "to_account_number": to_account_number,
+        "amount": str(amount),
+        "description": description,
+    }
+
+
+def _transfer_statement(
+    accounts,
+    from_account_number: str,
+    to_account_number: str,
+    amount: Decimal,
+    description: str,
+    idempotency_key: str,
+    client_key: bool,
+):
+    """PostgreSQL statement writing a transfer between ``accounts``' ids.
+
+    ``accounts`` is a CTE of at most one row with ``source_id``,
+    ``destination_id`` and ``destination_user_id``; with no row, nothing is
+    written and the statement returns no rows. The transfer insert feeds the
+    ledger insert through data-modifying CTEs, the ledger rows feed
+    account_activity, and the outbox event and idempotency key ride along.
+    Callers add the balance updates. Returns ``id``, ``created_at``,
+    ``completed_at`` and ``destination_user_id``.
+    """
+    new_transfer = (
+        insert(Transfer)
+        .from_select(
+            [
+                "idempotency_key",
+                "from_account_id",
+                "to_account_id",
+                "amount",
+                "description",
+                "status",
+                "completed_at",
+            ],
+            select(
+                literal(idempotency_key, String),
+                accounts.c.source_id,
+                accounts.c.destination_id,
+                literal(amount, Transfer.amount.type),
+                literal(description, String),
+                literal("completed", String),
+                func.now(),
+            ),
+        )
+        .returning(
+            Transfer.id,
+            Transfer.from_account_id,
+            Transfer.to_account_id,
+            Transfer.created_at,
+            Transfer.completed_at,
+        )
+        .cte("new_transfer")
+    )
+    new_ledger = (
+        insert(Ledger)
+        .from_select(
+            ["account_id", "amount", "description", "transfer_id"],
+            union_all(
+                *(
+                    select(
+                        account_id,
+                        literal(delta, Ledger.amount.type),
+                        literal(description, String),
+                        new_transfer.c.id,
+                    )
+                    for account_id, delta in (
+                        (new_transfer.c.from_account_id, -amount),
+                        (new_transfer.c.to_account_id, amount),
+                    )
+                )
+            ),
+        )
+        .returning(
+            Ledger.id, Ledger.account_id, Ledger.transfer_id, Ledger.amount, Ledger.created_at
+        )
+        .cte("new_ledger")
+    )
+    outgoing = new_ledger.c.amount < 0
+    new_activity = insert(AccountActivity).from_select(
+        [
+            "ledger_id",
+            "account_id",
+            "transfer_id",
+            "direction",
+            "counterparty_account_number",
+            "amount",
+            "description",
+            "status",
+            "occurred_at",
+        ],
+        select(
+            new_ledger.c.id,
+            new_ledger.c.account_id,
+            new_ledger.c.transfer_id,
+            case((outgoing, "outgoing"), else_="incoming"),
+            case((outgoing, to_account_number), else_=from_account_number),
+            literal(amount, AccountActivity.amount.type),
+            literal(description, String),
+            literal("completed", String),
+            new_ledger.c.created_at,
+        ),
+    )
+    event = _transfer_event(from_account_number, to_account_number, amount, description)
+    statement = (
+        select(
+            new_transfer.c.id,
+            new_transfer.c.created_at,
+            new_transfer.c.completed_at,
+            accounts.c.destination_user_id,
+        )
+        .select_from(new_transfer.join(accounts, true()))
+        .add_cte(new_ledger)
+        .add_cte(new_activity.cte("new_activity"))
+    )
+    if _outbox_enabled():
+        new_event = insert(OutboxEvent).from_select(
+            ["event_type", "aggregate_id", "payload"],
+            select(
+                literal(TRANSFER_COMPLETED, String),
+                new_transfer.c.id,
+                literal(event, OutboxEvent.payload.type),
+            ),
+        )
+        statement = statement.add_cte(new_event.cte("new_event"))
+    if client_key:
+        new_key = insert(TransferIdempotencyKey).from_select(
+            ["idempotency_key", "transfer_id", "transfer_created_at"],
+            select(
+                literal(idempotency_key, String),
+                new_transfer.c.id,
+                new_transfer.c.created_at,
+            ),
+        )
+        statement = statement.add_cte(new_key.cte("new_key"))
+    return statement
+
+
+async def _write_guarded_transfer(
     db: AsyncSession,
-    from_account,  # Account object
-    to_account,    # Account object
+    user_id: int,
+    from_account_number: str,
+    to_account_number: str,
     amount: Decimal,
     description: str,
-    idempotency_key: str | None = None,
+    idempotency_key: str,
+    client_key: bool,
 ):
-    if idempotency_key is None:
-        idempotency_key = str(uuid.uuid4())
+    """Lock, check and write a transfer in one PostgreSQL statement.
 
-    # Check if transfer already exists
-    existing = await db.execute(
-        select(Transfer).where(Transfer.idempotency_key == idempotency_key)
+    Locks both account rows in id order, like :func:`_lock_transfer_accounts`,
+    and writes the transfer only if the source belongs to ``user_id``, is
+    not the destination and covers ``amount``, all read under the lock.
+    Accounts with balance buckets are left alone. Returns the
+    :func:`_transfer_statement` row, or ``None`` with nothing written if a
+    check failed or an account is sharded; the locks taken, if any, stay
+    held for the caller.
+    """
+    locked = (
+        select(Account.id, Account.account_number, Account.user_id, Account.balance)
+        .where(
+            Account.account_number.in_([from_account_number, to_account_number]),
+            Account.balance_buckets == 0,
+        )
+        .order_by(Account.id)
+        .with_for_update(key_share=True)
+        .cte("locked")
     )
-    if existing.scalars().first():
-        raise ValueError("Transfer with this idempotency key already exists")
+    source, destination = locked.alias("source"), locked.alias("destination")
+    accounts = (
+        select(
+            source.c.id.label("source_id"),
+            destination.c.id.label("destination_id"),
+            destination.c.user_id.label("destination_user_id"),
+        )
+        .where(
+            source.c.account_number == from_account_number,
+            source.c.user_id == user_id,
+            source.c.balance >= amount,
+            destination.c.account_number == to_account_number,
+            source.c.id != destination.c.id,
+        )
+        .cte("checked")
+    )
+    delta = case(
+        (Account.id == accounts.c.source_id, literal(-amount, Account.balance.type)),
+        else_=literal(amount, Account.balance.type),
+    )
+    balances = (
+        update(Account)
+        .where(Account.id.in_([accounts.c.source_id, accounts.c.destination_id]))
+        .values(balance=Account.balance + delta)
+    )
+    statement = _transfer_statement(
+        accounts,
+        from_account_number,
+        to_account_number,
+        amount,
+        description,
+        idempotency_key,
+        client_key,
+    ).add_cte(balances.cte("new_balances"))
+    return (await db.execute(statement)).first()
+
 
-    # Create transfer record
-    db_transfer = Transfer(
+async def _write_transfer(
+    db: AsyncSession,
+    source,
+    destination,
+    amount: Decimal,
+    description: str,
+    idempotency_key: str,
+    client_key: bool = True,
+    buckets: dict | None = None,
+):
+    transfer_values = dict(
         idempotency_key=idempotency_key,
-        from_account_id=from_account.id,
-        to_account_id=to_account.id,
+        from_account_id=source.id,
+        to_account_id=destination.id,
         amount=amount,
         description=description,
-        status="pending"
+        status="completed",
+        completed_at=func.now(),
+    )
+    entries = ((source.id, -amount), (destination.id, amount))
+    event = _transfer_event(
+        source.account_number, destination.account_number, amount, description
+    )
+    balance_updates = _balance_updates(
+        *_split_balance_changes(
+            {source.id: source, destination.id: destination},
+            {source.id: -amount, destination.id: amount},
+            buckets or {},
+        ),
+        db.get_bind().dialect.name,
     )
-    db.add(db_transfer)
-    await db.flush()  # Get transfer ID
 
-    # Create ledger entries
-    debit_entry = Ledger(
-        account_id=from_account.id,
-        amount=-amount,
-        description=description,
-        transfer_id=db_transfer.id
+    if db.get_bind().dialect.name == "postgresql":
+        accounts = select(
+            literal(source.id, Integer).label("source_id"),
+            literal(destination.id, Integer).label("destination_id"),
+            literal(destination.user_id, Integer).label("destination_user_id"),
+        ).cte("checked")
+        statement = _transfer_statement(
+            accounts,
+            source.account_number,
+            destination.account_number,
+            amount,
+            description,
+            idempotency_key,
+            client_key,
+        )
+        for i, balance_update in enumerate(balance_updates):
+            statement = statement.add_cte(balance_update.cte(f"new_balances_{i}"))
+        result = await db.execute(statement)
+        return result.one()
+
+    result = await db.execute(
+        insert(Transfer)
+        .values(**transfer_values)
+        .returning(Transfer.id, Transfer.created_at, Transfer.completed_at)
     )
-    credit_entry = Ledger(
-        account_id=to_account.id,
-        amount=amount,
-        description=description,
-        transfer_id=db_transfer.id
+    created = result.one()
+    if client_key:
+        await db.execute(
+            _insert_idempotency_key(db),
+            {
+                "idempotency_key": idempotency_key,
+                "transfer_id": created.id,
+                "transfer_created_at": created.created_at,
+            },
+        )
+    ledger_rows = (
+        await db.execute(
+            insert(Ledger).returning(*_LEDGER_RETURNING, sort_by_parameter_order=True),
+            [
+                {
+                    "account_id": account_id,
+                    "amount": delta,
+                    "description": description,
+                    "transfer_id": created.id,
+                }
+                for account_id, delta in entries
+            ],
+        )
+    ).all()
+    counterparties = (destination.account_number, source.account_number)
+    await db.execute(
+        insert(AccountActivity),
+        [
+            _activity_row(row, counterparty, description)
+            for row, counterparty in zip(ledger_rows, counterparties)
+        ],
+    )
+    if _outbox_enabled():
+        await db.execute(
+            insert(OutboxEvent).values(
+                event_type=TRANSFER_COMPLETED, aggregate_id=created.id, payload=event
+            )
+        )
+    for balance_update in balance_updates:
+        await db.execute(balance_update.execution_options(synchronize_session=False))
+    return created
+
+
+async def _stored_transfers(db: AsyncSession, idempotency_keys) -> dict:
+    """Load previously completed transfers as ``{key: (owner_id, payload)}``."""
+    from_account = aliased(Account)
+    to_account = aliased(Account)
+    result = await db.execute(
+        select(
+            Transfer,
+            from_account.user_id,
+            from_account.account_number,
+            to_account.account_number,
+        )
+        .select_from(TransferIdempotencyKey)
+        # Matching on created_at too lets PostgreSQL prune to one partition.
+        .join(
+            Transfer,
+            (Transfer.id == TransferIdempotencyKey.transfer_id)
+            & (Transfer.created_at == TransferIdempotencyKey.transfer_created_at),
+        )
+        .join(from_account, Transfer.from_account_id == from_account.id)
+        .join(to_account, Transfer.to_account_id == to_account.id)
+        .where(TransferIdempotencyKey.idempotency_key.in_(list(idempotency_keys)))
     )
+    stored = {}
+    for transfer, owner_id, from_number, to_number in result.all():
+        stored[transfer.idempotency_key] = (
+            owner_id,
+            transfer_payload(
+                transfer.id,
+                from_number,
+                to_number,
+                transfer.amount,
+                transfer.description,
+                transfer.status,
+                transfer.created_at,
+                transfer.completed_at,
+            ),
+        )
+    return stored
+
+
+def _replay(stored, user_id, from_account_number, to_account_number, amount, description):
+    """Return the stored payload if it answers this request, else raise.
+
+    A key may only be replayed by the user who created it and with the same
+    request body; anything else is a client bug worth surfacing.
+    """
+    owner_id, payload = stored
+    if owner_id != user_id or (
+        payload["from_account_number"],
+        payload["to_account_number"],
+        _normalize_amount(payload["amount"]),
+        payload["description"],
+    ) != (from_account_number, to_account_number, amount, description):
+        raise IdempotencyConflictError(
+            "Idempotency key was already used for a different transfer"
+        )
+    return payload
+
+
+async def create_transfer(
+    db: AsyncSession,
+    user_id: int,
+    from_account_number: str,
+    to_account_number: str,
+    amount: Decimal,
+    description: str,
+    idempotency_key: str | None = None,
+) -> tuple[dict, bool]:
+    """Move ``amount`` between two accounts.
+
+    Returns ``(payload, replayed)``: the transfer's payload, and whether it
+    is an earlier transfer answered again rather than one applied now
+    (routes send ``Idempotent-Replayed: true`` for those). A repeated
+    ``idempotency_key`` replays the original transfer's payload; recent keys
+    are answered from ``idempotency_cache`` and older ones from the database.
 
-    db.add(debit_entry)
-    db.add(credit_entry)
+    On PostgreSQL a transfer is one statement and a COMMIT: the statement
+    locks both account rows, checks the source's owner and funds under the
+    lock and writes the transfer only if they pass, so concurrent transfers
+    cannot overdraw (see :func:`_write_guarded_transfer`). A transfer it
+    turns down, or one touching a sharded account, goes on in the same
+    transaction to a ``SELECT ... FOR UPDATE`` of both rows, the checks in
+    Python and then the write as one statement, which costs two more round
+    trips. Other dialects always take that path, with the write as five to
+    seven separate inserts and updates.
 
-    # Update transfer status
-    db_transfer.status = "completed"
+    Credits to an account with ``balance_buckets`` set go to one of its
+    balance buckets and only share-lock the account row, so they do not
+    queue behind each other; a debit short of funds on the row reads the
+    buckets (one more statement) and takes the rest from them.
+
+    Raises ``AccountNotFoundError``, ``InsufficientFundsError``,
+    ``IdempotencyConflictError`` (key reused with a different request, or
+    ``IdempotencyKeyUsedError`` if the original cannot be replayed) or
+    ``SameAccountError``, all ``TransferError`` subclasses counted by reason
+    in ``transfers_failed``.
+    """
+    try:
+        return await _create_transfer(
+            db,
+            user_id,
+            from_account_number,
+            to_account_number,
+            amount,
+            description,
+            idempotency_key,
+        )
+    except TransferError as exc:
+        transfers_failed.inc(exc.reason)
+        raise
+
+
+async def _create_transfer(
+    db: AsyncSession,
+    user_id: int,
+    from_account_number: str,
+    to_account_number: str,
+    amount: Decimal,
+    description: str,
+    idempotency_key: str | None,
+) -> tuple[dict, bool]:
+    amount = _normalize_amount(amount)
+    request = (user_id, from_account_number, to_account_number, amount, description)
+    client_key = idempotency_key is not None
+    if not client_key:
+        idempotency_key = str(uuid.uuid4())
+    else:
+        cached = idempotency_cache.get(idempotency_key)
+        if cached is not None:
+            return _replay(cached, *request), True
+
+    # No pre-check for the idempotency key: the transfer_idempotency_keys
+    # primary key rejects a duplicate as part of the write, and only then do
+    # we fetch the original.
+    try:
+        created = None
+        if db.get_bind().dialect.name == "postgresql":
+            created = await _write_guarded_transfer(db, *request, idempotency_key, client_key)
+        if created is None:
+            # Not PostgreSQL, or the guarded write turned the transfer down:
+            # lock and check step by step, which also says what was wrong.
+            source, destination, buckets = await _checked_transfer_accounts(db, *request)
+            created = await _write_transfer(
+                db, source, destination, amount, description, idempotency_key, client_key, buckets
+            )
+            destination_user_id = destination.user_id
+        else:
+            destination_user_id = created.destination_user_id
+        await db.commit()
+    except TransferError as error:
+        await db.rollback()  # release the row locks straight away
+        # A retry of a transfer that already went through (its cache entry
+        # may live in another worker) can fail the checks, e.g. the funds
+        # are gone, so look for the original before reporting.
+        stored = await _stored_transfers(db, [idempotency_key]) if client_key else {}
+        if idempotency_key in stored:
+            idempotency_cache.set(idempotency_key, stored[idempotency_key])
+            return _replay(stored[idempotency_key], *request), True
+        raise error
+    except IntegrityError as exc:
+        await db.rollback()
+        if not client_key:
+            raise  # a generated key cannot collide; something else broke
+        stored = await _stored_transfers(db, [idempotency_key])
+        if idempotency_key not in stored:
+            raise IdempotencyKeyUsedError(
+                "Idempotency key was already used for another transfer"
+            ) from exc
+        idempotency_cache.set(idempotency_key, stored[idempotency_key])
+        return _replay(stored[idempotency_key], *request), True
+
+    transfers_completed.inc()
+    for owner_id in (user_id, destination_user_id):
+        account_summaries.pop(owner_id)
+        user_write_times.mark(owner_id)
+    payload = transfer_payload(
+        created.id,
+        from_account_number,
+        to_account_number,
+        amount,
+        description,
+        "completed",
+        created.created_at,
+        created.completed_at,
+    )
+    if client_key:
+        idempotency_cache.set(idempotency_key, (user_id, payload))
+    return payload, False
+
+
+async def _checked_transfer_accounts(
+    db: AsyncSession,
+    user_id: int,
+    from_account_number: str,
+    to_account_number: str,
+    amount: Decimal,
+    description: str,
+):
+    """Lock both accounts and return ``(source, destination, buckets)``.
+
+    Raises the ``TransferError`` the transfer fails with, if any; the locks
+    are held either way.
+    """
+    accounts = await _lock_transfer_accounts(
+        db, [from_account_number, to_account_number], [from_account_number]
+    )
+    source = accounts.get(from_account_number)
+    destination = accounts.get(to_account_number)
+    if source is None or source.user_id != user_id:
+        raise AccountNotFoundError("Source account not found for current user")
+    if destination is None:
+        raise AccountNotFoundError("Destination account not found")
+    if source.id == destination.id:
+        raise SameAccountError("Cannot transfer to the same account")
+    available = source.balance
+    buckets = {}
+    if source.balance_buckets and available < amount:
+        buckets = await _bucket_balances(db, [source.id])
+        available += sum(balance for _, balance in buckets.get(source.id, ()))
+    if available < amount:
+        raise InsufficientFundsError("Insufficient funds")
+    return source, destination, buckets
+
+
+def transfer_payload(
+    transfer_id: int,
+    from_account_number: str,
+    to_account_number: str,
+    amount: Decimal,
+    description: str,
+    status: str,
+    created_at,
+    completed_at,
+) -> dict:
+    """Shape a transfer the way the ``Transfer`` response schema expects."""
+    return {
+        "id": transfer_id,
+        "from_account_number": from_account_number,
+        "to_account_number": to_account_number,
+        "amount": amount,
+        "description": description,
+        "status": status,
+        "created_at": created_at.isoformat() if created_at else None,
+        "completed_at": completed_at.isoformat() if completed_at is not None else None,
+    }
+
+
+async def create_transfers_batch(
+    db: AsyncSession,
+    user_id: int,
+    transfers,  # Sequence of TransferCreate-like objects
+    atomic: bool = True,
+) -> list[dict]:
+    """Validate and apply many transfers in one transaction.
+
+    Every involved account row is resolved and locked with a single
+    ``SELECT ... FOR UPDATE`` ordered by account id, so concurrent batches
+    always acquire locks in the same order and cannot deadlock. Items are then checked
+    against running balances in submission order and written with one bulk
+    insert per table.
+
+    With ``atomic`` any failed item aborts the whole batch (remaining valid
+    items are reported as ``skipped``); otherwise valid items are applied and
+    failures are reported alongside them. Items whose idempotency key already
+    completed are replayed rather than re-applied. Returns one result dict
+    per item.
+    """
+    results, _ = await _apply_transfers(db, [user_id] * len(transfers), transfers, atomic)
+    return results
+
+
+async def _apply_transfers(
+    db: AsyncSession,
+    user_ids,  # owner of each item's source account
+    transfers,
+    atomic: bool,
+) -> tuple[list[dict], dict[int, TransferError]]:
+    """:func:`create_transfers_batch` for items from any number of users.
+
+    Also returns each failed item's error by index, for callers that raise
+    it; ``group_commit`` uses this to apply many requests in one transaction.
+    """
+    results = [
+        {
+            "index": index,
+            "status": "failed",
+            "transfer": None,
+            "error": None,
+            "replayed": False,
+        }
+        for index in range(len(transfers))
+    ]
+
+    numbers = {t.from_account_number for t in transfers} | {
+        t.to_account_number for t in transfers
+    }
+    debited = {t.from_account_number for t in transfers}
+    accounts = await _lock_transfer_accounts(db, list(numbers), list(debited))
+
+    errors: dict[int, TransferError] = {}
+
+    def fail(index: int, error: TransferError) -> None:
+        results[index]["error"] = str(error)
+        errors[index] = error
+        transfers_failed.inc(error.reason)
+
+    keys = [t.idempotency_key or str(uuid.uuid4()) for t in transfers]
+    seen_keys: set[str] = set()
+    pending = []
+    for index, (item, key) in enumerate(zip(transfers, keys)):
+        source = accounts.get(item.from_account_number)
+        destination = accounts.get(item.to_account_number)
+        if source is None or source.user_id != user_ids[index]:
+            fail(index, AccountNotFoundError("Source account not found for current user"))
+        elif destination is None:
+            fail(index, AccountNotFoundError("Destination account not found"))
+        elif source.id == destination.id:
+            fail(index, SameAccountError("Cannot transfer to the same account"))
+        elif key in seen_keys:
+            fail(index, DuplicateBatchKeyError("Duplicate idempotency key in batch"))
+        else:
+            pending.append((index, item, key, source, destination))
+        seen_keys.add(key)
+
+    # Quantize up front so the running balances match what the NUMERIC(.., 2)
+    # columns will store.
+    amounts = {index: _normalize_amount(item.amount) for index, item, *_ in pending}
+
+    balances = {row.id: row.balance for row in accounts.values()}
+    # Debits from sharded accounts can draw on their buckets too.
+    sharded = [
+        row.id
+        for row in accounts.values()
+        if row.balance_buckets and row.account_number in debited
+    ]
+    buckets = await _bucket_balances(db, sharded) if sharded else {}
+    for account_id, account_buckets in buckets.items():
+        balances[account_id] += sum(balance for _, balance in account_buckets)
+    opening = dict(balances)
+    client_keys = [
+        key for _, item, key, *_ in pending if item.idempotency_key is not None
+    ]
+    stored = {}
+    for key in client_keys:
+        cached = idempotency_cache.get(key)
+        if cached is not None:
+            stored[key] = cached
+    uncached = [key for key in client_keys if key not in stored]
+    if uncached:
+        stored.update(await _stored_transfers(db, uncached))
+
+    accepted = []
+    for index, item, key, source, destination in pending:
+        if key in stored:
+            try:
+                results[index]["transfer"] = _replay(
+                    stored[key],
+                    user_ids[index],
+                    item.from_account_number,
+                    item.to_account_number,
+                    amounts[index],
+                    item.description,
+                )
+            except IdempotencyConflictError as exc:
+                fail(index, exc)
+            else:
+                results[index]["status"] = "completed"
+                results[index]["replayed"] = True
+        elif balances[source.id] < amounts[index]:
+            fail(index, InsufficientFundsError("Insufficient funds"))
+        else:
+            balances[source.id] -= amounts[index]
+            balances[destination.id] += amounts[index]
+            accepted.append((index, item, key, source, destination))
+
+    failed = any(result["error"] is not None for result in results)
+    if not accepted or (atomic and failed):
+        for index, *_ in accepted:
+            results[index]["status"] = "skipped"
+        await db.rollback()
+        return results, errors
+
+    try:
+        created = (
+            await db.execute(
+                insert(Transfer)
+                .values(completed_at=func.now())
+                .returning(
+                    Transfer.id,
+                    Transfer.created_at,
+                    Transfer.completed_at,
+                    sort_by_parameter_order=True,
+                ),
+                [
+                    {
+                        "idempotency_key": key,
+                        "from_account_id": source.id,
+                        "to_account_id": destination.id,
+                        "amount": amounts[index],
+                        "description": item.description,
+                        "status": "completed",
+                    }
+                    for index, item, key, source, destination in accepted
+                ],
+            )
+        ).all()
+        client_keys = [
+            {"idempotency_key": key, "transfer_id": row.id, "transfer_created_at": row.created_at}
+            for (_, item, key, *_), row in zip(accepted, created)
+            if item.idempotency_key is not None
+        ]
+        if client_keys:
+            await db.execute(_insert_idempotency_key(db), client_keys)
+    except IntegrityError as exc:
+        # Another request claimed one of the idempotency keys after we checked.
+        await db.rollback()
+        raise IdempotencyKeyUsedError("Transfer with this idempotency key already exists") from exc
+
+    ledger_rows = []
+    activity = []  # (counterparty number, description) per ledger row
+    events = []
+    for (index, item, _, source, destination), row in zip(accepted, created):
+        amount = amounts[index]
+        activity.append((destination.account_number, item.description))
+        activity.append((source.account_number, item.description))
+        ledger_rows.append(
+            {
+                "account_id": source.id,
+                "amount": -amount,
+                "description": item.description,
+                "transfer_id": row.id,
+            }
+        )
+        ledger_rows.append(
+            {
+                "account_id": destination.id,
+                "amount": amount,
+                "description": item.description,
+                "transfer_id": row.id,
+            }
+        )
+        events.append(
+            {
+                "event_type": TRANSFER_COMPLETED,
+                "aggregate_id": row.id,
+                "payload": _transfer_event(
+                    source.account_number,
+                    destination.account_number,
+                    amount,
+                    item.description,
+                ),
+            }
+        )
+        results[index]["status"] = "completed"
+        results[index]["transfer"] = transfer_payload(
+            row.id,
+            source.account_number,
+            destination.account_number,
+            amount,
+            item.description,
+            "completed",
+            row.created_at,
+            row.completed_at,
+        )
+    written = await db.execute(
+        insert(Ledger).returning(*_LEDGER_RETURNING, sort_by_parameter_order=True),
+        ledger_rows,
+    )
+    await db.execute(
+        insert(AccountActivity),
+        [
+            _activity_row(row, counterparty, description)
+            for row, (counterparty, description) in zip(written.all(), activity)
+        ],
+    )
+    if _outbox_enabled():
+        await db.execute(insert(OutboxEvent), events)
+
+    # The rows are locked (or, for credits to sharded accounts, only ever
+    # added to), so the running balances computed above are exact.
+    touched = {p[3].id for p in accepted} | {p[4].id for p in accepted}
+    account_deltas, bucket_deltas = _split_balance_changes(
+        {row.id: row for row in accounts.values()},
+        {account_id: balances[account_id] - opening[account_id] for account_id in sorted(touched)},
+        buckets,
+    )
+    if account_deltas:
+        await db.execute(
+            _ADD_TO_BALANCE,
+            [{"account_id_": i, "delta": delta} for i, delta in account_deltas.items()],
+        )
+    if bucket_deltas:
+        await db.execute(_add_to_buckets(db.get_bind().dialect.name, bucket_deltas))
 
     await db.commit()
-    await db.refresh(db_transfer)
-    return db_transfer
+    transfers_completed.inc(amount=len(accepted))
+    for owner_id in {p[3].user_id for p in accepted} | {p[4].user_id for p in accepted}:
+        account_summaries.pop(owner_id)
+        user_write_times.mark(owner_id)
+    for index, item, key, *_ in accepted:
+        if item.idempotency_key is not None:
+            idempotency_cache.set(key, (user_ids[index], results[index]["transfer"]))
+    return results, errors
 
 
 async def get_transfer_by_id(db: AsyncSession, transfer_id: int):
@@ -78,61 +1097,149 @@ async def get_transfers_by_account(db: AsyncSession, account_id: int):
 async def get_ledger_entries(db: AsyncSession, account_id: int, limit: int = 50, offset: int = 0):
     result = await db.execute(
         select(Ledger).where(Ledger.account_id == account_id)
-        .order_by(Ledger.created_at.desc())
+        .order_by(Ledger.created_at.desc(), Ledger.id.desc())
         .limit(limit)
         .offset(offset)
     )
     return result.scalars().all()
 
 
+def _account_transactions_query(account):
+    # Newest first. (occurred_at, ledger_id) is unique and is the ledger's
+    # (created_at, id), so offset pages, keyset cursors and the covering
+    # index all agree on the order.
+    return (
+        select(
+            AccountActivity.ledger_id,
+            AccountActivity.transfer_id,
+            AccountActivity.direction,
+            AccountActivity.counterparty_account_number,
+            AccountActivity.amount,
+            AccountActivity.description,
+            AccountActivity.status,
+            AccountActivity.occurred_at,
+        )
+        .where(AccountActivity.account_id == account.id)
+        .order_by(AccountActivity.occurred_at.desc(), AccountActivity.ledger_id.desc())
+    )
+
+
+def _transaction_entry(row) -> dict:
+    return {
+        "transfer_id": row.transfer_id,
+        "direction": row.direction,
+        "counterparty_account_number": row.counterparty_account_number,
+        "amount": row.amount,
+        "description": row.description,
+        "status": row.status,
+        "occurred_at": row.occurred_at.isoformat(),
+    }
+
+
 async def get_account_transactions(db: AsyncSession, account, limit: int = 50, offset: int = 0):
-    from sqlalchemy.orm import aliased
-    from ..models import Account
-    
-    # Create aliases for from and to accounts in the transfer
+    result = await db.execute(
+        _account_transactions_query(account).limit(limit).offset(offset)
+    )
+    return [_transaction_entry(row) for row in result.all()]
+
+
+async def get_account_transactions_page(
+    db: AsyncSession, account, limit: int = 50, cursor: str | None = None
+):
+    """Keyset-paginated transactions; returns ``(entries, next_cursor)``.
+
+    ``cursor`` is the ``next_cursor`` of the previous page (``None`` or empty
+    for the first page). Raises ``ValueError`` for a malformed cursor.
+    """
+    query = _account_transactions_query(account)
+    if cursor:
+        created_at, ledger_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(AccountActivity.occurred_at, AccountActivity.ledger_id)
+            < tuple_(created_at, ledger_id)
+        )
+
+    # One extra row tells us whether another page exists.
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].occurred_at, rows[-1].ledger_id)
+
+    return [_transaction_entry(row) for row in rows], next_cursor
+
+
+async def stream_account_statement(
+    db: AsyncSession,
+    account_id: int,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    chunk_size: int = 1000,
+):
+    """Yield an account's ledger in chronological order for a statement.
+
+    The first record is the opening balance (everything before ``start``,
+    from the newest ledger checkpoint before it plus the entries since),
+    then one record per ledger entry in ``[start, end)`` with a running
+    balance, then the closing balance. Entries come from a server-side
+    cursor ``chunk_size`` rows at a time, so memory stays flat however long
+    the history is. On PostgreSQL the whole statement is read from one
+    REPEATABLE READ snapshot so the balances and entries agree.
+    """
+    if db.bind.dialect.name == "postgresql":
+        await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+    if start is not None:
+        balance = await get_ledger_balance(db, account_id, as_of=start)
+    else:
+        balance = Decimal("0.00")
+    yield {"type": "opening_balance", "occurred_at": start, "balance": balance}
+
     from_account = aliased(Account)
     to_account = aliased(Account)
-    
-    # Query all ledger entries for this account and join with transfers to get transaction details
-    result = await db.execute(
-        select(Ledger, Transfer, from_account, to_account)
-        .join(Transfer, Ledger.transfer_id == Transfer.id)
-        .join(from_account, Transfer.from_account_id == from_account.id)
-        .join(to_account, Transfer.to_account_id == to_account.id)
-        .where(Ledger.account_id == account.id)
-        .order_by(Ledger.created_at.desc())
-        .limit(limit)
-        .offset(offset)
+    query = (
+        select(
+            Ledger.id,
+            Ledger.created_at,
+            Ledger.transfer_id,
+            Ledger.amount,
+            Ledger.description,
+            Transfer.status,
+            case(
+                (Ledger.amount < 0, to_account.account_number),
+                else_=from_account.account_number,
+            ).label("counterparty_account_number"),
+        )
+        .outerjoin(Transfer, Ledger.transfer_id == Transfer.id)
+        .outerjoin(from_account, Transfer.from_account_id == from_account.id)
+        .outerjoin(to_account, Transfer.to_account_id == to_account.id)
+        .where(Ledger.account_id == account_id)
+        .order_by(Ledger.created_at, Ledger.id)
+        .execution_options(yield_per=chunk_size)
     )
-    
-    rows = result.all()
-    transactions = []
-    
-    for ledger, transfer, from_acc, to_acc in rows:
-        # Determine direction and counterparty based on which account this is
-        if account.id == transfer.from_account_id:  # This account is the sender
-            direction = "outgoing"
-            counterparty_account_number = to_acc.account_number
-        else:  # This account is the receiver
-            direction = "incoming"
-            counterparty_account_number = from_acc.account_number
-        
-        # Use absolute value of amount (always positive in response)
-        amount = abs(ledger.amount)
-        
-        # Determine status from transfer
-        status = transfer.status
-        
-        # Create transaction entry in the expected format
-        transaction_entry = {
-            "transfer_id": transfer.id,
+    if start is not None:
+        query = query.where(Ledger.created_at >= start)
+    if end is not None:
+        query = query.where(Ledger.created_at < end)
+
+    result = await db.stream(query)
+    async for row in result:
+        balance += row.amount
+        if row.transfer_id is None:
+            direction = "deposit"
+        else:
+            direction = "outgoing" if row.amount < 0 else "incoming"
+        yield {
+            "type": "entry",
+            "ledger_id": row.id,
+            "occurred_at": row.created_at,
+            "transfer_id": row.transfer_id,
             "direction": direction,
-            "counterparty_account_number": counterparty_account_number,
-            "amount": amount,
-            "description": ledger.description,
-            "status": status,
-            "occurred_at": ledger.created_at.isoformat() if ledger.created_at else None
+            "counterparty_account_number": row.counterparty_account_number,
+            "amount": row.amount,
+            "description": row.description,
+            "status": row.status or "completed",
+            "balance": balance,
         }
-        transactions.append(transaction_entry)
-    
-    return transactions
\ No newline at end of file
+
+    yield {"type": "closing_balance", "occurred_at": end, "balance": balance}
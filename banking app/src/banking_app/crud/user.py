@@ -1,7 +1,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from ..models import User
-from ..auth.utils import get_password_hash
+from ..auth.utils import password_hasher
 
 
 async def get_user_by_email(db: AsyncSession, email: str):
@@ -15,7 +15,7 @@ async def get_user_by_id(db: AsyncSession, user_id: int):
 
 
 async def create_user(db: AsyncSession, email: str, full_name: str, password: str):
-    hashed_password = get_password_hash(password)
+    hashed_password = await password_hasher.hash(password)
     db_user = User(email=email, full_name=full_name, hashed_password=hashed_password)
     db.add(db_user)
     await db.commit()
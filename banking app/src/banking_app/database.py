@@ -1,23 +1,195 @@
+import time
+
+from fastapi import Request
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from .auth.utils import request_token_payload
 from .config import settings
+from .instrumentation import instrument_engine
+from .metrics import TimedQueuePool, register_pool_gauges
+from .write_times import UserWriteTimes, user_write_times
 
 # Neon requires SSL
 engine = create_async_engine(
     settings.database_url,
     pool_size=settings.db_pool_size,
     max_overflow=settings.db_max_overflow,
-    echo=True,  # Set to False in production
+    echo=settings.db_echo,
+    poolclass=TimedQueuePool,
 )
+instrument_engine(engine)
+register_pool_gauges(engine.pool)
 
 async_session = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
 
 
+class ReadRouter:
+    """Chooses the sessionmaker for read-only requests.
+
+    Replicas are used round-robin. The primary serves reads when no replica
+    is configured or all are marked down. A user whose accounts changed in
+    the last ``read_your_writes_seconds`` (as sender or recipient, through
+    any worker on the host; see ``write_times.py``) is only sent to a
+    replica known to have replayed past that write, so they never see it
+    missing from a lagging replica.
+    """
+
+    def __init__(
+        self,
+        primary,
+        replicas=(),
+        read_your_writes_seconds: float = 5.0,
+        retry_seconds: float = 30.0,
+        write_times: UserWriteTimes | None = None,
+    ):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self.retry_seconds = retry_seconds
+        self.write_times = user_write_times if write_times is None else write_times
+        self._down_until = [0.0] * len(self.replicas)
+        # Commit time (unix) of the last transaction each replica is known
+        # to have replayed.
+        self._replayed_at = [0.0] * len(self.replicas)
+        self._next = 0
+
+    def mark_write(self, user_id: int) -> None:
+        self.write_times.mark(user_id)
+
+    def mark_down(self, index: int) -> None:
+        self._down_until[index] = time.monotonic() + self.retry_seconds
+
+    def note_replayed(self, index: int, replayed_at: float) -> None:
+        self._replayed_at[index] = max(self._replayed_at[index], replayed_at)
+
+    def written_at(self, user_id: int | None) -> float:
+        """When ``user_id`` last wrote, if recently enough to matter, else 0."""
+        if user_id is None:
+            return 0.0
+        written_at = self.write_times.get(user_id)
+        if written_at < time.time() - self.read_your_writes_seconds:
+            return 0.0
+        return written_at
+
+    def next_replica(self) -> int | None:
+        """Index of the next replica in rotation that is not marked down."""
+        now = time.monotonic()
+        for _ in range(len(self.replicas)):
+            index = self._next
+            self._next = (index + 1) % len(self.replicas)
+            if self._down_until[index] <= now:
+                return index
+        return None
+
+    def caught_up(self, index: int, user_id: int | None) -> bool:
+        return self._replayed_at[index] >= self.written_at(user_id)
+
+    async def check_caught_up(self, index: int, connection, user_id: int | None) -> bool:
+        """:meth:`caught_up`, asking the replica itself if we don't know yet."""
+        if self.caught_up(index, user_id):
+            return True
+        if connection.dialect.name != "postgresql":
+            return False
+        in_recovery, replayed_at = (
+            await connection.execute(
+                text(
+                    "SELECT pg_is_in_recovery(), "
+                    "extract(epoch FROM pg_last_xact_replay_timestamp())::float8"
+                )
+            )
+        ).one()
+        if not in_recovery:
+            replayed_at = float("inf")  # not a standby, so nothing to wait for
+        self.note_replayed(index, replayed_at or 0.0)
+        return self.caught_up(index, user_id)
+
+    def sessionmaker_for(self, user_id: int | None = None):
+        """The sessionmaker to read with, from what is known without asking."""
+        for _ in range(len(self.replicas)):
+            index = self.next_replica()
+            if index is None:
+                break
+            if self.caught_up(index, user_id):
+                return self.replicas[index]
+        return self.primary
+
+
+replica_engines = [
+    create_async_engine(
+        url,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        echo=settings.db_echo,
+    )
+    for url in settings.database_replica_urls
+]
+read_router = ReadRouter(
+    async_session,
+    [
+        sessionmaker(replica, class_=AsyncSession, expire_on_commit=False)
+        for replica in replica_engines
+    ],
+    read_your_writes_seconds=settings.replica_read_your_writes_seconds,
+    retry_seconds=settings.replica_retry_seconds,
+)
+
+
+def _watch_replica(replica, index: int) -> None:
+    instrument_engine(replica)
+
+    @event.listens_for(replica.sync_engine, "handle_error")
+    def _take_out_of_rotation(context):
+        # Lost or refused connections send reads to the other replicas (or
+        # the primary) until the retry window passes.
+        if context.is_disconnect or context.connection is None:
+            read_router.mark_down(index)
+
+
+for index, replica in enumerate(replica_engines):
+    _watch_replica(replica, index)
+
+
 async def get_db() -> AsyncSession:
     async with async_session() as session:
         try:
             yield session
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
+
+
+def _request_user_id(request: Request) -> int | None:
+    payload = request_token_payload(request.scope)
+    try:
+        return int(payload["sub"]) if payload else None
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+async def get_read_db(request: Request) -> AsyncSession:
+    """Session for read-only endpoints; see :class:`ReadRouter`."""
+    user_id = _request_user_id(request)
+    index = read_router.next_replica()
+    session = None
+    if index is not None:
+        session = read_router.replicas[index]()
+        try:
+            # Connect up front so an unreachable replica costs this request
+            # a retry on the primary rather than an error; a replica behind
+            # the user's last write sends them to the primary too.
+            connection = await session.connection()
+            if not await read_router.check_caught_up(index, connection, user_id):
+                await session.close()
+                session = None
+        except (DBAPIError, OSError):
+            await session.close()
+            session = None
+    if session is None:
+        session = async_session()
+    try:
+        yield session
+    finally:
+        await session.close()
@@ -0,0 +1,164 @@
+"""Group commit for single transfers (``TRANSFER_GROUP_COMMIT``).
+
+Each ``POST /accounts/transfer`` normally runs its own transaction, so under
+load the database spends a commit, and a WAL flush, on every transfer. With
+group commit on, requests are queued instead: a worker task takes up to
+``TRANSFER_GROUP_COMMIT_MAX_BATCH`` of them, waiting at most
+``TRANSFER_GROUP_COMMIT_MAX_WAIT_MS`` after the first for company, and
+applies them as one best-effort batch (``crud.transfer._apply_transfers``)
+in a single transaction. Every caller gets back its own transfer, replay or
+``TransferError``, exactly as from ``create_transfer``.
+
+The batch locks every account it touches in id order, like any batch, and
+checks funds against running balances, so transfers queued together on a
+hot account cost one row lock between them rather than one each. The price
+is up to the max wait of added latency when traffic is light.
+
+If another worker claims one of the group's idempotency keys first, the
+insert fails before anything is committed and the group's transfers are
+retried one by one with ``create_transfer``, so one racing key cannot fail
+the others. Any other failure (a dropped connection, an error during
+COMMIT) may have come after the group was durable, and a retry would apply
+keyless transfers twice, so those fail every caller in the group instead.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from .config import settings
+from .crud.transfer import IdempotencyKeyUsedError, _apply_transfers, create_transfer
+from .database import async_session
+
+logger = logging.getLogger(__name__)
+
+
+class TransferGroupCommitter:
+    def __init__(self, session_factory, max_batch: int, max_wait_seconds: float):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.max_wait_seconds = max_wait_seconds
+        self._queue: asyncio.Queue | None = None
+        self._deferred: list = []
+        self._group: list = []  # items taken off the queue, not yet settled
+        self._task: asyncio.Task | None = None
+
+    async def submit(self, user_id: int, transfer) -> tuple[dict, bool]:
+        """Queue a ``TransferCreate`` for the next group and wait for it.
+
+        Returns ``(payload, replayed)`` or raises like ``create_transfer``.
+        """
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((user_id, transfer, future))
+        return await future
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _collect(self) -> list:
+        group = self._group = self._deferred[: self.max_batch]
+        self._deferred = self._deferred[self.max_batch :]
+        if not group:
+            group.append(await self._queue.get())
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait_seconds
+        while len(group) < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:  # not the builtin before 3.11
+                    break
+            group.append(item)
+
+        # A retried request can arrive while its first attempt is still
+        # queued; hold it for the next group, where it replays the first.
+        keys = set()
+        ready = []
+        for item in group:
+            key = item[1].idempotency_key
+            if item[2].done():
+                continue  # caller went away before we started
+            if key is not None and key in keys:
+                self._deferred.append(item)
+            else:
+                ready.append(item)
+                keys.add(key)
+        return ready
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                group = await self._collect()
+                if group:
+                    await self._apply(group)
+            except Exception as exc:
+                # Never let the worker die with callers waiting on it.
+                logger.exception(f"Transfer group commit failed: {exc}")
+                for _, _, future in self._group:
+                    if not future.done():
+                        future.set_exception(exc)
+            self._group = []
+
+    async def _apply(self, group: list) -> None:
+        try:
+            async with self.session_factory() as db:
+                results, errors = await _apply_transfers(
+                    db, [user_id for user_id, _, _ in group], [t for _, t, _ in group], atomic=False
+                )
+        except IdempotencyKeyUsedError as exc:
+            # A key conflict is caught at insert, before COMMIT, so none of
+            # the group was applied and each transfer can be retried alone.
+            logger.warning(f"Group of {len(group)} transfers failed, applying one by one: {exc}")
+            await asyncio.gather(*(self._apply_one(*item) for item in group))
+            return
+        except Exception as exc:
+            logger.exception(f"Group of {len(group)} transfers failed: {exc}")
+            for _, _, future in group:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for index, (_, _, future) in enumerate(group):
+            if future.done():
+                continue
+            result = results[index]
+            if result["status"] == "completed":
+                future.set_result((result["transfer"], result["replayed"]))
+            else:
+                future.set_exception(errors[index])
+
+    async def _apply_one(self, user_id: int, transfer, future) -> None:
+        try:
+            async with self.session_factory() as db:
+                outcome = await create_transfer(
+                    db,
+                    user_id=user_id,
+                    from_account_number=transfer.from_account_number,
+                    to_account_number=transfer.to_account_number,
+                    amount=transfer.amount,
+                    description=transfer.description,
+                    idempotency_key=transfer.idempotency_key,
+                )
+        except Exception as exc:
+            if not future.done():
+                future.set_exception(exc)
+        else:
+            if not future.done():
+                future.set_result(outcome)
+
+
+transfer_committer = TransferGroupCommitter(
+    async_session,
+    settings.transfer_group_commit_max_batch,
+    settings.transfer_group_commit_max_wait_ms / 1000,
+)
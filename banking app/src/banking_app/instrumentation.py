@@ -0,0 +1,135 @@
+"""Per-request SQL accounting.
+
+Engine events add each statement's count and wall time to the
+:class:`QueryStats` of the request that issued it, found through a context
+variable that ``sql_timing_middleware`` sets for every HTTP request.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from .config import settings
+
+logger = logging.getLogger("banking_app.sql")
+
+
+class QueryStats:
+    def __init__(self, parent: QueryStats | None = None):
+        self.parent = parent  # enclosing tracker, which sees our queries too
+        self.queries = 0
+        self.duration_ms = 0.0
+        self.statements: Counter = Counter()
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statements issued at least ``threshold`` times: likely N+1 loops."""
+        return [(sql, n) for sql, n in self.statements.most_common() if n >= threshold]
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record(conn, statement)
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; without this its
+    # start time would stay on the stack and be matched with the next one.
+    conn = exception_context.connection
+    if (
+        conn is not None
+        and exception_context.execution_context is not None
+        and conn.info.get("query_started")
+    ):
+        _record(conn, exception_context.statement or "")
+
+
+def _record(conn, statement: str) -> None:
+    started = conn.info["query_started"].pop()
+    stats = _current.get()
+    if stats is None:
+        return
+    duration_ms = (time.perf_counter() - started) * 1000
+    # Statements are parameterised, so a loop repeats the same text.
+    key = " ".join(statement.split())[:200]
+    while stats is not None:
+        stats.queries += 1
+        stats.duration_ms += duration_ms
+        stats.statements[key] += 1
+        stats = stats.parent
+
+
+def instrument_engine(engine) -> None:
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(sync_engine, "handle_error", _handle_error)
+
+
+@contextmanager
+def track_queries():
+    """Collect the statements run inside the block into a fresh QueryStats."""
+    stats = QueryStats(_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(limit: int):
+    """Fail if the block issues more than ``limit`` statements (for tests)."""
+    with track_queries() as stats:
+        yield stats
+    if stats.queries > limit:
+        raise QueryBudgetExceeded(
+            f"{stats.queries} queries issued, budget is {limit}: "
+            f"{stats.statements.most_common(3)}"
+        )
+
+
+async def sql_timing_middleware(request, call_next):
+    with track_queries() as stats:
+        started = time.perf_counter()
+        response = await call_next(request)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+    response.headers.append(
+        "Server-Timing",
+        f'db;dur={stats.duration_ms:.1f};desc="{stats.queries} queries", '
+        f"app;dur={elapsed_ms:.1f}",
+    )
+    record = {
+        "method": request.method,
+        "path": request.url.path,
+        "status": response.status_code,
+        "duration_ms": round(elapsed_ms, 2),
+        "db_queries": stats.queries,
+        "db_ms": round(stats.duration_ms, 2),
+    }
+    if stats.queries > settings.query_budget:
+        record["repeated_statements"] = [
+            {"statement": sql, "count": count}
+            for sql, count in stats.repeated(settings.n_plus_one_threshold)
+        ]
+        logger.warning("query budget exceeded %s", json.dumps(record))
+    else:
+        logger.info("request %s", json.dumps(record))
+    return response
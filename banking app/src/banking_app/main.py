@@ -1,25 +1,75 @@
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
+from fastapi.responses import JSONResponse, Response
+from .config import settings
+from .crud.account import warm_account_directory
+from .crud.checkpoint import run_compactor
+from .database import async_session, engine
+from .group_commit import transfer_committer
+from .instrumentation import sql_timing_middleware
+from .metrics import CONTENT_TYPE, MetricsMiddleware, render
+from .outbox import QueueSink, run_dispatcher, sink_from_url
+from .partitions import run_partition_maintenance
+from .ratelimit import RateLimitMiddleware
+from .responses import ORJSONResponse
 from .routers import auth, account
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Rate limiting
-limiter = Limiter(key_func=get_remote_address)
 
-app = FastAPI(title="Banking App API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    sink = sink_from_url(settings.outbox_sink) if settings.outbox_sink else None
+    if isinstance(sink, QueueSink):
+        # Nothing in the API reads the queue: events would be marked
+        # delivered and pile up in memory.
+        raise ValueError("OUTBOX_SINK=queue: is for tests; use file:// or http(s)://")
 
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-app.add_middleware(SlowAPIMiddleware)
+    try:
+        async with async_session() as db:
+            warmed = await warm_account_directory(db)
+        logger.info(f"Account directory warmed with {warmed} accounts")
+    except Exception as exc:
+        # A cold directory only costs lookups; don't refuse to start over it.
+        logger.warning(f"Account directory warm-up failed: {exc}")
+
+    compactor = None
+    if settings.ledger_checkpoint_interval_seconds > 0:
+        compactor = asyncio.create_task(
+            run_compactor(async_session, settings.ledger_checkpoint_interval_seconds)
+        )
+    partition_maintenance = None
+    if engine.dialect.name == "postgresql" and settings.partition_maintenance_interval_seconds > 0:
+        partition_maintenance = asyncio.create_task(
+            run_partition_maintenance(
+                async_session, settings.partition_maintenance_interval_seconds
+            )
+        )
+    dispatcher = None
+    if sink is not None:
+        dispatcher = asyncio.create_task(run_dispatcher(async_session, sink))
+    yield
+    for task in (compactor, partition_maintenance, dispatcher):
+        if task is not None:
+            task.cancel()
+    await transfer_committer.close()
+
+
+app = FastAPI(
+    title="Banking App API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
+
+# Rate limiting, shared across workers (innermost, so rejections still get
+# CORS headers and show up in the metrics)
+app.add_middleware(RateLimitMiddleware)
 
 # CORS
 app.add_middleware(
@@ -30,6 +80,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Query counts and database time per request (Server-Timing header + logs)
+app.middleware("http")(sql_timing_middleware)
+
+# Outermost, so latency covers every other middleware
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/auth", tags=["authentication"])
 app.include_router(account.router, prefix="/accounts", tags=["accounts"])
@@ -45,4 +101,9 @@ async def global_exception_handler(request: Request, exc: Exception):
 
 @app.get("/")
 async def root():
-    return {"message": "Banking App API"}
\ No newline at end of file
+    return {"message": "Banking App API"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,265 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Recording is a dict lookup plus an increment (histograms add a bisect over
+the bucket bounds), with no locks: samples are only recorded from the event
+loop thread. Gauges are read from callbacks at scrape time.
+"""
+from __future__ import annotations
+
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.routing import Match
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry: list = []  # what /metrics renders
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(
+        self, name: str, help: str, labelnames: tuple[str, ...] = (), registry: list | None = None
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        (_registry if registry is None else registry).append(self)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=(), registry=None):
+        super().__init__(name, help, labelnames, registry)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labelvalues, amount: float = 1) -> None:
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues) -> float:
+        return self._values.get(labelvalues, 0)
+
+    def collect(self) -> list[str]:
+        return [
+            f"{self.name}{_labels(self.labelnames, key)} {value}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        super().__init__(name, help, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+        # labelvalues -> [per-bucket counts (+Inf last), sum]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labelvalues) -> None:
+        series = self._values.get(labelvalues)
+        if series is None:
+            series = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def collect(self) -> list[str]:
+        lines = []
+        names = self.labelnames + ("le",)
+        for key, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_labels(names, key + (bound,))} {cumulative}"
+                )
+            labels = _labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Value read from ``callback`` at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help, callback: Callable[[], float], registry=None):
+        super().__init__(name, help, registry=registry)
+        self.callback = callback
+
+    def collect(self) -> list[str]:
+        return [f"{self.name} {self.callback()}"]
+
+
+class CallbackCounter(Gauge):
+    """Counter read from ``callback`` at scrape time, for counts kept elsewhere."""
+
+    kind = "counter"
+
+
+def render(registry: list | None = None) -> str:
+    lines = []
+    for metric in _registry if registry is None else registry:
+        lines.extend(metric.header())
+        lines.extend(metric.collect())
+    return "\n".join(lines) + "\n"
+
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template and status",
+    ("method", "route", "status"),
+)
+db_pool_wait = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting to check a connection out of the pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+transfers_completed = Counter(
+    "banking_transfers_completed_total", "Transfers applied (replays excluded)"
+)
+transfers_failed = Counter(
+    "banking_transfers_failed_total", "Transfers rejected, by reason", ("reason",)
+)
+rate_limit_rejections = Counter(
+    "rate_limit_rejections_total", "Requests rejected by the rate limiter", ("route",)
+)
+outbox_events_dispatched = Counter(
+    "banking_outbox_events_dispatched_total", "Outbox events delivered to the sink"
+)
+outbox_dispatch_failures = Counter(
+    "banking_outbox_dispatch_failures_total", "Outbox batches the sink failed to accept"
+)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records checkout wait time in ``db_pool_wait``."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_wait.observe(time.perf_counter() - started)
+
+
+def register_pool_gauges(pool) -> None:
+    Gauge("db_pool_size", "Configured pool size", pool.size)
+    Gauge("db_pool_checked_out", "Connections currently checked out", pool.checkedout)
+    Gauge(
+        "db_pool_overflow",
+        "Connections open beyond pool_size (negative while the pool fills)",
+        pool.overflow,
+    )
+    Gauge("db_pool_checked_in", "Idle connections in the pool", pool.checkedin)
+
+
+def register_cache_metrics(name: str, cache) -> None:
+    """Size and hit/miss counts of a ``TTLCache``, as ``<name>_cache_*``."""
+    Gauge(f"{name}_cache_size", f"Entries in the {name} cache", lambda: len(cache))
+    CallbackCounter(f"{name}_cache_hits_total", f"{name} cache hits", lambda: cache.hits)
+    CallbackCounter(f"{name}_cache_misses_total", f"{name} cache misses", lambda: cache.misses)
+
+
+def register_password_hasher_metrics(hasher) -> None:
+    Gauge("password_hash_workers", "Password hashing threads", lambda: hasher.workers)
+    Gauge(
+        "password_hash_in_flight",
+        "Password operations running or waiting for a thread",
+        lambda: hasher.in_flight,
+    )
+    Gauge(
+        "password_hash_queued",
+        "Password operations waiting for a thread",
+        lambda: max(0, hasher.in_flight - hasher.workers),
+    )
+    CallbackCounter(
+        "password_hash_completed_total", "Password operations finished", lambda: hasher.completed
+    )
+    CallbackCounter(
+        "password_hash_rejected_total",
+        "Password operations refused (503) with the hasher full",
+        lambda: hasher.rejected,
+    )
+
+
+def _matched_route(scope):
+    # Newer FastAPI includes routers by reference: scope["route"] is then
+    # the route as declared on its APIRouter, without the include prefix.
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    return context or scope.get("route")
+
+
+def _match(routes, scope):
+    for candidate in routes:
+        # Routers included by reference match as a whole; look inside them.
+        nested = getattr(candidate, "effective_candidates", None)
+        if nested is not None:
+            route = _match(nested(), scope)
+            if route is not None:
+                return route
+            continue
+        match, child_scope = candidate.matches(scope)
+        if match == Match.FULL:
+            return _matched_route(child_scope) or candidate
+    return None
+
+
+def route_template(scope) -> str:
+    """The matched route's path template, e.g. ``/accounts/{account_number}/statement``."""
+    route = _matched_route(scope)
+    if route is None and "app" in scope:
+        # Before routing (e.g. rejected by a middleware): match it ourselves.
+        route = _match(scope["app"].routes, scope)
+    return getattr(route, "path", "unmatched")
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request into ``http_request_duration``."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Label by the route template so account numbers in paths do not
+            # explode the series count. Requests a middleware answered (say a
+            # 429 from the rate limiter) never reached the router, so
+            # route_template matches those itself.
+            http_request_duration.observe(
+                time.perf_counter() - started,
+                scope["method"],
+                route_template(scope),
+                status,
+            )
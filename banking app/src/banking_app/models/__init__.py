@@ -1,5 +1,10 @@
 from .base import Base
 from .user import User
 from .account import Account
+from .balance_bucket import AccountBalanceBucket
 from .ledger import Ledger
-from .transfer import Transfer
\ No newline at end of file
+from .transfer import Transfer, TransferIdempotencyKey
+from .refresh_token import RefreshToken
+from .account_activity import AccountActivity
+from .ledger_checkpoint import LedgerCheckpoint
+from .outbox import OutboxEvent
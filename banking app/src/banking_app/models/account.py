@@ -1,20 +1,27 @@
-from decimal import Decimal
-
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, Numeric, String
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, Numeric, Sequence, String
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from .base import Base
 
+# Each nextval() reserves a block of this many account numbers for a worker.
+ACCOUNT_NUMBER_BLOCK_SIZE = 64
+account_number_seq = Sequence(
+    "account_number_seq", increment=ACCOUNT_NUMBER_BLOCK_SIZE, metadata=Base.metadata
+)
+
 
 class Account(Base):
     __tablename__ = "accounts"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
     account_name = Column(String, nullable=False)
     account_number = Column(String, unique=True, index=True, nullable=False)
-    balance = Column(Numeric(precision=14, scale=2), server_default="0.00")
+    balance = Column(Numeric(precision=14, scale=2), nullable=False, server_default="0.00")
+    # Admin setting: above 0, credits are spread over this many
+    # account_balance_buckets rows (see AccountBalanceBucket).
+    balance_buckets = Column(Integer, nullable=False, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
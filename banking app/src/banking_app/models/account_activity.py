@@ -0,0 +1,46 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, Numeric, String
+
+from .base import Base
+
+
+class AccountActivity(Base):
+    """Read model for transaction history: one row per transfer ledger entry.
+
+    Written in the same transaction as the ledger rows it mirrors, with the
+    direction and counterparty already resolved, so history pages read this
+    table alone instead of joining ledger, transfers and accounts.
+    """
+
+    __tablename__ = "account_activity"
+    __table_args__ = (
+        # (account_id, occurred_at, ledger_id) matches the ledger keyset
+        # cursor; INCLUDE makes history pages index-only scans on PostgreSQL.
+        Index(
+            "ix_account_activity_account_occurred_ledger",
+            "account_id",
+            "occurred_at",
+            "ledger_id",
+            postgresql_include=[
+                "transfer_id",
+                "direction",
+                "counterparty_account_number",
+                "amount",
+                "description",
+                "status",
+            ],
+        ),
+    )
+
+    # ledger_id and transfer_id carry no foreign keys: both targets are
+    # partitioned, and activity outlives archived ledger partitions.
+    ledger_id = Column(Integer, primary_key=True)
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+    transfer_id = Column(Integer, nullable=False)
+    direction = Column(String(8), nullable=False)  # "incoming" or "outgoing"
+    counterparty_account_number = Column(String, nullable=False)
+    # abs(ledger.amount), so the same precision as ledger and transfers (not
+    # the wider account balances).
+    amount = Column(Numeric(precision=10, scale=2), nullable=False)
+    description = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    occurred_at = Column(DateTime(timezone=True), nullable=False)  # ledger.created_at
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, ForeignKey, Integer, Numeric
+
+from .base import Base
+
+
+class AccountBalanceBucket(Base):
+    """One slice of a sharded account's balance.
+
+    An account with ``balance_buckets = N`` has buckets ``0 .. N-1``, and its
+    balance is ``accounts.balance`` plus all of them. Credits land in a
+    random bucket instead of the account row, so concurrent credits to a
+    hot account lock different rows; debits lock the account row and take
+    from the buckets only when the row alone does not cover them.
+    """
+
+    __tablename__ = "account_balance_buckets"
+
+    account_id = Column(Integer, ForeignKey("accounts.id"), primary_key=True)
+    bucket = Column(Integer, primary_key=True)
+    balance = Column(Numeric(precision=14, scale=2), nullable=False, server_default="0.00")
@@ -1,14 +1,34 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Numeric
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Numeric, Index
 from sqlalchemy.sql import func
 from .base import Base
 
 
 class Ledger(Base):
+    """One signed balance movement on an account.
+
+    On PostgreSQL the table is range-partitioned by ``created_at`` month (see
+    ``banking_app.partitions``) with primary key ``(id, created_at)``; ``id``
+    stays unique because it comes from a single sequence. The ORM maps ``id``
+    alone so SQLite keeps its integer autoincrement.
+    """
+
     __tablename__ = "ledger"
+    __table_args__ = (
+        # Serves per-account history pages ordered by (created_at, id).
+        Index("ix_ledger_account_created_id", "account_id", "created_at", "id"),
+        # Serves "entries after checkpoint N" sums, index-only on PostgreSQL.
+        Index(
+            "ix_ledger_account_id_id",
+            "account_id",
+            "id",
+            postgresql_include=["amount"],
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
     amount = Column(Numeric(precision=10, scale=2), nullable=False)  # Positive for credit, negative for debit
     description = Column(String, nullable=False)
-    transfer_id = Column(Integer, ForeignKey("transfers.id"), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    # No foreign key: transfers is partitioned and keyed by (id, created_at).
+    transfer_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, Numeric
+from sqlalchemy.sql import func
+
+from .base import Base
+
+
+class LedgerCheckpoint(Base):
+    """An account's ledger balance up to and including ``ledger_id``.
+
+    Any balance is the latest usable checkpoint plus the ledger rows after
+    it, so balance queries never have to sum an account's whole history.
+    ``as_of`` is the newest ``created_at`` among the rows it covers, which
+    makes the checkpoint usable for point-in-time balances after that.
+    """
+
+    __tablename__ = "ledger_checkpoints"
+    __table_args__ = (
+        Index(
+            "ix_ledger_checkpoints_account_ledger",
+            "account_id",
+            "ledger_id",
+            unique=True,
+        ),
+        Index("ix_ledger_checkpoints_account_as_of", "account_id", "as_of"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+    ledger_id = Column(Integer, nullable=False)
+    as_of = Column(DateTime(timezone=True), nullable=False)
+    balance = Column(Numeric(precision=14, scale=2), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
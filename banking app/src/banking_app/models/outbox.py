@@ -0,0 +1,36 @@
+from sqlalchemy import JSON, Column, DateTime, Index, Integer, String, Text, text
+from sqlalchemy.sql import func
+
+from .base import Base
+
+
+class OutboxEvent(Base):
+    """An event for downstream systems, written in the transaction it reports.
+
+    ``banking_app.outbox`` delivers pending rows (``dispatched_at`` unset and
+    ``available_at`` reached) in ``available_at`` order, at least once;
+    failed deliveries move ``available_at`` back with exponential backoff.
+    """
+
+    __tablename__ = "outbox"
+    __table_args__ = (
+        # Only undelivered rows are indexed, so the dispatcher's scan stays
+        # small however much history is kept.
+        Index(
+            "ix_outbox_pending",
+            "available_at",
+            "id",
+            postgresql_where=text("dispatched_at IS NULL"),
+            sqlite_where=text("dispatched_at IS NULL"),
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+    event_type = Column(String(64), nullable=False)  # e.g. "transfer.completed"
+    aggregate_id = Column(Integer, nullable=False)  # transfers.id for transfer events
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    available_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    attempts = Column(Integer, nullable=False, server_default="0")
+    last_error = Column(Text, nullable=True)
+    dispatched_at = Column(DateTime(timezone=True), nullable=True)
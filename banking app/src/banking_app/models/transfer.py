@@ -4,14 +4,37 @@ from .base import Base
 
 
 class Transfer(Base):
+    """A movement of money between two accounts.
+
+    Partitioned by ``created_at`` month on PostgreSQL like ``Ledger``. A unique
+    index on a partitioned table must include the partition key, so uniqueness
+    of client idempotency keys lives in ``TransferIdempotencyKey`` instead.
+    """
+
     __tablename__ = "transfers"
 
     id = Column(Integer, primary_key=True, index=True)
-    idempotency_key = Column(String, unique=True, index=True, nullable=False)
+    idempotency_key = Column(String, nullable=False)
     from_account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
     to_account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
     amount = Column(Numeric(precision=10, scale=2), nullable=False)
     description = Column(String, nullable=False)
     status = Column(String, default="pending")  # pending, completed, failed
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    completed_at = Column(DateTime(timezone=True), nullable=True)
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class TransferIdempotencyKey(Base):
+    """Client-supplied idempotency key -> the transfer it created.
+
+    Written in the same transaction as the transfer; the primary key makes a
+    concurrent duplicate fail with IntegrityError. ``transfer_created_at``
+    lets replays look the transfer up in the right partition. Rows outlive
+    archived partitions, so a key is never accepted twice.
+    """
+
+    __tablename__ = "transfer_idempotency_keys"
+
+    idempotency_key = Column(String, primary_key=True)
+    transfer_id = Column(Integer, nullable=False)
+    transfer_created_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,229 @@
+"""Deliver outbox events to a downstream sink.
+
+Transfers write an ``OutboxEvent`` row in the same transaction (on
+PostgreSQL, in the same statement) as the transfer itself, so an event
+exists exactly when its transfer committed and the request pays nothing
+more than one more row. They only do so when something will deliver the
+events: with ``OUTBOX_SINK`` set, or ``OUTBOX_ENABLED=true`` for a
+standalone dispatcher. :func:`run_dispatcher` drains the table in the
+background: it claims a batch of pending rows in one short transaction,
+picking them with ``FOR UPDATE SKIP LOCKED`` (so several workers can run one
+each) and moving their ``available_at`` ``OUTBOX_CLAIM_SECONDS`` ahead as a
+lease, then hands the batch to the sink with no transaction or connection
+held, and marks it delivered afterwards.
+
+Delivery is at least once: a crash between the sink accepting a batch and
+marking it delivered, or a send outlasting the lease, sends it again, so
+consumers should dedupe on the event ``id``. A batch the sink rejects stays
+pending, with ``available_at`` pushed back exponentially up to
+``OUTBOX_MAX_BACKOFF_SECONDS``.
+
+Sinks are chosen by URL (``OUTBOX_SINK``): ``file:///path`` appends JSON
+lines, ``http(s)://...`` POSTs each batch as a JSON array, and ``queue:``
+puts events on an in-process ``asyncio.Queue`` standing in for a broker in
+tests (the API refuses it, having nothing to consume the queue).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Protocol
+from urllib.parse import urlsplit
+
+import httpx
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import settings
+from .metrics import outbox_dispatch_failures, outbox_events_dispatched
+from .models import OutboxEvent
+from .responses import dumps
+
+logger = logging.getLogger(__name__)
+
+BASE_BACKOFF_SECONDS = 1.0
+PURGE_INTERVAL_SECONDS = 60 * 60
+
+
+class Sink(Protocol):
+    async def send(self, events: list[dict]) -> None:
+        """Deliver ``events`` or raise; a raise leaves the whole batch pending."""
+
+
+class FileSink:
+    """Appends one JSON document per line to ``path`` and fsyncs each batch."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _write(self, data: bytes) -> None:
+        with open(self.path, "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def send(self, events: list[dict]) -> None:
+        await asyncio.to_thread(self._write, b"".join(dumps(e) + b"\n" for e in events))
+
+
+class HTTPSink:
+    """POSTs each batch as a JSON array; any non-2xx response is a failure."""
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        self.url = url
+        self.client = httpx.AsyncClient(timeout=timeout)
+
+    async def send(self, events: list[dict]) -> None:
+        response = await self.client.post(
+            self.url, content=dumps(events), headers={"Content-Type": "application/json"}
+        )
+        response.raise_for_status()
+
+
+class QueueSink:
+    """Puts events on an ``asyncio.Queue``; a full queue fails the batch."""
+
+    def __init__(self, maxsize: int = 0):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+    async def send(self, events: list[dict]) -> None:
+        if self.queue.maxsize and self.queue.qsize() + len(events) > self.queue.maxsize:
+            raise asyncio.QueueFull(f"queue has room for {self.queue.maxsize - self.queue.qsize()}")
+        for event in events:
+            self.queue.put_nowait(event)
+
+
+def sink_from_url(url: str) -> Sink:
+    scheme = urlsplit(url).scheme
+    if scheme == "file":
+        return FileSink(urlsplit(url).path)
+    if scheme in ("http", "https"):
+        return HTTPSink(url)
+    if scheme == "queue":
+        return QueueSink()
+    raise ValueError(f"Unsupported outbox sink {url!r}, expected file://, http(s):// or queue:")
+
+
+def event_document(row) -> dict:
+    """What a sink receives for one outbox row."""
+    return {
+        "id": row.id,
+        "type": row.event_type,
+        "aggregate_id": row.aggregate_id,
+        "occurred_at": row.created_at.isoformat(),
+        "data": row.payload,
+    }
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Delay before retry number ``attempts``, with up to 10% jitter."""
+    delay = min(settings.outbox_max_backoff_seconds, BASE_BACKOFF_SECONDS * 2 ** (attempts - 1))
+    return delay * (1 + random.random() / 10)
+
+
+async def dispatch_batch(db: AsyncSession, sink: Sink, batch_size: int | None = None) -> int:
+    """Send up to ``batch_size`` pending events; returns how many were delivered."""
+    now = datetime.now(timezone.utc)
+    pending = (
+        select(OutboxEvent.id)
+        .where(OutboxEvent.dispatched_at.is_(None), OutboxEvent.available_at <= now)
+        .order_by(OutboxEvent.available_at, OutboxEvent.id)
+        .limit(batch_size or settings.outbox_batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    rows = (
+        await db.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_(pending.scalar_subquery()))
+            .values(available_at=now + timedelta(seconds=settings.outbox_claim_seconds))
+            .returning(
+                OutboxEvent.id,
+                OutboxEvent.event_type,
+                OutboxEvent.aggregate_id,
+                OutboxEvent.payload,
+                OutboxEvent.created_at,
+                OutboxEvent.attempts,
+            )
+            .execution_options(synchronize_session=False)
+        )
+    ).all()
+    # Commit the claim before sending, so a slow sink holds no row locks or
+    # pool connection; the lease keeps other dispatchers off the rows.
+    await db.commit()
+    if not rows:
+        return 0
+
+    rows.sort(key=lambda row: row.id)
+    ids = [row.id for row in rows]
+    try:
+        await sink.send([event_document(row) for row in rows])
+    except Exception as exc:
+        outbox_dispatch_failures.inc()
+        attempts = max(row.attempts for row in rows) + 1
+        logger.warning(f"Outbox delivery of {len(rows)} event(s) failed (attempt {attempts}): {exc}")
+        await db.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_(ids))
+            .values(
+                attempts=OutboxEvent.attempts + 1,
+                available_at=datetime.now(timezone.utc)
+                + timedelta(seconds=backoff_seconds(attempts)),
+                last_error=str(exc)[:1000] or type(exc).__name__,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return 0
+
+    await db.execute(
+        update(OutboxEvent)
+        .where(OutboxEvent.id.in_(ids))
+        .values(dispatched_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    outbox_events_dispatched.inc(amount=len(rows))
+    return len(rows)
+
+
+async def purge_dispatched(db: AsyncSession, older_than_seconds: float) -> int:
+    """Delete delivered events created more than ``older_than_seconds`` ago."""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=older_than_seconds)
+    result = await db.execute(
+        delete(OutboxEvent).where(
+            OutboxEvent.dispatched_at.is_not(None), OutboxEvent.created_at < cutoff
+        )
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def run_dispatcher(session_factory, sink: Sink) -> None:
+    """Background loop delivering outbox events to ``sink``.
+
+    Full batches are followed straight away by the next one, so a backlog
+    drains at the sink's pace; otherwise the loop polls every
+    ``OUTBOX_POLL_INTERVAL_SECONDS``.
+    """
+    purged_at = 0.0
+    while True:
+        delivered = 0
+        try:
+            async with session_factory() as db:
+                delivered = await dispatch_batch(db, sink)
+                if (
+                    settings.outbox_retention_seconds > 0
+                    and time.monotonic() - purged_at > PURGE_INTERVAL_SECONDS
+                ):
+                    purged_at = time.monotonic()
+                    purged = await purge_dispatched(db, settings.outbox_retention_seconds)
+                    if purged:
+                        logger.info(f"Purged {purged} delivered outbox events")
+        except Exception as exc:
+            logger.warning(f"Outbox dispatch failed: {exc}")
+        if delivered < settings.outbox_batch_size:
+            await asyncio.sleep(settings.outbox_poll_interval_seconds)
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import base64
+from datetime import datetime
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Pack a ``(created_at, id)`` keyset position into an opaque token."""
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Inverse of :func:`encode_cursor`; raises ``ValueError`` on bad input."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = (
+            base64.urlsafe_b64decode(padded.encode()).decode().rsplit("|", 1)
+        )
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid pagination cursor") from exc
@@ -0,0 +1,188 @@
+"""Monthly range partitions for ``ledger`` and ``transfers`` (PostgreSQL only).
+
+Both tables are partitioned by ``created_at``: one child table per UTC month,
+named ``<table>_yYYYYmMM``, plus ``<table>_default`` for rows no monthly
+partition covers. :func:`ensure_partitions` keeps months ahead created (the
+API runs it at startup and daily); ``commands.partitions`` also archives old
+months to compressed files and drops them.
+"""
+from __future__ import annotations
+
+import asyncio
+import csv
+import gzip
+import logging
+import os
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = ("ledger", "transfers")
+
+# pg_advisory_xact_lock key serializing ensure_partitions across every API
+# worker and the partitions command.
+MAINTENANCE_LOCK_KEY = 0x62616E6B  # "bank"
+
+
+def month_start(value: datetime) -> datetime:
+    """First instant of ``value``'s month, in UTC."""
+    value = value.astimezone(timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+def partition_month(table: str, name: str) -> datetime | None:
+    """Inverse of :func:`partition_name`; ``None`` for other partitions."""
+    suffix = name[len(table) + 1 :]
+    if not name.startswith(f"{table}_y") or len(suffix) != 8 or suffix[5] != "m":
+        return None
+    try:
+        return datetime(int(suffix[1:5]), int(suffix[6:8]), 1, tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+async def list_partitions(db: AsyncSession, table: str) -> dict[datetime, str]:
+    """Monthly partitions of ``table`` as ``{month start: partition name}``."""
+    result = await db.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits"
+            " JOIN pg_class parent ON parent.oid = pg_inherits.inhparent"
+            " JOIN pg_class child ON child.oid = pg_inherits.inhrelid"
+            " WHERE parent.relname = :table"
+        ),
+        {"table": table},
+    )
+    partitions = {}
+    for (name,) in result.all():
+        month = partition_month(table, name)
+        if month is not None:
+            partitions[month] = name
+    return dict(sorted(partitions.items()))
+
+
+async def create_partition(db: AsyncSession, table: str, month: datetime) -> str:
+    """Create and attach ``table``'s partition for ``month``.
+
+    Rows for that month already sitting in the default partition are moved
+    into the new table first; attaching would fail otherwise.
+    """
+    name = partition_name(table, month)
+    bounds = {"low": month, "high": add_months(month, 1)}
+    await db.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)"))
+    await db.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {table}_default"
+            " WHERE created_at >= :low AND created_at < :high RETURNING *)"
+            f" INSERT INTO {name} SELECT * FROM moved"
+        ),
+        bounds,
+    )
+    await db.execute(
+        text(
+            f"ALTER TABLE {table} ATTACH PARTITION {name}"
+            f" FOR VALUES FROM ('{bounds['low'].isoformat()}')"
+            f" TO ('{bounds['high'].isoformat()}')"
+        )
+    )
+    return name
+
+
+async def ensure_partitions(
+    db: AsyncSession, months_ahead: int | None = None, now: datetime | None = None
+) -> list[str]:
+    """Create any missing partitions from this month to ``months_ahead`` on.
+
+    Holds an advisory lock until the commit, so when every worker runs this
+    at once one creates the partitions and the rest wait, then find them
+    there. Returns the names of the partitions created. Commits.
+    """
+    months_ahead = settings.partition_months_ahead if months_ahead is None else months_ahead
+    current = month_start(now or datetime.now(timezone.utc))
+    await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY})
+    created = []
+    for table in PARTITIONED_TABLES:
+        existing = await list_partitions(db, table)
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if month not in existing:
+                created.append(await create_partition(db, table, month))
+    await db.commit()
+    return created
+
+
+async def export_partition(db: AsyncSession, name: str, path: str) -> int:
+    """Stream partition ``name`` into a gzip-compressed CSV at ``path``.
+
+    Writes to ``path + ".tmp"`` and renames once the row count matches the
+    table, so a half-written file never looks like a finished archive.
+    Returns the number of rows written.
+    """
+    partial = f"{path}.tmp"
+    written = 0
+    result = await db.stream(text(f"SELECT * FROM {name} ORDER BY id"))
+    with gzip.open(partial, "wt", newline="") as out:
+        writer = csv.writer(out)
+        writer.writerow(result.keys())
+        async for partition in result.partitions(1000):
+            writer.writerows(partition)
+            written += len(partition)
+    expected = (await db.execute(text(f"SELECT count(*) FROM {name}"))).scalar()
+    if written != expected:
+        os.remove(partial)
+        raise RuntimeError(f"{name}: exported {written} rows, table has {expected}")
+    os.replace(partial, path)
+    return written
+
+
+async def uncheckpointed_entries(db: AsyncSession, name: str) -> int:
+    """Rows of ledger partition ``name`` no checkpoint covers."""
+    result = await db.execute(
+        text(
+            f"SELECT count(*) FROM {name} entry WHERE NOT EXISTS ("
+            " SELECT 1 FROM ledger_checkpoints checkpoint"
+            " WHERE checkpoint.account_id = entry.account_id"
+            " AND checkpoint.ledger_id >= entry.id)"
+        )
+    )
+    return result.scalar()
+
+
+async def drop_partitions(db: AsyncSession, month: datetime) -> None:
+    """Detach and drop ``month``'s partitions. Commits.
+
+    The month's idempotency keys stay: a late retry with one of them finds
+    the key but not the transfer and is refused with
+    ``IdempotencyKeyUsedError`` rather than applied a second time.
+    """
+    for table in PARTITIONED_TABLES:
+        name = partition_name(table, month)
+        await db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        await db.execute(text(f"DROP TABLE {name}"))
+    await db.commit()
+
+
+async def run_partition_maintenance(session_factory, interval_seconds: float) -> None:
+    """Background loop calling :func:`ensure_partitions` every ``interval_seconds``."""
+    while True:
+        try:
+            async with session_factory() as db:
+                created = await ensure_partitions(db)
+            if created:
+                logger.info(f"Created partitions {', '.join(created)}")
+        except Exception as exc:
+            logger.warning(f"Partition maintenance failed: {exc}")
+        await asyncio.sleep(interval_seconds)
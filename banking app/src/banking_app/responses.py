@@ -0,0 +1,37 @@
+"""orjson-based JSON responses.
+
+:class:`ORJSONResponse` is the app's default response class, so routes
+without a ``response_model`` are rendered by orjson instead of
+``json.dumps``. Routes with one keep FastAPI's pydantic serialization.
+
+Endpoints whose payloads the crud layer shapes itself (transfer payloads,
+transaction rows, summaries) return an ``ORJSONResponse`` directly, which
+skips FastAPI validating those dicts against the ``response_model`` again;
+the model stays on the route for the OpenAPI schema. On a 100-row
+transaction page that is several times faster than validating and
+dumping (``benchmarks/serialization.py``).
+
+Decimals are written as exact strings, as pydantic does, never floats.
+"""
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
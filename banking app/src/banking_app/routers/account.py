@@ -1,18 +1,31 @@
 from __future__ import annotations
 
-from typing import List
+import csv
+import io
+import json
+from datetime import datetime
+from typing import List, Literal, Optional, Union
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..auth.dependencies import get_current_user
+from ..config import settings
 from ..crud import account as account_crud, transfer as transfer_crud
-from ..database import get_db
+from ..database import get_db, get_read_db, read_router
+from ..group_commit import transfer_committer
+from ..metrics import transfers_failed
+from ..responses import ORJSONResponse
 from ..schemas.account import (
     Account,
     AccountCreate,
+    AccountSummary,
     TransactionEntry,
+    TransactionPage,
     Transfer,
+    TransferBatchCreate,
+    TransferBatchResult,
     TransferCreate,
 )
 from ..schemas.auth import User
@@ -37,83 +50,204 @@ async def create_account(
 
 @router.get("/", response_model=List[Account])
 async def get_accounts(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     return await account_crud.get_accounts_by_user(db, current_user.id)
 
 
+@router.get("/summary", response_model=AccountSummary)
+async def get_summary(
+    days: int = Query(30, ge=1, le=366, description="Window of daily flows, in UTC days"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    # Payloads shaped by the crud layer skip response_model validation;
+    # see responses.py.
+    return ORJSONResponse(await account_crud.get_account_summary(db, current_user.id, days))
+
+
 @router.post("/transfer", response_model=Transfer, status_code=201)
 async def transfer_money(
     transfer: TransferCreate,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    from_account = await account_crud.get_account_by_number(
-        db, transfer.from_account_number
-    )
-    if not from_account or from_account.user_id != current_user.id:
+    # Someone else's account already in the directory is turned away before
+    # any row locks are taken. Anything else goes to the transfer, whose
+    # locked read decides: a number this worker has not seen may belong to
+    # an account just created through another one.
+    source = account_crud.cached_account(transfer.from_account_number)
+    if source is not None and source.user_id != current_user.id:
+        transfers_failed.inc(transfer_crud.AccountNotFoundError.reason)
         raise HTTPException(
             status_code=404, detail="Source account not found for current user"
         )
 
-    to_account = await account_crud.get_account_by_number(
-        db, transfer.to_account_number
-    )
-    if not to_account:
-        raise HTTPException(status_code=404, detail="Destination account not found")
+    try:
+        if settings.transfer_group_commit:
+            # The group runs on its own connection; hand ours back to the
+            # pool rather than hold it while we wait.
+            await db.close()
+            payload, replayed = await transfer_committer.submit(current_user.id, transfer)
+        else:
+            payload, replayed = await transfer_crud.create_transfer(
+                db=db,
+                user_id=current_user.id,
+                from_account_number=transfer.from_account_number,
+                to_account_number=transfer.to_account_number,
+                amount=transfer.amount,
+                description=transfer.description,
+                idempotency_key=transfer.idempotency_key,
+            )
+    except transfer_crud.AccountNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except transfer_crud.IdempotencyConflictError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-    if from_account.id == to_account.id:
-        raise HTTPException(
-            status_code=400, detail="Cannot transfer to the same account"
-        )
+    return ORJSONResponse(
+        payload,
+        status_code=201,
+        headers={"Idempotent-Replayed": "true"} if replayed else None,
+    )
 
-    balance = await account_crud.get_account_balance(db, from_account.id)
-    if balance < transfer.amount:
-        raise HTTPException(status_code=400, detail="Insufficient funds")
 
+@router.post("/transfers/batch", response_model=TransferBatchResult)
+async def transfer_money_batch(
+    batch: TransferBatchCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
     try:
-        db_transfer = await transfer_crud.create_transfer(
+        results = await transfer_crud.create_transfers_batch(
             db=db,
-            from_account=from_account,
-            to_account=to_account,
-            amount=transfer.amount,
-            description=transfer.description,
-            idempotency_key=transfer.idempotency_key,
+            user_id=current_user.id,
+            transfers=batch.transfers,
+            atomic=batch.mode == "all_or_nothing",
         )
     except ValueError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-
-    return {
-        "id": db_transfer.id,
-        "from_account_number": from_account.account_number,
-        "to_account_number": to_account.account_number,
-        "amount": db_transfer.amount,
-        "description": db_transfer.description,
-        "status": db_transfer.status,
-        "created_at": db_transfer.created_at.isoformat()
-        if db_transfer.created_at
-        else None,
-        "completed_at": (
-            db_transfer.completed_at.isoformat()
-            if db_transfer.completed_at is not None
-            else None
-        ),
-    }
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+
+    return ORJSONResponse(
+        {
+            "mode": batch.mode,
+            "completed": sum(1 for result in results if result["status"] == "completed"),
+            "failed": sum(1 for result in results if result["status"] == "failed"),
+            "results": results,
+        }
+    )
 
 
-@router.get("/transactions", response_model=List[TransactionEntry])
+@router.get(
+    "/transactions",
+    response_model=Union[TransactionPage, List[TransactionEntry]],
+)
 async def get_transactions(
     account_number: str = Query(..., description="Account number to filter by"),
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
-    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = Query(
+        None,
+        description=(
+            "Keyset pagination cursor. Send an empty value for the first page, "
+            "then each response's next_cursor. When present the response is a "
+            "page object and offset is ignored; without it the legacy "
+            "offset-paged list is returned."
+        ),
+    ),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
-    account = await account_crud.get_account_by_number(db, account_number)
+    account = await account_crud.lookup_account(db, account_number)
     if not account or account.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Account not found")
 
-    return await transfer_crud.get_account_transactions(
-        db=db, account=account, limit=limit, offset=offset
-    )
\ No newline at end of file
+    if cursor is not None:
+        try:
+            items, next_cursor = await transfer_crud.get_account_transactions_page(
+                db=db, account=account, limit=limit, cursor=cursor
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        return ORJSONResponse({"items": items, "next_cursor": next_cursor})
+
+    return ORJSONResponse(
+        await transfer_crud.get_account_transactions(
+            db=db, account=account, limit=limit, offset=offset
+        )
+    )
+
+
+STATEMENT_FIELDS = [
+    "type",
+    "occurred_at",
+    "ledger_id",
+    "transfer_id",
+    "direction",
+    "counterparty_account_number",
+    "amount",
+    "description",
+    "status",
+    "balance",
+]
+
+
+def _statement_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if value is None or isinstance(value, (int, str)):
+        return value
+    return str(value)  # Decimal: keep the exact amount
+
+
+async def _statement_lines(session_factory, account_id, start, end, format):
+    # The request's session is closed before the body is sent, so the
+    # stream owns a session for as long as it runs.
+    async with session_factory() as db:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=STATEMENT_FIELDS)
+        if format == "csv":
+            writer.writeheader()
+        async for record in transfer_crud.stream_account_statement(
+            db, account_id, start=start, end=end
+        ):
+            record = {key: _statement_value(value) for key, value in record.items()}
+            if format == "csv":
+                writer.writerow(record)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            else:
+                yield json.dumps(record) + "\n"
+
+
+@router.get("/{account_number}/statement")
+async def get_statement(
+    account_number: str,
+    format: Literal["csv", "ndjson"] = Query("csv"),
+    start: Optional[datetime] = Query(None, description="Inclusive lower bound"),
+    end: Optional[datetime] = Query(None, description="Exclusive upper bound"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    account = await account_crud.lookup_account(db, account_number)
+    if not account or account.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Account not found")
+    if start is not None and end is not None and start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"statement-{account_number}.{format}"
+    return StreamingResponse(
+        _statement_lines(
+            read_router.sessionmaker_for(current_user.id),
+            account.id,
+            start,
+            end,
+            format,
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
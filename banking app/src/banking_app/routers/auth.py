@@ -1,21 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from ..database import get_db
-from ..crud import user as user_crud
-from ..schemas.auth import UserCreate, User, Token
-from ..auth.utils import verify_password, create_access_token
+from ..crud import refresh_token as refresh_token_crud, user as user_crud
+from ..schemas.auth import UserCreate, User, Token, TokenRefresh
+from ..auth.utils import PasswordHasherBusy, create_access_token, password_hasher
 from ..auth.dependencies import get_current_user
 
 router = APIRouter()
 
 
+def _hasher_busy(exc: PasswordHasherBusy) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(exc),
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/signup", response_model=User)
 async def signup(user: UserCreate, db: AsyncSession = Depends(get_db)):
     db_user = await user_crud.get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    return await user_crud.create_user(db, user.email, user.full_name, user.password)
+    try:
+        return await user_crud.create_user(db, user.email, user.full_name, user.password)
+    except PasswordHasherBusy as exc:
+        raise _hasher_busy(exc) from exc
 
 
 @router.post("/login", response_model=Token)
@@ -23,10 +34,48 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSessi
     user = await user_crud.get_user_by_email(db, email=form_data.username)
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
-    if not verify_password(form_data.password, user.hashed_password):
+    try:
+        password_ok = await password_hasher.verify(form_data.password, user.hashed_password)
+    except PasswordHasherBusy as exc:
+        raise _hasher_busy(exc) from exc
+    if not password_ok:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     access_token = create_access_token(data={"sub": str(user.id)})
-    return {"access_token": access_token, "token_type": "bearer"}
+    refresh_token = await refresh_token_crud.issue_refresh_token(db, user.id)
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+    }
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh(body: TokenRefresh, db: AsyncSession = Depends(get_db)):
+    try:
+        user_id, refresh_token = await refresh_token_crud.rotate_refresh_token(
+            db, body.refresh_token
+        )
+    except refresh_token_crud.InvalidRefreshToken as exc:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(exc),
+            headers={"WWW-Authenticate": "Bearer"},
+        ) from exc
+    access_token = create_access_token(data={"sub": str(user_id)})
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+    }
+
+
+@router.post("/logout", status_code=204)
+async def logout(body: TokenRefresh, db: AsyncSession = Depends(get_db)):
+    try:
+        await refresh_token_crud.revoke_refresh_token(db, body.refresh_token)
+    except refresh_token_crud.InvalidRefreshToken as exc:
+        raise HTTPException(status_code=401, detail=str(exc)) from exc
+    return Response(status_code=204)
 
 
 @router.get("/me", response_model=User)
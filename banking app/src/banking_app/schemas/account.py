@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from decimal import Decimal
-from typing import Optional
+from typing import List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -53,6 +53,32 @@ class Transfer(BaseModel):
         from_attributes = True
 
 
+class TransferBatchCreate(BaseModel):
+    transfers: List[TransferCreate] = Field(..., min_length=1, max_length=1000)
+    mode: Literal["all_or_nothing", "best_effort"] = Field(
+        default="all_or_nothing",
+        description=(
+            "all_or_nothing applies every transfer or none; best_effort "
+            "applies the valid ones and reports the rest"
+        ),
+    )
+
+
+class TransferBatchItemResult(BaseModel):
+    index: int
+    status: Literal["completed", "failed", "skipped"]
+    transfer: Optional[Transfer] = None
+    error: Optional[str] = None
+    replayed: bool = False
+
+
+class TransferBatchResult(BaseModel):
+    mode: str
+    completed: int
+    failed: int
+    results: List[TransferBatchItemResult]
+
+
 class TransactionEntry(BaseModel):
     transfer_id: int
     direction: str
@@ -63,4 +89,32 @@ class TransactionEntry(BaseModel):
     occurred_at: str
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class TransactionPage(BaseModel):
+    items: List[TransactionEntry]
+    next_cursor: Optional[str] = Field(
+        default=None, description="Pass as `cursor` to fetch the next page"
+    )
+
+
+class AccountBalance(BaseModel):
+    account_number: str
+    account_name: str
+    balance: Decimal
+
+
+class DailyFlow(BaseModel):
+    date: str
+    inflow: Decimal
+    outflow: Decimal
+
+
+class AccountSummary(BaseModel):
+    since: str = Field(..., description="First UTC day covered by `days`")
+    total_balance: Decimal
+    accounts: List[AccountBalance]
+    days: List[DailyFlow] = Field(
+        ..., description="Days with money moving in or out, oldest first"
+    )
@@ -0,0 +1,52 @@
+"""Fixed-size slot files memory-mapped by every worker process on a host.
+
+The rate limiter's token buckets (``ratelimit.py``) and the per-user write
+times (``write_times.py``) are both arrays of fixed-size slots in a file on
+``/dev/shm`` where available. Every worker maps the same file and locks just
+the bytes of the slot it reads or writes with ``fcntl``, so workers only
+contend on keys that share a slot.
+"""
+from __future__ import annotations
+
+import fcntl
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+def default_path(name: str) -> str:
+    """``name`` in ``/dev/shm``, or the temp directory where there is none."""
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, name)
+
+
+def map_slot_file(path: str, size: int) -> tuple[int, mmap.mmap]:
+    """Open ``path`` (creating it), grow it to ``size`` bytes and map it.
+
+    Returns ``(fd, map)``. Raises ``OSError`` if the file cannot be used.
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        # The first worker sizes the file; the lock keeps the others from
+        # truncating it underneath a worker already using it.
+        fcntl.lockf(fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+        finally:
+            fcntl.lockf(fd, fcntl.LOCK_UN)
+        return fd, mmap.mmap(fd, size)
+    except OSError:
+        os.close(fd)
+        raise
+
+
+@contextmanager
+def locked_slot(fd: int, offset: int, length: int, exclusive: bool = True):
+    """Hold an ``fcntl`` lock on ``length`` bytes at ``offset`` of ``fd``."""
+    fcntl.lockf(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH, length, offset)
+    try:
+        yield
+    finally:
+        fcntl.lockf(fd, fcntl.LOCK_UN, length, offset)
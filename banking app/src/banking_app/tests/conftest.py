@@ -1,7 +1,13 @@
+import os
+from decimal import Decimal
+
+import httpx
 import pytest
+import pytest_asyncio
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from banking_app.database import Base
+from banking_app.models import Account, Base, User
 from banking_app.config import settings
 
 # Use test database
@@ -32,4 +38,97 @@ async def test_db():
 async def db_session(test_db):
     async with test_db() as session:
         yield session
-        await session.rollback()
\ No newline at end of file
+        await session.rollback()
+
+
+@pytest_asyncio.fixture
+async def sqlite_sessions(tmp_path):
+    """Sessionmaker for a throwaway SQLite database with the full schema."""
+    pytest.importorskip("aiosqlite")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def postgres_sessions():
+    """Like ``sqlite_sessions``, on the PostgreSQL database at
+    ``TEST_POSTGRES_URL``, whose schema is dropped and recreated. Tests using
+    it are skipped when the variable is unset.
+    """
+    url = os.environ.get("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    engine = create_async_engine(url, pool_size=20)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    yield sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.fixture
+def seed_accounts():
+    """``await seed_accounts(db, (user_id, balance), ...)`` and commit.
+
+    Creates one account per pair, with ids and account numbers "1", "2", ...
+    in order, and a user for every user id mentioned.
+    """
+
+    async def seed(db, *accounts):
+        await db.execute(
+            insert(User),
+            [
+                {
+                    "id": user_id,
+                    "email": f"user{user_id}@example.com",
+                    "full_name": f"User {user_id}",
+                    "hashed_password": "-",
+                }
+                for user_id in sorted({user_id for user_id, _ in accounts})
+            ],
+        )
+        await db.execute(
+            insert(Account),
+            [
+                {
+                    "id": i,
+                    "user_id": user_id,
+                    "account_name": f"Account {i}",
+                    "account_number": str(i),
+                    "balance": Decimal(balance),
+                }
+                for i, (user_id, balance) in enumerate(accounts, start=1)
+            ],
+        )
+        await db.commit()
+
+    return seed
+
+
+@pytest_asyncio.fixture
+async def sqlite_client(sqlite_sessions, monkeypatch):
+    """httpx client for the app, on the ``sqlite_sessions`` database.
+
+    Rate limits are off and the in-process account and user caches start
+    empty, since every test reuses the same ids.
+    """
+    from banking_app.auth.dependencies import user_cache
+    from banking_app.crud.account import account_directory, missing_account_numbers
+    from banking_app.database import get_db, get_read_db
+    from banking_app.main import app
+
+    async def sqlite_db():
+        async with sqlite_sessions() as session:
+            yield session
+
+    for cache in (user_cache, account_directory, missing_account_numbers):
+        cache.clear()
+    monkeypatch.setattr(settings, "rate_limit_enabled", False)
+    monkeypatch.setitem(app.dependency_overrides, get_db, sqlite_db)
+    monkeypatch.setitem(app.dependency_overrides, get_read_db, sqlite_db)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
@@ -0,0 +1,111 @@
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import delete, select
+
+from banking_app.commands.backfill_account_activity import _backfill_statement
+from banking_app.crud.transfer import create_transfer, create_transfers_batch
+from banking_app.models import Account, AccountActivity, Ledger, Transfer
+from banking_app.schemas.account import TransferCreate
+
+# The largest amount ledger.amount holds; activity mirrors it at the same
+# precision.
+LARGEST = Decimal("99999999.99")
+
+
+async def _write_history(db, seed_accounts):
+    await seed_accounts(db, (1, LARGEST * 2), (1, 0), (2, 0))
+    await create_transfer(db, 1, "1", "3", Decimal("12.34"), "to B")
+    await create_transfer(db, 1, "1", "2", Decimal("5"), "own accounts")
+    await create_transfer(db, 1, "1", "3", LARGEST, "large")
+    await create_transfers_batch(
+        db,
+        2,
+        [
+            TransferCreate(from_account_number="3", to_account_number="1", amount=Decimal("0.01"), description="back"),
+            TransferCreate(from_account_number="3", to_account_number="2", amount=Decimal("7.50"), description="back"),
+        ],
+    )
+
+
+async def _activity(db) -> list:
+    result = await db.execute(
+        select(
+            AccountActivity.ledger_id,
+            AccountActivity.account_id,
+            AccountActivity.transfer_id,
+            AccountActivity.direction,
+            AccountActivity.counterparty_account_number,
+            AccountActivity.amount,
+            AccountActivity.description,
+            AccountActivity.status,
+        ).order_by(AccountActivity.ledger_id)
+    )
+    return [tuple(row) for row in result.all()]
+
+
+async def _expected_from_ledger(db) -> list:
+    """What the activity rows should say, worked out in Python from the ledger."""
+    numbers = dict((await db.execute(select(Account.id, Account.account_number))).all())
+    transfers = {
+        row.id: row
+        for row in (
+            await db.execute(
+                select(Transfer.id, Transfer.from_account_id, Transfer.to_account_id, Transfer.status)
+            )
+        ).all()
+    }
+    expected = []
+    for entry in (
+        await db.execute(select(Ledger).where(Ledger.transfer_id.is_not(None)).order_by(Ledger.id))
+    ).scalars():
+        transfer = transfers[entry.transfer_id]
+        outgoing = entry.amount < 0
+        expected.append(
+            (
+                entry.id,
+                entry.account_id,
+                entry.transfer_id,
+                "outgoing" if outgoing else "incoming",
+                numbers[transfer.to_account_id if outgoing else transfer.from_account_id],
+                abs(entry.amount),
+                entry.description,
+                transfer.status,
+            )
+        )
+    return expected
+
+
+async def _check_activity_matches_ledger(db, seed_accounts):
+    await _write_history(db, seed_accounts)
+    written = await _activity(db)
+    expected = await _expected_from_ledger(db)
+
+    await db.execute(delete(AccountActivity))
+    await db.execute(_backfill_statement(0, 10**9))
+    await db.commit()
+    backfilled = await _activity(db)
+    # A second run finds nothing missing.
+    rerun = await db.execute(_backfill_statement(0, 10**9))
+    await db.commit()
+
+    assert len(written) == 10
+    assert written == expected
+    assert backfilled == expected
+    assert rerun.rowcount == 0
+    assert (written[4][3], written[4][5]) == ("outgoing", LARGEST)
+
+
+@pytest.mark.asyncio
+async def test_written_and_backfilled_activity_match_the_ledger(sqlite_sessions, seed_accounts):
+    async with sqlite_sessions() as db:
+        await _check_activity_matches_ledger(db, seed_accounts)
+
+
+@pytest.mark.asyncio
+async def test_single_statement_transfer_activity_matches_the_ledger(
+    postgres_sessions, seed_accounts
+):
+    # Single transfers write their activity rows from a CTE on PostgreSQL.
+    async with postgres_sessions() as db:
+        await _check_activity_matches_ledger(db, seed_accounts)
@@ -0,0 +1,52 @@
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from banking_app.auth.utils import create_access_token
+from banking_app.crud.account import AccountRef, account_directory, missing_account_numbers
+from banking_app.models import Account
+
+
+def _transfer(source, destination):
+    return {
+        "from_account_number": source,
+        "to_account_number": destination,
+        "amount": "5.00",
+        "description": "rent",
+    }
+
+
+def _headers(user_id):
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+
+@pytest.mark.asyncio
+async def test_transfer_to_account_unknown_to_this_worker(sqlite_sessions, seed_accounts, sqlite_client):
+    async with sqlite_sessions() as db:
+        await seed_accounts(db, (1, 10), (2, 0))
+    # Looked up here just before another worker created it.
+    missing_account_numbers.set("2", True)
+
+    response = await sqlite_client.post("/accounts/transfer", json=_transfer("1", "2"), headers=_headers(1))
+    async with sqlite_sessions() as db:
+        balance = (await db.execute(select(Account.balance).where(Account.id == 2))).scalar()
+
+    assert response.status_code == 201
+    assert balance == Decimal("5.00")
+
+
+@pytest.mark.asyncio
+async def test_transfer_checks_accounts_under_lock(sqlite_sessions, seed_accounts, sqlite_client):
+    async with sqlite_sessions() as db:
+        await seed_accounts(db, (1, 10), (2, 0))
+    account_directory.set("2", AccountRef(2, 2, "2"))
+
+    foreign = await sqlite_client.post("/accounts/transfer", json=_transfer("2", "1"), headers=_headers(1))
+    uncached_foreign = await sqlite_client.post("/accounts/transfer", json=_transfer("1", "2"), headers=_headers(2))
+    unknown = await sqlite_client.post("/accounts/transfer", json=_transfer("1", "9"), headers=_headers(1))
+
+    assert foreign.status_code == 404
+    assert uncached_foreign.status_code == 404
+    assert unknown.status_code == 404
+    assert unknown.json()["detail"] == "Destination account not found"
@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from banking_app.account_numbers import (
+    BODY_SPACE,
+    AccountNumberAllocator,
+    format_account_number,
+    luhn_valid,
+    permute,
+)
+
+KEY = b"test-key"
+
+
+def test_permutation_is_collision_free():
+    values = list(range(20000)) + list(range(BODY_SPACE - 1000, BODY_SPACE))
+    permuted = {permute(value, KEY) for value in values}
+
+    assert len(permuted) == len(values)
+    assert all(0 <= value < BODY_SPACE for value in permuted)
+
+
+def test_permutation_depends_on_key():
+    assert [permute(v, KEY) for v in range(10)] != [permute(v, b"other") for v in range(10)]
+
+
+def test_account_number_format():
+    numbers = [format_account_number(value, KEY) for value in range(1, 200)]
+
+    assert all(len(number) == 12 and luhn_valid(number) for number in numbers)
+    assert len(set(numbers)) == len(numbers)
+
+
+@pytest.mark.parametrize("number", ["79927398713", "4539578763621486"])
+def test_luhn_known_values(number):
+    assert luhn_valid(number)
+    assert not luhn_valid(number[:-1] + str((int(number[-1]) + 1) % 10))
+
+
+def test_allocator_reserves_blocks():
+    reserved = []
+
+    async def reserve():
+        reserved.append(1 + 4 * len(reserved))
+        return reserved[-1]
+
+    async def run():
+        allocator = AccountNumberAllocator(block_size=4)
+        return await asyncio.gather(*(allocator.allocate(reserve) for _ in range(10)))
+
+    values = asyncio.run(run())
+
+    assert sorted(values) == list(range(1, 11))
+    assert reserved == [1, 5, 9]
@@ -0,0 +1,90 @@
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import delete, func, select
+
+from banking_app.crud.account import (
+    get_account_balance,
+    get_accounts_by_user,
+    get_ledger_balance,
+    set_balance_buckets,
+)
+from banking_app.crud.transfer import (
+    InsufficientFundsError,
+    create_transfer,
+    create_transfers_batch,
+)
+from banking_app.models import Account, AccountBalanceBucket
+from banking_app.schemas.account import TransferCreate
+
+
+@pytest.mark.asyncio
+async def test_sharded_account_credits_debits_and_folds(sqlite_sessions, seed_accounts):
+    async with sqlite_sessions() as db:
+        await seed_accounts(db, (1, 100), (2, 0))
+        await set_balance_buckets(db, 2, 4)
+        await db.commit()
+
+        for _ in range(5):
+            await create_transfer(db, 1, "1", "2", Decimal("10"), "sale")
+        await create_transfers_batch(
+            db,
+            1,
+            [
+                TransferCreate(from_account_number="1", to_account_number="2", amount=Decimal("5"), description="sale"),
+                TransferCreate(from_account_number="1", to_account_number="2", amount=Decimal("5"), description="sale"),
+            ],
+        )
+        row = (await db.execute(select(Account.balance).where(Account.id == 2))).scalar()
+        buckets = sum((await db.execute(select(AccountBalanceBucket.balance))).scalars().all())
+        listed = (await get_accounts_by_user(db, 2))[0].balance
+
+        # The row is empty, so both debits come out of the buckets.
+        await create_transfer(db, 2, "2", "1", Decimal("25"), "payout")
+        await create_transfers_batch(
+            db,
+            2,
+            [TransferCreate(from_account_number="2", to_account_number="1", amount=Decimal("30"), description="payout")],
+        )
+        with pytest.raises(InsufficientFundsError):
+            await create_transfer(db, 2, "2", "1", Decimal("5.01"), "too much")
+        after_debits = await get_account_balance(db, 2)
+        ledger = await get_ledger_balance(db, 2)
+
+        folded = await set_balance_buckets(db, 2, 0)
+        await db.commit()
+        unsharded = (
+            await db.execute(select(Account.balance, Account.balance_buckets).where(Account.id == 2))
+        ).one()
+        left = (await db.execute(select(AccountBalanceBucket))).all()
+
+    assert row == Decimal("0.00")
+    assert buckets == Decimal("60.00")
+    assert listed == Decimal("60.00")
+    assert after_debits == ledger == Decimal("5.00")
+    assert folded == Decimal("5.00")
+    assert tuple(unsharded) == (Decimal("5.00"), 0)
+    assert left == []
+
+
+@pytest.mark.asyncio
+async def test_credit_to_a_missing_bucket_row_is_kept(sqlite_sessions, seed_accounts):
+    async with sqlite_sessions() as db:
+        await seed_accounts(db, (1, 100), (2, 0))
+        await set_balance_buckets(db, 2, 2)
+        await db.execute(delete(AccountBalanceBucket).where(AccountBalanceBucket.account_id == 2))
+        await db.commit()
+
+        for _ in range(4):
+            await create_transfer(db, 1, "1", "2", Decimal("10"), "sale")
+        await create_transfers_batch(
+            db,
+            1,
+            [TransferCreate(from_account_number="1", to_account_number="2", amount=Decimal("5"), description="sale")],
+        )
+        balance = await get_account_balance(db, 2)
+        ledger = await get_ledger_balance(db, 2)
+        rows = (await db.execute(select(func.count()).select_from(AccountBalanceBucket))).scalar()
+
+    assert balance == ledger == Decimal("45.00")
+    assert rows == 2
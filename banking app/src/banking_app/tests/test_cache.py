@@ -0,0 +1,35 @@
+import time
+from banking_app.cache import TTLCache
+
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_entries_expire(monkeypatch):
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    cache = TTLCache(maxsize=10, ttl=5)
+    cache.set("short", 1, ttl=1)
+    cache.set("long", 2)
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 2)
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_disabled_cache_stores_nothing():
+    cache = TTLCache(maxsize=0, ttl=60)
+    cache.set("a", 1)
+    assert cache.get("a", "missing") == "missing"
+    assert len(cache) == 0
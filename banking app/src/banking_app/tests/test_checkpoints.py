@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import delete, insert, select
+
+from banking_app.crud.account import get_ledger_balance
+from banking_app.crud.checkpoint import checkpoint_before, compact_ledger
+from banking_app.models import Ledger, LedgerCheckpoint
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.mark.asyncio
+async def test_checkpointed_balances_match_full_sums(sqlite_sessions, seed_accounts):
+    async with sqlite_sessions() as db:
+        await seed_accounts(db, (1, 0))
+        await db.execute(
+            insert(Ledger),
+            [
+                {
+                    "account_id": 1,
+                    "amount": Decimal(day),
+                    "description": "entry",
+                    "created_at": START + timedelta(days=day),
+                }
+                for day in range(1, 11)
+            ],
+        )
+        await db.commit()
+
+        written = await compact_ledger(db, min_entries=5, settle_seconds=0)
+        await db.execute(
+            insert(Ledger).values(
+                account_id=1,
+                amount=Decimal("-7"),
+                description="entry",
+                created_at=START + timedelta(days=11),
+            )
+        )
+        await db.commit()
+        checkpoint = (await db.execute(select(LedgerCheckpoint))).scalars().one()
+
+        checks = []
+        for as_of in (None, START + timedelta(days=5), START + timedelta(days=10, hours=1)):
+            checks.append(
+                (
+                    await get_ledger_balance(db, 1, as_of=as_of),
+                    await get_ledger_balance(db, 1, as_of=as_of, use_checkpoints=False),
+                )
+            )
+
+    assert written == 1
+    assert checkpoint.balance == Decimal("55.00")
+    assert checkpoint.ledger_id == 10
+    assert checks == [
+        (Decimal("48.00"), Decimal("48.00")),
+        (Decimal("10.00"), Decimal("10.00")),
+        (Decimal("55.00"), Decimal("55.00")),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_month_end_checkpoint_replaces_archived_rows(sqlite_sessions, seed_accounts):
+    february = datetime(2025, 2, 1, tzinfo=timezone.utc)
+    async with sqlite_sessions() as db:
+        await seed_accounts(db, (1, 0))
+        await db.execute(
+            insert(Ledger),
+            [
+                {
+                    "account_id": 1,
+                    "amount": Decimal(day),
+                    "description": "entry",
+                    "created_at": START + timedelta(days=day - 1),
+                }
+                for day in range(1, 41)
+            ],
+        )
+        await db.commit()
+        await compact_ledger(db, min_entries=5, settle_seconds=0)
+        # Checkpoints written after the month still leave its end uncovered.
+        written = await checkpoint_before(db, START, february)
+        again = await checkpoint_before(db, START, february)
+
+        # What archiving January does to the ledger.
+        await db.execute(delete(Ledger).where(Ledger.created_at < february))
+        await db.commit()
+        balances = (
+            await get_ledger_balance(db, 1),
+            await get_ledger_balance(db, 1, as_of=february + timedelta(days=4)),
+        )
+
+    assert (written, again) == (1, 0)
+    assert balances == (Decimal("820.00"), Decimal("630.00"))
@@ -0,0 +1,104 @@
+import asyncio
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+
+from banking_app.crud.transfer import AccountNotFoundError, InsufficientFundsError
+from banking_app.group_commit import TransferGroupCommitter
+from banking_app.models import Account, Transfer
+from banking_app.schemas.account import TransferCreate
+
+
+def _item(source, destination, amount, key=None):
+    return TransferCreate(
+        from_account_number=source,
+        to_account_number=destination,
+        amount=Decimal(amount),
+        description="group",
+        idempotency_key=key,
+    )
+
+
+@pytest.mark.asyncio
+async def test_group_commit_resolves_each_caller(sqlite_sessions, seed_accounts):
+    async with sqlite_sessions() as db:
+        await seed_accounts(db, (1, 30), (2, 5))
+    committer = TransferGroupCommitter(sqlite_sessions, max_batch=10, max_wait_seconds=0.05)
+
+    outcomes = await asyncio.gather(
+        committer.submit(1, _item("1", "2", "20", key="k1")),
+        committer.submit(2, _item("2", "1", "5")),
+        committer.submit(1, _item("1", "2", "20")),  # only 15 left
+        committer.submit(2, _item("1", "2", "1")),  # not B's account
+        committer.submit(1, _item("1", "2", "20", key="k1")),  # retry
+        return_exceptions=True,
+    )
+    await committer.close()
+    async with sqlite_sessions() as db:
+        balances = (await db.execute(select(Account.balance).order_by(Account.id))).scalars().all()
+        transfers = (await db.execute(select(func.count()).select_from(Transfer))).scalar()
+
+    first, second, overdraft, foreign, retry = outcomes
+    assert first[1] is False and first[0]["amount"] == Decimal("20.00")
+    assert second[1] is False
+    assert isinstance(overdraft, InsufficientFundsError)
+    assert isinstance(foreign, AccountNotFoundError)
+    assert retry == (first[0], True)
+    assert balances == [Decimal("15.00"), Decimal("20.00")]
+    assert transfers == 2
+
+
+@pytest.mark.asyncio
+async def test_group_commit_worker_survives_errors(sqlite_sessions, seed_accounts):
+    async with sqlite_sessions() as db:
+        await seed_accounts(db, (1, 30), (2, 0))
+
+    class Flaky(TransferGroupCommitter):
+        failures = 1
+
+        async def _collect(self):
+            group = await super()._collect()
+            if self.failures:
+                self.failures -= 1
+                raise RuntimeError("collect failed")
+            return group
+
+    committer = Flaky(sqlite_sessions, max_batch=10, max_wait_seconds=0.01)
+    with pytest.raises(RuntimeError):
+        await asyncio.wait_for(committer.submit(1, _item("1", "2", "1")), 1)
+    payload, replayed = await asyncio.wait_for(committer.submit(1, _item("1", "2", "2")), 1)
+    await committer.close()
+
+    assert payload["amount"] == Decimal("2.00") and not replayed
+
+
+@pytest.mark.asyncio
+async def test_group_commit_does_not_replay_after_ambiguous_commit(sqlite_sessions, seed_accounts):
+    async with sqlite_sessions() as db:
+        await seed_accounts(db, (1, 30), (2, 0))
+
+    def lost_ack_sessions():
+        # COMMIT goes through but the client never hears back.
+        db = sqlite_sessions()
+        commit = db.commit
+
+        async def flaky_commit():
+            await commit()
+            raise ConnectionError("connection reset")
+
+        db.commit = flaky_commit
+        return db
+
+    committer = TransferGroupCommitter(lost_ack_sessions, max_batch=10, max_wait_seconds=0.05)
+    outcomes = await asyncio.gather(
+        committer.submit(1, _item("1", "2", "1")),
+        committer.submit(1, _item("1", "2", "2")),
+        return_exceptions=True,
+    )
+    await committer.close()
+    async with sqlite_sessions() as db:
+        transfers = (await db.execute(select(func.count()).select_from(Transfer))).scalar()
+
+    assert all(isinstance(outcome, ConnectionError) for outcome in outcomes)
+    assert transfers == 2
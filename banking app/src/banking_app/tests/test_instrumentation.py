@@ -0,0 +1,50 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from banking_app.instrumentation import (
+    QueryBudgetExceeded,
+    instrument_engine,
+    query_budget,
+    track_queries,
+)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_repeated_statements_are_flagged(engine):
+    with track_queries() as outer:
+        with pytest.raises(QueryBudgetExceeded):
+            with query_budget(3) as inner, engine.connect() as conn:
+                for i in range(6):
+                    conn.execute(text("SELECT :i"), {"i": i})
+
+    assert inner.queries == outer.queries == 6
+    assert inner.repeated(5) == [("SELECT ?", 6)]
+
+
+def test_untracked_queries_are_ignored(engine):
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    with track_queries() as stats:
+        pass
+    assert stats.queries == 0
+
+
+def test_failed_statements_do_not_skew_the_next(engine):
+    with track_queries() as stats, engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM missing"))
+        conn.execute(text("SELECT 1"))
+        left = conn.info["query_started"]
+
+    assert left == []
+    assert stats.queries == 4
+    assert stats.statements["SELECT * FROM missing"] == 3
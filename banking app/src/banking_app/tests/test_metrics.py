@@ -0,0 +1,57 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from banking_app import metrics
+from banking_app.metrics import Counter, Histogram, MetricsMiddleware, render
+
+
+def test_counter_and_histogram_exposition():
+    # A registry of our own, so these don't show up on /metrics.
+    registry = []
+    counter = Counter("test_events_total", "Events", ("kind",), registry=registry)
+    counter.inc("a")
+    counter.inc("a", amount=2)
+    histogram = Histogram(
+        "test_latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0), registry=registry
+    )
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, "/x")
+
+    text = render(registry)
+
+    assert "# TYPE test_events_total counter" in text
+    assert 'test_events_total{kind="a"} 3' in text
+    assert 'test_latency_seconds_bucket{route="/x",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{route="/x",le="1.0"} 2' in text
+    assert 'test_latency_seconds_bucket{route="/x",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{route="/x"} 3' in text
+    assert "test_events_total" not in render()
+
+
+@pytest.mark.asyncio
+async def test_requests_rejected_before_routing_keep_their_route(monkeypatch):
+    durations = Histogram("test_request_duration_seconds", "Latency", ("method", "route", "status"), registry=[])
+    monkeypatch.setattr(metrics, "http_request_duration", durations)
+    app = FastAPI()
+
+    @app.get("/probe/{item_id}")
+    async def probe(item_id: int):
+        return {"id": item_id}
+
+    class RejectAll:
+        def __init__(self, app):
+            self.app = app
+
+        async def __call__(self, scope, receive, send):
+            await JSONResponse({"detail": "Rate limit exceeded"}, status_code=429)(scope, receive, send)
+
+    app.add_middleware(RejectAll)
+    app.add_middleware(MetricsMiddleware)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/probe/42")
+
+    assert response.status_code == 429
+    assert list(durations._values) == [("GET", "/probe/{item_id}", 429)]
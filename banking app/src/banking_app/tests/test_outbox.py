@@ -0,0 +1,128 @@
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from banking_app.config import settings
+from banking_app.crud.transfer import create_transfer, create_transfers_batch
+from banking_app.models import OutboxEvent
+from banking_app.outbox import FileSink, QueueSink, dispatch_batch, sink_from_url
+from banking_app.schemas.account import TransferCreate
+
+
+@pytest.fixture(autouse=True)
+def outbox_enabled(monkeypatch):
+    # No sink is configured in tests, which would leave events unwritten.
+    monkeypatch.setattr(settings, "outbox_enabled", True)
+
+
+class FailingSink:
+    async def send(self, events):
+        raise ConnectionError("sink down")
+
+
+@pytest.mark.asyncio
+async def test_transfers_write_events_delivered_at_least_once(sqlite_sessions, seed_accounts):
+    sink = QueueSink()
+    async with sqlite_sessions() as db:
+        await seed_accounts(db, (1, 100), (1, 0))
+        transfer, _ = await create_transfer(db, 1, "1", "2", Decimal("10"), "rent")
+        await create_transfers_batch(
+            db,
+            1,
+            [
+                TransferCreate(from_account_number="1", to_account_number="2", amount=Decimal("1"), description="a"),
+                TransferCreate(from_account_number="2", to_account_number="1", amount=Decimal("2"), description="b"),
+            ],
+        )
+
+        failed = await dispatch_batch(db, FailingSink(), 10)
+        pending = (await db.execute(select(OutboxEvent))).scalars().all()
+        retry = [(e.attempts, e.last_error, e.available_at) for e in pending]
+
+        # Make them due again and deliver.
+        for event in pending:
+            event.available_at = datetime(2000, 1, 1)
+        await db.commit()
+        delivered = await dispatch_batch(db, sink, 2)
+        delivered += await dispatch_batch(db, sink, 2)
+        again = await dispatch_batch(db, sink, 2)
+        dispatched = (await db.execute(select(OutboxEvent.dispatched_at))).scalars().all()
+    events = [sink.queue.get_nowait() for _ in range(sink.queue.qsize())]
+
+    assert failed == 0
+    assert [(attempts, error) for attempts, error, _ in retry] == [(1, "sink down")] * 3
+    assert all(available_at is not None for _, _, available_at in retry)
+    assert (delivered, again) == (3, 0)
+    assert all(dispatched)
+    assert [e["type"] for e in events] == ["transfer.completed"] * 3
+    assert events[0]["aggregate_id"] == transfer["id"]
+    assert events[0]["data"] == {
+        "from_account_number": "1",
+        "to_account_number": "2",
+        "amount": "10.00",
+        "description": "rent",
+    }
+    assert [e["data"]["description"] for e in events[1:]] == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_batch_is_sent_outside_the_claiming_transaction(sqlite_sessions, seed_accounts):
+    seen = {}
+
+    class PeekingSink:
+        """Looks at the outbox from another dispatcher while a batch is out."""
+
+        async def send(self, events):
+            seen["in_transaction"] = db.in_transaction()
+            async with sqlite_sessions() as other:
+                seen["second_dispatcher"] = await dispatch_batch(other, QueueSink(), 10)
+
+    async with sqlite_sessions() as db:
+        await seed_accounts(db, (1, 100), (1, 0))
+        await create_transfer(db, 1, "1", "2", Decimal("10"), "rent")
+        delivered = await dispatch_batch(db, PeekingSink(), 10)
+        dispatched = (await db.execute(select(OutboxEvent.dispatched_at))).scalars().all()
+
+    assert seen == {"in_transaction": False, "second_dispatcher": 0}
+    assert delivered == 1
+    assert all(dispatched)
+
+
+def test_sink_from_url(tmp_path):
+    sink = sink_from_url(f"file://{tmp_path / 'events.jsonl'}")
+    assert isinstance(sink, FileSink)
+    asyncio.run(sink.send([{"id": 1, "amount": Decimal("1.50")}]))
+    assert (tmp_path / "events.jsonl").read_text() == '{"id":1,"amount":"1.50"}\n'
+    assert isinstance(sink_from_url("queue:"), QueueSink)
+    with pytest.raises(ValueError):
+        sink_from_url("ftp://example.com")
+
+
+@pytest.mark.asyncio
+async def test_api_refuses_the_in_process_queue_sink(monkeypatch):
+    from banking_app.main import app, lifespan
+
+    monkeypatch.setattr(settings, "outbox_sink", "queue:")
+    with pytest.raises(ValueError):
+        async with lifespan(app):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_no_events_without_a_sink(sqlite_sessions, seed_accounts, monkeypatch):
+    monkeypatch.setattr(settings, "outbox_enabled", None)
+    monkeypatch.setattr(settings, "outbox_sink", None)
+    async with sqlite_sessions() as db:
+        await seed_accounts(db, (1, 100), (1, 0))
+        await create_transfer(db, 1, "1", "2", Decimal("10"), "rent")
+        await create_transfers_batch(
+            db,
+            1,
+            [TransferCreate(from_account_number="1", to_account_number="2", amount=Decimal("1"), description="a")],
+        )
+        events = (await db.execute(select(OutboxEvent))).scalars().all()
+
+    assert events == []
@@ -0,0 +1,17 @@
+import pytest
+from datetime import datetime, timezone
+from banking_app.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2025, 10, 22, 14, 5, 51, 276480, tzinfo=timezone.utc)
+    cursor = encode_cursor(created_at, 42)
+
+    assert "|" not in cursor
+    assert decode_cursor(cursor) == (created_at, 42)
+
+
+@pytest.mark.parametrize("cursor", ["", "junk", encode_cursor(datetime(2025, 1, 1), 1)[:-3]])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
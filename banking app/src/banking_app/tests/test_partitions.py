@@ -0,0 +1,14 @@
+from datetime import datetime, timedelta, timezone
+
+from banking_app.partitions import add_months, month_start, partition_month, partition_name
+
+
+def test_partition_names_round_trip():
+    month = month_start(datetime(2025, 12, 31, 23, 30, tzinfo=timezone(timedelta(hours=-5))))
+
+    assert month == datetime(2026, 1, 1, tzinfo=timezone.utc)
+    assert add_months(month, -1) == datetime(2025, 12, 1, tzinfo=timezone.utc)
+    assert partition_name("ledger", month) == "ledger_y2026m01"
+    assert partition_month("ledger", "ledger_y2026m01") == month
+    assert partition_month("ledger", "ledger_default") is None
+    assert partition_month("ledger", "transfers_y2026m01") is None
@@ -0,0 +1,58 @@
+import asyncio
+import threading
+
+import pytest
+
+from banking_app.auth.utils import PasswordHasher, PasswordHasherBusy, password_hasher
+from banking_app.metrics import render
+
+
+@pytest.mark.asyncio
+async def test_hasher_rejects_beyond_workers_plus_queue():
+    hasher = PasswordHasher(workers=1, max_queue=1)
+    release = threading.Event()
+
+    def slow():
+        release.wait(5)
+        return "hashed"
+
+    def broken():
+        raise ValueError("bad hash")
+
+    running = [asyncio.create_task(hasher._run(slow)) for _ in range(2)]
+    await asyncio.sleep(0)
+    with pytest.raises(PasswordHasherBusy):
+        await hasher._run(slow)
+    saturated = hasher.stats()
+    release.set()
+    results = await asyncio.gather(*running)
+    with pytest.raises(ValueError):
+        await hasher._run(broken)
+
+    assert saturated["in_flight"] == 2
+    assert saturated["queued"] == 1
+    assert results == ["hashed", "hashed"]
+    assert hasher.stats()["in_flight"] == 0
+    assert hasher.stats()["rejected"] == 1
+    # Failed operations are not counted as completed.
+    assert hasher.stats()["completed"] == 2
+
+
+@pytest.mark.asyncio
+async def test_login_is_503_while_the_hasher_is_saturated(
+    sqlite_sessions, seed_accounts, sqlite_client, monkeypatch
+):
+    async with sqlite_sessions() as db:
+        await seed_accounts(db, (1, 0))
+    monkeypatch.setattr(
+        password_hasher, "in_flight", password_hasher.workers + password_hasher.max_queue
+    )
+    rejected = password_hasher.rejected
+
+    response = await sqlite_client.post(
+        "/auth/login", data={"username": "user1@example.com", "password": "secret"}
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert f"password_hash_rejected_total {rejected + 1}" in render()
@@ -0,0 +1,52 @@
+import pytest
+from starlette.requests import Request
+
+from banking_app.auth import utils
+from banking_app.database import _request_user_id
+from banking_app.ratelimit import SharedTokenBuckets, client_key, parse_limit
+
+
+def test_parse_limit():
+    assert parse_limit("10/minute") == (10.0, 10 / 60)
+    assert parse_limit("5 / seconds") == (5.0, 5.0)
+    with pytest.raises(ValueError):
+        parse_limit("ten/minute")
+
+
+def test_buckets_are_shared_through_the_file(tmp_path):
+    path = str(tmp_path / "buckets")
+    # Two mappings of one file, as two worker processes would have.
+    first, second = SharedTokenBuckets(path, 1024), SharedTokenBuckets(path, 1024)
+    try:
+        burst, rate = parse_limit("3/minute")
+        waits = [
+            bucket.take("POST /auth/login ip:10.0.0.1", burst, rate, now=1000.0)
+            for bucket in (first, second, first, second)
+        ]
+        other = second.take("POST /auth/login ip:10.0.0.2", burst, rate, now=1000.0)
+        refilled = first.take("POST /auth/login ip:10.0.0.1", burst, rate, now=1020.0)
+    finally:
+        first.close()
+        second.close()
+
+    assert waits[:3] == [0.0, 0.0, 0.0]
+    assert waits[3] == pytest.approx(20.0)
+    assert other == 0.0
+    assert refilled == 0.0
+
+
+def test_token_is_decoded_once_per_request(monkeypatch):
+    decoded = []
+    decode = utils.decode_access_token
+    monkeypatch.setattr(utils, "decode_access_token", lambda token: decoded.append(token) or decode(token))
+    token = utils.create_access_token({"sub": "7"})
+    scope = {
+        "type": "http",
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+        "client": ("10.0.0.1", 1234),
+    }
+
+    assert client_key(scope) == "user:7"
+    assert _request_user_id(Request(scope)) == 7
+    assert decoded == [token]
+    assert client_key({"type": "http", "headers": [], "client": ("10.0.0.1", 1234)}) == "ip:10.0.0.1"
@@ -0,0 +1,127 @@
+import asyncio
+import time
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from banking_app.crud.transfer import create_transfer
+from banking_app.database import ReadRouter
+from banking_app.write_times import UserWriteTimes, user_write_times
+
+pytest.importorskip("aiosqlite")
+
+
+async def _database(path, name):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE whoami (name TEXT)"))
+        await conn.execute(text("INSERT INTO whoami VALUES (:name)"), {"name": name})
+    return engine, sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def _read(factory):
+    async with factory() as session:
+        return (await session.execute(text("SELECT name FROM whoami"))).scalar()
+
+
+def test_replica_routing(tmp_path):
+    async def run():
+        databases = [
+            await _database(tmp_path / f"{name}.db", name)
+            for name in ("primary", "replica-a", "replica-b")
+        ]
+        primary, replica_a, replica_b = (factory for _, factory in databases)
+        router = ReadRouter(
+            primary,
+            [replica_a, replica_b],
+            read_your_writes_seconds=60,
+            write_times=UserWriteTimes(str(tmp_path / "writes")),
+        )
+        try:
+            round_robin = [await _read(router.sessionmaker_for(1)) for _ in range(4)]
+
+            router.mark_write(1)
+            after_write = await _read(router.sessionmaker_for(1))
+            other_user = await _read(router.sessionmaker_for(2))
+
+            router.mark_down(0)
+            router.mark_down(1)
+            all_down = await _read(router.sessionmaker_for(2))
+        finally:
+            for engine, _ in databases:
+                await engine.dispose()
+        return round_robin, after_write, other_user, all_down
+
+    round_robin, after_write, other_user, all_down = asyncio.run(run())
+
+    assert round_robin == ["replica-a", "replica-b", "replica-a", "replica-b"]
+    assert after_write == "primary"
+    assert other_user == "replica-a"
+    assert all_down == "primary"
+
+
+def test_no_replicas_reads_primary():
+    primary = object()
+    assert ReadRouter(primary).sessionmaker_for(None) is primary
+
+
+def test_writes_are_seen_by_every_worker(tmp_path):
+    primary, replica = object(), object()
+    # Two workers map the same file.
+    worker_a, worker_b = (
+        ReadRouter(
+            primary,
+            [replica],
+            read_your_writes_seconds=60,
+            write_times=UserWriteTimes(str(tmp_path / "writes"), slots=16),
+        )
+        for _ in range(2)
+    )
+
+    worker_a.mark_write(1)
+
+    assert worker_b.sessionmaker_for(1) is primary
+    assert worker_b.sessionmaker_for(2) is replica
+
+
+def test_replica_serves_writer_once_replayed(tmp_path):
+    primary, replica = object(), object()
+    router = ReadRouter(
+        primary,
+        [replica],
+        read_your_writes_seconds=60,
+        write_times=UserWriteTimes(str(tmp_path / "writes")),
+    )
+    router.mark_write(1)
+    written_at = router.written_at(1)
+
+    router.note_replayed(0, written_at - 1)
+    behind = router.sessionmaker_for(1)
+    router.note_replayed(0, written_at)
+    caught_up = router.sessionmaker_for(1)
+
+    assert (behind, caught_up) == (primary, replica)
+
+
+def test_old_writes_stop_pinning_to_primary(tmp_path):
+    primary, replica = object(), object()
+    write_times = UserWriteTimes(str(tmp_path / "writes"))
+    router = ReadRouter(primary, [replica], read_your_writes_seconds=5, write_times=write_times)
+
+    write_times.mark(1, now=time.time() - 10)
+
+    assert router.sessionmaker_for(1) is replica
+
+
+@pytest.mark.asyncio
+async def test_transfer_marks_both_users(sqlite_sessions, seed_accounts):
+    async with sqlite_sessions() as db:
+        await seed_accounts(db, (101, 10), (102, 0))
+        before = time.time()
+        await create_transfer(db, 101, "1", "2", Decimal("5"), "rent")
+
+    assert user_write_times.get(101) >= before
+    assert user_write_times.get(102) >= before
@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from jose import jwt
+from sqlalchemy import update
+
+from banking_app.auth.utils import create_access_token, decode_access_token, decode_refresh_token
+from banking_app.config import settings
+from banking_app.crud.refresh_token import (
+    InvalidRefreshToken,
+    issue_refresh_token,
+    revoke_refresh_token,
+    revoked_tokens,
+    rotate_refresh_token,
+)
+from banking_app.models import RefreshToken
+
+
+@pytest.mark.asyncio
+async def test_rotation_replaces_the_token(sqlite_sessions, seed_accounts):
+    async with sqlite_sessions() as db:
+        await seed_accounts(db, (1, 0))
+        token = await issue_refresh_token(db, 1)
+        user_id, replacement = await rotate_refresh_token(db, token)
+        revoked_tokens.clear()  # make the database say no, not the cache
+        with pytest.raises(InvalidRefreshToken):
+            await rotate_refresh_token(db, token)
+
+    assert user_id == 1
+    assert replacement != token
+    assert decode_refresh_token(replacement)["fam"] == decode_refresh_token(token)["fam"]
+
+
+@pytest.mark.asyncio
+async def test_replayed_token_revokes_its_family(sqlite_sessions, seed_accounts):
+    async with sqlite_sessions() as db:
+        await seed_accounts(db, (1, 0))
+        stolen = await issue_refresh_token(db, 1)
+        _, current = await rotate_refresh_token(db, stolen)
+        other_session = await issue_refresh_token(db, 1)
+
+        with pytest.raises(InvalidRefreshToken):
+            await rotate_refresh_token(db, stolen)
+        revoked_tokens.clear()
+        with pytest.raises(InvalidRefreshToken):
+            await rotate_refresh_token(db, current)
+        user_id, _ = await rotate_refresh_token(db, other_session)
+
+    assert user_id == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_and_revoked_tokens_are_rejected(sqlite_sessions, seed_accounts):
+    async with sqlite_sessions() as db:
+        await seed_accounts(db, (1, 0))
+        expired = await issue_refresh_token(db, 1)
+        await db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.jti == decode_refresh_token(expired)["jti"])
+            .values(expires_at=datetime.now(timezone.utc) - timedelta(minutes=1))
+        )
+        await db.commit()
+        with pytest.raises(InvalidRefreshToken):
+            await rotate_refresh_token(db, expired)
+
+        logged_out = await issue_refresh_token(db, 1)
+        await revoke_refresh_token(db, logged_out)
+        revoked_tokens.clear()
+        with pytest.raises(InvalidRefreshToken):
+            await rotate_refresh_token(db, logged_out)
+
+    past_exp = jwt.encode(
+        {
+            "sub": "1",
+            "jti": "0" * 32,
+            "fam": "0" * 32,
+            "type": "refresh",
+            "exp": datetime.now(timezone.utc) - timedelta(minutes=1),
+        },
+        settings.secret_key,
+        algorithm=settings.algorithm,
+    )
+    assert decode_refresh_token(past_exp) is None
+
+
+@pytest.mark.asyncio
+async def test_refresh_tokens_are_not_access_tokens(sqlite_sessions, seed_accounts):
+    async with sqlite_sessions() as db:
+        await seed_accounts(db, (1, 0))
+        refresh_token = await issue_refresh_token(db, 1)
+
+    assert decode_access_token(refresh_token) is None
+    assert decode_refresh_token(create_access_token({"sub": "1"})) is None
+
+
+@pytest.mark.asyncio
+async def test_refresh_and_logout_routes(sqlite_sessions, seed_accounts, sqlite_client):
+    async with sqlite_sessions() as db:
+        await seed_accounts(db, (1, 0))
+        token = await issue_refresh_token(db, 1)
+        second_login = await issue_refresh_token(db, 1)
+
+    refreshed = await sqlite_client.post("/auth/refresh", json={"refresh_token": token})
+    replayed = await sqlite_client.post("/auth/refresh", json={"refresh_token": token})
+
+    fresh = await sqlite_client.post("/auth/refresh", json={"refresh_token": second_login})
+    rotated = fresh.json()["refresh_token"]
+    logout = await sqlite_client.post("/auth/logout", json={"refresh_token": rotated})
+    after_logout = await sqlite_client.post("/auth/refresh", json={"refresh_token": rotated})
+
+    assert refreshed.status_code == 200
+    assert decode_access_token(refreshed.json()["access_token"])["sub"] == "1"
+    assert refreshed.json()["refresh_token"] != token
+    assert replayed.status_code == 401
+    assert fresh.status_code == 200
+    assert logout.status_code == 204
+    assert after_logout.status_code == 401
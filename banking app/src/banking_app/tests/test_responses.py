@@ -0,0 +1,10 @@
+from decimal import Decimal
+
+from banking_app.responses import ORJSONResponse
+
+
+def test_decimals_are_rendered_exactly():
+    response = ORJSONResponse({"amount": Decimal("12345678.10"), "items": [Decimal("0.1")]})
+
+    assert response.body == b'{"amount":"12345678.10","items":["0.1"]}'
+    assert response.headers["content-type"] == "application/json"
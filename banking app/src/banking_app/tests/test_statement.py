@@ -0,0 +1,104 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import insert, select, update
+
+from banking_app.crud.checkpoint import compact_ledger
+from banking_app.crud.transfer import create_transfer
+from banking_app.models import Ledger
+from banking_app.routers.account import _statement_lines
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+async def _history(sessions, seed_accounts):
+    """Deposits on days 1-6, then transfers on days 7-9; account 1 ends at 97.50."""
+    async with sessions() as db:
+        # The balance the deposits below add up to; raw ledger inserts do
+        # not maintain it.
+        await seed_accounts(db, (1, 120), (2, 100))
+        await db.execute(
+            insert(Ledger),
+            [
+                {
+                    "account_id": 1,
+                    "amount": Decimal("20"),
+                    "description": "deposit",
+                    "created_at": START + timedelta(days=day),
+                }
+                for day in range(1, 7)
+            ],
+        )
+        await db.commit()
+        await create_transfer(db, 1, "1", "2", Decimal("30"), "rent")
+        await create_transfer(db, 2, "2", "1", Decimal("12.25"), "refund")
+        await create_transfer(db, 1, "1", "2", Decimal("4.75"), "fee")
+        moved = (
+            await db.execute(
+                select(Ledger.id).where(Ledger.transfer_id.is_not(None)).order_by(Ledger.id)
+            )
+        ).scalars().all()
+        for index, ledger_id in enumerate(moved):
+            await db.execute(
+                update(Ledger)
+                .where(Ledger.id == ledger_id)
+                .values(created_at=START + timedelta(days=7 + index // 2))
+            )
+        await db.commit()
+        # Opening balances then start from a checkpoint plus later entries.
+        assert await compact_ledger(db, min_entries=3, settle_seconds=0)
+
+
+async def _records(sessions, format, start=None, end=None) -> list[dict]:
+    body = "".join([line async for line in _statement_lines(sessions, 1, start, end, format)])
+    if format == "csv":
+        return list(csv.DictReader(io.StringIO(body)))
+    return [json.loads(line) for line in body.splitlines()]
+
+
+def _check_balances(records) -> tuple[Decimal, list[Decimal], Decimal]:
+    opening, *entries, closing = records
+    assert opening["type"] == "opening_balance"
+    assert closing["type"] == "closing_balance"
+    assert all(entry["type"] == "entry" for entry in entries)
+
+    balance = Decimal(opening["balance"])
+    for entry in entries:
+        balance += Decimal(entry["amount"])
+        assert Decimal(entry["balance"]) == balance
+    assert Decimal(closing["balance"]) == balance
+    return Decimal(opening["balance"]), [Decimal(e["amount"]) for e in entries], balance
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("format", ["csv", "ndjson"])
+async def test_opening_balance_plus_entries_is_closing_balance(
+    sqlite_sessions, seed_accounts, format
+):
+    await _history(sqlite_sessions, seed_accounts)
+
+    whole = _check_balances(await _records(sqlite_sessions, format))
+    window = _check_balances(
+        await _records(
+            sqlite_sessions,
+            format,
+            start=START + timedelta(days=5, hours=12),
+            end=START + timedelta(days=8, hours=12),
+        )
+    )
+    tail = _check_balances(
+        await _records(sqlite_sessions, format, start=START + timedelta(days=8, hours=12))
+    )
+
+    assert whole[0] == Decimal("0.00")
+    assert whole[2] == Decimal("97.50")
+    assert window == (
+        Decimal("100.00"),
+        [Decimal("20.00"), Decimal("-30.00"), Decimal("12.25")],
+        Decimal("102.25"),
+    )
+    assert tail == (Decimal("102.25"), [Decimal("-4.75")], Decimal("97.50"))
@@ -0,0 +1,50 @@
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import update
+
+from banking_app.crud.account import account_summaries, get_account_summary
+from banking_app.crud.transfer import create_transfer
+from banking_app.models import Account
+from banking_app.write_times import user_write_times
+
+
+@pytest.mark.asyncio
+async def test_summary_flows_and_invalidation(sqlite_sessions, seed_accounts):
+    account_summaries.clear()
+    async with sqlite_sessions() as db:
+        await seed_accounts(db, (1, 100), (1, 0), (2, 0))
+        before = await get_account_summary(db, 1, days=7)
+        await create_transfer(db, 1, "1", "2", Decimal("10"), "own accounts")
+        await create_transfer(db, 1, "1", "3", Decimal("25"), "to B")
+        after = await get_account_summary(db, 1, days=7)
+        receiver = await get_account_summary(db, 2, days=7)
+
+    assert before["total_balance"] == Decimal("100.00")
+    assert before["days"] == []
+    assert after["total_balance"] == Decimal("75.00")
+    assert [a["balance"] for a in after["accounts"]] == [Decimal("65.00"), Decimal("10.00")]
+    assert [(d["inflow"], d["outflow"]) for d in after["days"]] == [
+        (Decimal("0.00"), Decimal("25.00"))
+    ]
+    assert [(d["inflow"], d["outflow"]) for d in receiver["days"]] == [
+        (Decimal("25.00"), Decimal("0.00"))
+    ]
+
+
+@pytest.mark.asyncio
+async def test_write_in_another_worker_invalidates_the_summary(sqlite_sessions, seed_accounts):
+    account_summaries.clear()
+    async with sqlite_sessions() as db:
+        await seed_accounts(db, (1, 100))
+        first = await get_account_summary(db, 1, days=7)
+        # Another worker's transfer: this worker's cache is not told, only
+        # the shared write time moves.
+        await db.execute(update(Account).where(Account.id == 1).values(balance=Decimal("60")))
+        await db.commit()
+        cached = await get_account_summary(db, 1, days=7)
+        user_write_times.mark(1)
+        fresh = await get_account_summary(db, 1, days=7)
+
+    assert first["total_balance"] == cached["total_balance"] == Decimal("100.00")
+    assert fresh["total_balance"] == Decimal("60.00")
@@ -1,47 +1,46 @@
 import pytest
 from decimal import Decimal
-from banking_app import crud
+from banking_app.crud.account import get_account_balance
+from banking_app.crud.transfer import IdempotencyConflictError, create_transfer
 
 
 @pytest.mark.asyncio
-async def test_create_transfer(db_session):
-    # Create users and accounts
-    user1 = await crud.create_user(db_session, "user1@example.com", "User 1", "pass")
-    user2 = await crud.create_user(db_session, "user2@example.com", "User 2", "pass")
-    account1 = await crud.create_account(db_session, user1.id, "ACC001")
-    account2 = await crud.create_account(db_session, user2.id, "ACC002")
-
-    # Perform transfer
-    transfer = await crud.create_transfer(
-        db_session, account1.id, account2.id, Decimal("100.00"), "Test transfer", "key1"
-    )
-    assert transfer.status == "completed"
-    assert transfer.amount == Decimal("100.00")
-
-    # Check balances
-    balance1 = await crud.get_account_balance(db_session, account1.id)
-    balance2 = await crud.get_account_balance(db_session, account2.id)
-    assert balance1 == Decimal("-100.00")
-    assert balance2 == Decimal("100.00")
+async def test_create_transfer(sqlite_sessions, seed_accounts):
+    async with sqlite_sessions() as db:
+        await seed_accounts(db, (1, 150), (2, 0))
 
-
-@pytest.mark.asyncio
-async def test_idempotency(db_session):
-    # Create users and accounts
-    user1 = await crud.create_user(db_session, "user3@example.com", "User 3", "pass")
-    user2 = await crud.create_user(db_session, "user4@example.com", "User 4", "pass")
-    account1 = await crud.create_account(db_session, user1.id, "ACC003")
-    account2 = await crud.create_account(db_session, user2.id, "ACC004")
-
-    # Perform transfer twice with same key
-    await crud.create_transfer(
-        db_session, account1.id, account2.id, Decimal("50.00"), "Test", "key2"
-    )
-    with pytest.raises(ValueError):
-        await crud.create_transfer(
-            db_session, account1.id, account2.id, Decimal("50.00"), "Test", "key2"
+        # Perform transfer
+        transfer, replayed = await create_transfer(
+            db, 1, "1", "2", Decimal("100.00"), "Test transfer", "key1"
         )
+        assert replayed is False
+        assert transfer["status"] == "completed"
+        assert transfer["amount"] == Decimal("100.00")
+        assert transfer["from_account_number"] == "1"
+        assert transfer["to_account_number"] == "2"
+
+        # Check balances
+        balance1 = await get_account_balance(db, 1)
+        balance2 = await get_account_balance(db, 2)
+        assert balance1 == Decimal("50.00")
+        assert balance2 == Decimal("100.00")
 
-    # Balance should be -50, not -100
-    balance1 = await crud.get_account_balance(db_session, account1.id)
-    assert balance1 == Decimal("-50.00")
\ No newline at end of file
+
+@pytest.mark.asyncio
+async def test_idempotency(sqlite_sessions, seed_accounts):
+    async with sqlite_sessions() as db:
+        await seed_accounts(db, (1, 100), (2, 0))
+
+        # Perform transfer twice with same key: the retry replays the first
+        first, first_replayed = await create_transfer(db, 1, "1", "2", Decimal("50.00"), "Test", "key2")
+        again, again_replayed = await create_transfer(db, 1, "1", "2", Decimal("50.00"), "Test", "key2")
+        assert (first_replayed, again_replayed) == (False, True)
+        assert again == first
+
+        # The same key for a different transfer is refused
+        with pytest.raises(IdempotencyConflictError):
+            await create_transfer(db, 1, "1", "2", Decimal("20.00"), "Test", "key2")
+
+        # Balance should be 50, not 0
+        balance1 = await get_account_balance(db, 1)
+        assert balance1 == Decimal("50.00")
@@ -0,0 +1,45 @@
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from banking_app.auth.utils import create_access_token
+from banking_app.models import Account
+
+
+def _headers(user_id):
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+
+def _item(source, destination, amount):
+    return {
+        "from_account_number": source,
+        "to_account_number": destination,
+        "amount": amount,
+        "description": "batch",
+    }
+
+
+@pytest.mark.asyncio
+async def test_rejected_all_or_nothing_batch_reports_each_item(
+    sqlite_sessions, seed_accounts, sqlite_client
+):
+    async with sqlite_sessions() as db:
+        await seed_accounts(db, (1, 100), (2, 0))
+
+    response = await sqlite_client.post(
+        "/accounts/transfers/batch",
+        json={
+            "mode": "all_or_nothing",
+            "transfers": [_item("1", "2", "10.00"), _item("1", "2", "500.00")],
+        },
+        headers=_headers(1),
+    )
+    async with sqlite_sessions() as db:
+        balance = (await db.execute(select(Account.balance).where(Account.id == 1))).scalar()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["completed"], body["failed"]) == (0, 1)
+    assert [result["status"] for result in body["results"]] == ["skipped", "failed"]
+    assert balance == Decimal("100.00")
@@ -0,0 +1,93 @@
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from banking_app.auth.utils import create_access_token
+from banking_app.crud.transfer import IdempotencyKeyUsedError, create_transfer
+from banking_app.models import Account, Transfer, TransferIdempotencyKey
+
+
+def _headers(user_id):
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+
+def _body(source, destination, amount, key, description="rent"):
+    return {
+        "from_account_number": source,
+        "to_account_number": destination,
+        "amount": amount,
+        "description": description,
+        "idempotency_key": key,
+    }
+
+
+@pytest.mark.asyncio
+async def test_repeated_key_replays_the_transfer(sqlite_sessions, seed_accounts, sqlite_client):
+    async with sqlite_sessions() as db:
+        await seed_accounts(db, (1, 100), (2, 0))
+    key = uuid.uuid4().hex
+
+    first = await sqlite_client.post(
+        "/accounts/transfer", json=_body("1", "2", "10.00", key), headers=_headers(1)
+    )
+    retry = await sqlite_client.post(
+        "/accounts/transfer", json=_body("1", "2", "10.00", key), headers=_headers(1)
+    )
+    async with sqlite_sessions() as db:
+        balance = (await db.execute(select(Account.balance).where(Account.id == 1))).scalar()
+
+    assert first.status_code == retry.status_code == 201
+    assert "Idempotent-Replayed" not in first.headers
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+    assert balance == Decimal("90.00")
+
+
+@pytest.mark.asyncio
+async def test_key_reused_for_another_transfer_conflicts(sqlite_sessions, seed_accounts, sqlite_client):
+    async with sqlite_sessions() as db:
+        await seed_accounts(db, (1, 100), (2, 100))
+    key = uuid.uuid4().hex
+
+    first = await sqlite_client.post(
+        "/accounts/transfer", json=_body("1", "2", "10.00", key), headers=_headers(1)
+    )
+    other_amount = await sqlite_client.post(
+        "/accounts/transfer", json=_body("1", "2", "11.00", key), headers=_headers(1)
+    )
+    # Same body, different user: keys are not shared between users.
+    other_user = await sqlite_client.post(
+        "/accounts/transfer", json=_body("2", "1", "10.00", key), headers=_headers(2)
+    )
+    async with sqlite_sessions() as db:
+        transfers = (await db.execute(select(func.count()).select_from(Transfer))).scalar()
+
+    assert first.status_code == 201
+    assert other_amount.status_code == 409
+    assert other_user.status_code == 409
+    assert transfers == 1
+
+
+@pytest.mark.asyncio
+async def test_key_without_a_loadable_original_conflicts(sqlite_sessions, seed_accounts):
+    key = uuid.uuid4().hex
+    async with sqlite_sessions() as db:
+        await seed_accounts(db, (1, 100), (2, 0))
+        # The key's transfer is gone, say with an archived partition.
+        await db.execute(
+            insert(TransferIdempotencyKey).values(
+                idempotency_key=key,
+                transfer_id=999,
+                transfer_created_at=datetime(2020, 1, 1, tzinfo=timezone.utc),
+            )
+        )
+        await db.commit()
+
+        with pytest.raises(IdempotencyKeyUsedError):
+            await create_transfer(db, 1, "1", "2", Decimal("10"), "rent", idempotency_key=key)
+        balance = (await db.execute(select(Account.balance).where(Account.id == 1))).scalar()
+
+    assert balance == Decimal("100.00")
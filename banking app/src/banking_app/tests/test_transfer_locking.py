@@ -0,0 +1,66 @@
+import asyncio
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event, func, select
+
+from banking_app.crud.transfer import InsufficientFundsError, create_transfer
+from banking_app.models import Account, Ledger
+
+
+@pytest.mark.asyncio
+async def test_concurrent_debits_cannot_overdraw(postgres_sessions, seed_accounts):
+    async with postgres_sessions() as db:
+        await seed_accounts(db, (1, 100), (2, 50))
+
+    async def transfer(user_id, source, destination):
+        async with postgres_sessions() as db:
+            try:
+                await create_transfer(db, user_id, source, destination, Decimal("10"), "race")
+            except InsufficientFundsError:
+                return 0
+            return 1
+
+    # Both directions at once, so the lock order matters too.
+    outcomes = await asyncio.gather(
+        *(transfer(1, "1", "2") for _ in range(20)),
+        *(transfer(2, "2", "1") for _ in range(10)),
+    )
+    async with postgres_sessions() as db:
+        balances = (await db.execute(select(Account.balance).order_by(Account.id))).scalars().all()
+        ledger = (
+            await db.execute(
+                select(Ledger.account_id, func.sum(Ledger.amount))
+                .group_by(Ledger.account_id)
+                .order_by(Ledger.account_id)
+            )
+        ).all()
+
+    sent, returned = sum(outcomes[:20]), sum(outcomes[20:])
+    assert min(balances) >= 0
+    assert balances == [
+        Decimal("100.00") - 10 * sent + 10 * returned,
+        Decimal("50.00") - 10 * returned + 10 * sent,
+    ]
+    assert [total for _, total in ledger] == [
+        Decimal(-10 * sent + 10 * returned),
+        Decimal(10 * sent - 10 * returned),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_transfer_is_one_statement_and_commit(postgres_sessions, seed_accounts):
+    async with postgres_sessions() as db:
+        await seed_accounts(db, (1, 100), (2, 0))
+    statements = []
+
+    async with postgres_sessions() as db:
+        engine = db.get_bind()
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            await create_transfer(db, 1, "1", "2", Decimal("10"), "rent", idempotency_key="k")
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+    assert len(statements) == 1
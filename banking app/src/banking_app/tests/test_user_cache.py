@@ -0,0 +1,43 @@
+import pytest
+
+from banking_app.auth.dependencies import user_cache
+from banking_app.auth.utils import create_access_token
+from banking_app.metrics import render
+from banking_app.models import User
+
+
+def _headers(user_id):
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+
+@pytest.mark.asyncio
+async def test_updating_or_deleting_a_user_evicts_the_cached_principal(
+    sqlite_sessions, seed_accounts, sqlite_client
+):
+    async with sqlite_sessions() as db:
+        await seed_accounts(db, (1, 0))
+
+    hits = user_cache.hits
+    first = await sqlite_client.get("/auth/me", headers=_headers(1))
+    cached = 1 in user_cache
+    await sqlite_client.get("/auth/me", headers=_headers(1))
+    exported = f"user_cache_hits_total {hits + 1}" in render()
+
+    async with sqlite_sessions() as db:
+        user = await db.get(User, 1)
+        user.full_name = "Renamed"
+        await db.commit()
+    evicted_by_update = 1 not in user_cache
+    renamed = await sqlite_client.get("/auth/me", headers=_headers(1))
+
+    async with sqlite_sessions() as db:
+        await db.delete(await db.get(User, 1))
+        await db.commit()
+    evicted_by_delete = 1 not in user_cache
+    deleted = await sqlite_client.get("/auth/me", headers=_headers(1))
+
+    assert first.json()["full_name"] == "User 1"
+    assert cached and evicted_by_update and evicted_by_delete
+    assert exported
+    assert renamed.json()["full_name"] == "Renamed"
+    assert deleted.status_code == 401
@@ -0,0 +1,87 @@
+"""When each user last changed their accounts, shared by every worker on a host.
+
+``database.ReadRouter`` keeps a user's reads on the primary until a replica
+has replayed their latest write, and has to see writes made through any
+worker, including transfers *to* the user. The times live in a slot file
+like the rate limiter's buckets (see ``slot_files.py``): a fixed array of
+slots indexed by user id, each locked for the eight bytes it is read or
+written.
+
+Users whose ids share a slot see each other's writes, which only sends some
+reads to the primary that did not need to go there. Times are wall-clock
+(``time.time()``) so they can be compared with a replica's
+``pg_last_xact_replay_timestamp()``; keep the hosts' clocks in sync.
+"""
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import struct
+import time
+
+from .config import settings
+from .slot_files import default_path as _slot_file_path, locked_slot, map_slot_file
+
+logger = logging.getLogger(__name__)
+
+_SLOT = struct.Struct("<d")  # unix time of the last write, 0.0 for none
+
+
+def default_path() -> str:
+    return _slot_file_path("banking_app_write_times")
+
+
+class UserWriteTimes:
+    """Last write time per user id, in a file mapped by every worker.
+
+    The file is opened on first use. If it cannot be, times are kept in
+    this process only, as before workers shared them.
+    """
+
+    def __init__(self, path: str | None = None, slots: int = 65536):
+        self.path = path
+        self.slots = slots
+        self._fd: int | None = None
+        self._map: mmap.mmap | None = None
+        self._local: dict[int, float] = {}
+        self._disabled = False
+
+    def _open(self) -> bool:
+        if self._map is None and not self._disabled:
+            try:
+                self._fd, self._map = map_slot_file(
+                    self.path or default_path(), self.slots * _SLOT.size
+                )
+            except OSError as exc:
+                logger.warning(f"Write times are per process: {exc}")
+                self._disabled = True
+        return self._map is not None
+
+    def mark(self, user_id: int, now: float | None = None) -> None:
+        """Record that ``user_id``'s balances or accounts just changed."""
+        now = time.time() if now is None else now
+        if not self._open():
+            self._local[user_id] = now
+            return
+        offset = (user_id % self.slots) * _SLOT.size
+        with locked_slot(self._fd, offset, _SLOT.size):
+            (current,) = _SLOT.unpack_from(self._map, offset)
+            _SLOT.pack_into(self._map, offset, max(current, now))
+
+    def get(self, user_id: int) -> float:
+        """Unix time of ``user_id``'s last write, or 0.0 if none is known."""
+        if not self._open():
+            return self._local.get(user_id, 0.0)
+        offset = (user_id % self.slots) * _SLOT.size
+        with locked_slot(self._fd, offset, _SLOT.size, exclusive=False):
+            return _SLOT.unpack_from(self._map, offset)[0]
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            os.close(self._fd)
+            self._map = self._fd = None
+
+
+user_write_times = UserWriteTimes(settings.write_times_file, settings.write_times_slots)
@@ -0,0 +1,41 @@
+import { NextRequest, NextResponse } from 'next/server'
+
+const BACKEND_URL = process.env.BACKEND_URL || 'http://localhost:8000'
+
+export async function GET(request: NextRequest) {
+  try {
+    const token = request.headers.get('authorization')?.replace('Bearer ', '')
+    if (!token) {
+      return NextResponse.json({ error: 'Unauthorized' }, { status: 401 })
+    }
+
+    const { searchParams } = new URL(request.url)
+    const days = searchParams.get('days') || '90'
+
+    const response = await fetch(`${BACKEND_URL}/accounts/summary?days=${encodeURIComponent(days)}`, {
+      headers: { 'Authorization': `Bearer ${token}` },
+    })
+
+    if (!response.ok) {
+      return NextResponse.json({ error: 'Failed to fetch summary' }, { status: response.status })
+    }
+
+    const data = await response.json()
+    // Map backend response to frontend expected format
+    return NextResponse.json({
+      since: data.since,
+      totalBalance: parseFloat(data.total_balance),
+      accounts: data.accounts.map((acc: { account_number: string; account_name: string; balance: string }) => ({
+        ...acc,
+        balance: parseFloat(acc.balance),
+      })),
+      days: data.days.map((day: { date: string; inflow: string; outflow: string }) => ({
+        date: day.date,
+        inflow: parseFloat(day.inflow),
+        outflow: parseFloat(day.outflow),
+      })),
+    })
+  } catch (error) {
+    return NextResponse.json({ error: 'Internal server error' }, { status: 500 })
+  }
+}
@@ -24,6 +24,12 @@ interface Account {
   balance: number
 }
 
+interface DailyFlow {
+  date: string
+  inflow: number
+  outflow: number
+}
+
 interface Transaction {
   id: number
   amount: number
@@ -37,6 +43,7 @@ export default function Page() {
   const { user, isLoading: authLoading } = useAuth()
   const [accounts, setAccounts] = useState<Account[]>([])
   const [transactions, setTransactions] = useState<Transaction[]>([])
+  const [summaryDays, setSummaryDays] = useState<DailyFlow[] | undefined>(undefined)
   const [isTransferModalOpen, setIsTransferModalOpen] = useState(false)
   const [isCreateAccountModalOpen, setIsCreateAccountModalOpen] = useState(false)
   const [selectedAccount, setSelectedAccount] = useState<string>("all")
@@ -46,9 +53,28 @@ export default function Page() {
   useEffect(() => {
     if (user) {
       fetchAccounts()
+      fetchSummary()
     }
   }, [user])
 
+  // One pre-aggregated response for the all-accounts chart instead of every
+  // account's raw transactions.
+  const fetchSummary = async () => {
+    const token = localStorage.getItem('token')
+    if (!token) return
+    try {
+      const response = await fetch('/api/accounts/summary?days=90', {
+        headers: { 'Authorization': `Bearer ${token}` },
+      })
+      if (response.ok) {
+        const data = await response.json()
+        setSummaryDays(data.days)
+      }
+    } catch (error) {
+      console.error('Failed to fetch summary:', error)
+    }
+  }
+
   const fetchAccounts = async () => {
     const token = localStorage.getItem('token')
     if (!token) return
@@ -143,6 +169,7 @@ export default function Page() {
       if (response.ok) {
         toast.success('Transfer completed successfully!')
         fetchAccounts()
+        fetchSummary()
         fetchTransactions()
         setIsTransferModalOpen(false)
       } else {
@@ -184,7 +211,7 @@ export default function Page() {
                </div>
                 <SectionCards accounts={accounts} transactions={transactions} isLoading={isLoadingAccounts} selectedAccount={selectedAccount} />
                <div className="px-4 lg:px-6">
-                 <ChartAreaInteractive transactions={transactions} />
+                 <ChartAreaInteractive transactions={transactions} days={selectedAccount === "all" ? summaryDays : undefined} />
                </div>
                <div className="px-4 lg:px-6">
                   <DataTable data={transactions} isLoading={isLoadingTransactions} />
@@ -50,11 +50,20 @@ interface Transaction {
   counterparty: string
 }
 
+interface DailyFlow {
+  date: string
+  inflow: number
+  outflow: number
+}
+
 interface ChartAreaInteractiveProps {
   transactions?: Transaction[]
+  // Pre-aggregated daily totals from /api/accounts/summary; used instead of
+  // transactions when given.
+  days?: DailyFlow[]
 }
 
-export function ChartAreaInteractive({ transactions = [] }: ChartAreaInteractiveProps) {
+export function ChartAreaInteractive({ transactions = [], days }: ChartAreaInteractiveProps) {
   const isMobile = useIsMobile()
   const [timeRange, setTimeRange] = React.useState("90d")
 
@@ -66,6 +75,9 @@ export function ChartAreaInteractive({ transactions = [] }: ChartAreaInteractive
 
   // Process transactions into chart data
   const chartData = React.useMemo(() => {
+    if (days) {
+      return days.map((day) => ({ date: day.date, amount: day.inflow + day.outflow }))
+    }
     const grouped: { [key: string]: number } = {}
     transactions.forEach((tx) => {
       const date = new Date(tx.timestamp).toISOString().split('T')[0]
@@ -75,7 +87,7 @@ export function ChartAreaInteractive({ transactions = [] }: ChartAreaInteractive
       date,
       amount,
     })).sort((a, b) => a.date.localeCompare(b.date))
-  }, [transactions])
+  }, [transactions, days])
 
   const filteredData = chartData.filter((item) => {
     const date = new Date(item.date)